@@ -1,9 +1,15 @@
 # analisadorSintatico.py
 
+import copy
+import gc
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 from parser import (
     Program, VarDecl, FuncDecl, ReturnStmt, IfStmt, Block, ExprStmt,
     Identifier, Literal, Unary, Binary, Assign, Call, Index, Node,
-    ArrayLiteral, WhileStmt, ForStmt
+    ArrayLiteral, WhileStmt, ForStmt, children
 )
 
 # -----------------------
@@ -19,6 +25,9 @@ class Symbol:
         self.type = type # Tipo inferido
         self.params = params if params else [] # Lista de tipos esperados
         self.return_type = return_type         # Tipo de retorno
+        # Resolução para o codegen: nó do frame dono (Program/FuncDecl) e índice do slot
+        self.frame = None
+        self.slot = None
 
 class SymbolTable:
     """Gerencia escopos aninhados para análise semântica."""
@@ -57,16 +66,104 @@ class SymbolTable:
         """Busca um símbolo APENAS no escopo atual."""
         return self.symbols.get(name)
 
+class FlatSymbolTable:
+    """Tabela de símbolos plana: um dicionário nome -> pilha de declarações.
+
+    Cada escopo guarda apenas um log (undo) dos nomes que declarou; ao sair,
+    esses nomes são desempilhados. Assim ``define``, ``resolve`` e a saída de
+    escopo custam O(1) amortizado, independente da profundidade de
+    aninhamento. As regras de redeclaração são as mesmas de ``SymbolTable``.
+    """
+    def __init__(self, scope_name="global"):
+        self.bindings = {}   # nome -> lista de (profundidade, Symbol)
+        self.scopes = [(scope_name, False, [])]  # (nome, é_de_função, log de nomes)
+        # Chamado com cada símbolo definido no escopo global (ver ParallelSemanticAnalyzer)
+        self.on_global_define = None
+
+    @property
+    def scope_name(self):
+        return self.scopes[-1][0]
+
+    @property
+    def is_function_scope(self):
+        return self.scopes[-1][1]
+
+    def enter_scope(self, scope_name="block", is_function_scope=False):
+        self.scopes.append((scope_name, is_function_scope, []))
+
+    def exit_scope(self):
+        _, _, undo_log = self.scopes.pop()
+        for name in undo_log:
+            stack = self.bindings[name]
+            stack.pop()
+            if not stack:
+                del self.bindings[name]
+
+    def define(self, symbol: Symbol):
+        """Define um novo símbolo no escopo atual, verificando redeclaração."""
+        depth = len(self.scopes) - 1
+        stack = self.bindings.setdefault(symbol.name, [])
+        if stack and stack[-1][0] == depth:
+            existing_sym = stack[-1][1]
+
+            if existing_sym.scope_type in ('let', 'const') or symbol.scope_type in ('let', 'const'):
+                return f"Erro Semântico: Identificador '{symbol.name}' já foi declarado como '{existing_sym.scope_type}' neste escopo."
+
+            # Permite re-declaração de 'var' no escopo global (se for var/var)
+            if existing_sym.scope_type == 'var' and symbol.scope_type == 'var' and not self.is_function_scope and depth == 0:
+                stack[-1] = (depth, symbol)
+            else:
+                return f"Erro Semântico: Identificador '{symbol.name}' já foi declarado neste escopo."
+        else:
+            stack.append((depth, symbol))
+            self.scopes[-1][2].append(symbol.name)
+
+        if depth == 0 and self.on_global_define is not None:
+            self.on_global_define(symbol)
+        return None
+
+    def bind_global(self, symbol: Symbol):
+        """Torna ``symbol`` a declaração global visível do nome (sem checar regras)."""
+        stack = self.bindings.setdefault(symbol.name, [])
+        if stack and stack[0][0] == 0:
+            stack[0] = (0, symbol)
+        else:
+            stack.insert(0, (0, symbol))
+            self.scopes[0][2].append(symbol.name)
+
+    def resolve(self, name: str) -> Symbol | None:
+        """Busca a declaração visível mais interna do nome."""
+        stack = self.bindings.get(name)
+        return stack[-1][1] if stack else None
+
+    def resolve_current_scope(self, name: str) -> Symbol | None:
+        """Busca um símbolo APENAS no escopo atual."""
+        stack = self.bindings.get(name)
+        if stack and stack[-1][0] == len(self.scopes) - 1:
+            return stack[-1][1]
+        return None
+
 # -----------------------
 # Analisador Semântico
 # -----------------------
 class SemanticAnalyzer:
-    def __init__(self):
+    def __init__(self, flat_scopes=True):
         self.errors = []
-        self.global_scope = SymbolTable(scope_name="global")
+        # flat_scopes: FlatSymbolTable (O(1)); False usa a cadeia de SymbolTable
+        self.flat_scopes = flat_scopes
+        if flat_scopes:
+            self.global_scope = FlatSymbolTable(scope_name="global")
+        else:
+            self.global_scope = SymbolTable(scope_name="global")
         self._define_native_functions()
         self.current_scope = self.global_scope
         self.in_function = 0
+        # Frame (Program/FuncDecl) cujas variáveis estão recebendo slots
+        self.frame = None
+        # id() das FuncDecl já declaradas pelo hoisting (ver _hoist_functions)
+        self.hoisted = set()
+        # Tabela de despacho {classe do nó: método visit_*} montada uma vez
+        self._visitors = self._build_visitors()
 
     def _define_native_functions(self):
         """Define as funções nativas especificadas no Trabalho Final."""
@@ -81,6 +178,8 @@ class SemanticAnalyzer:
             ("concat",   ["string", "string"], "string")
         ]
 
+        # Nome -> Symbol das nativas (ver _export_annotations)
+        self.natives = {}
         for name, params, ret_type in natives:
             sym = Symbol(
                 name=name, 
@@ -92,17 +191,30 @@ class SemanticAnalyzer:
                 return_type=ret_type
             )
             self.global_scope.define(sym)
+            self.natives[name] = sym
 
     def _enter_scope(self, scope_name="block", is_function_scope=False):
-        new_scope = SymbolTable(parent=self.current_scope, scope_name=scope_name, is_function_scope=is_function_scope)
-        self.current_scope = new_scope
+        if self.flat_scopes:
+            self.current_scope.enter_scope(scope_name, is_function_scope)
+        else:
+            new_scope = SymbolTable(parent=self.current_scope, scope_name=scope_name, is_function_scope=is_function_scope)
+            self.current_scope = new_scope
         if is_function_scope:
             self.in_function += 1
 
     def _exit_scope(self):
         if self.current_scope.is_function_scope:
             self.in_function -= 1
-        self.current_scope = self.current_scope.parent
+        if self.flat_scopes:
+            self.current_scope.exit_scope()
+        else:
+            self.current_scope = self.current_scope.parent
+
+    def _bind_slot(self, symbol: Symbol):
+        """Reserva para a variável o próximo slot do frame atual."""
+        symbol.frame = self.frame
+        symbol.slot = self.frame.slot_count
+        self.frame.slot_count += 1
 
     def _report_error(self, msg: str, node: Node = None):
         self.errors.append(msg)
@@ -115,11 +227,24 @@ class SemanticAnalyzer:
     # Visitor pattern
     # -------------------
 
+    def _build_visitors(self):
+        """Associa cada subclasse de Node ao seu visit_* (ou generic_visit)."""
+        visitors = {}
+        pending = list(Node.__subclasses__())
+        while pending:
+            cls = pending.pop()
+            visitors[cls] = getattr(self, f'visit_{cls.__name__}', self.generic_visit)
+            pending.extend(cls.__subclasses__())
+        return visitors
+
     def visit(self, node):
         if node is None:
             return
-        method_name = f'visit_{node.__class__.__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
+        visitor = self._visitors.get(node.__class__)
+        if visitor is None:
+            # Classe criada depois da montagem da tabela
+            visitor = getattr(self, f'visit_{node.__class__.__name__}', self.generic_visit)
+            self._visitors[node.__class__] = visitor
         return visitor(node)
 
     def generic_visit(self, node):
@@ -138,8 +263,19 @@ class SemanticAnalyzer:
     # --- Visitors ---
     
     def visit_Program(self, node: Program):
+        self.frame = node
+        node.slot_count = 0
+        self._hoist_functions(node.statements)
         self.generic_visit(node)
 
+    def _hoist_functions(self, statements):
+        """Declara as funções do bloco antes dos demais statements (como em
+        JS): chamadas podem aparecer antes da definição."""
+        for stmt in statements:
+            if isinstance(stmt, FuncDecl):
+                self._declare_function(stmt)
+                self.hoisted.add(id(stmt))
+
     def visit_VarDecl(self, node: VarDecl):
         name = node.name.name
         kind = node.kind.lower()
@@ -161,6 +297,8 @@ class SemanticAnalyzer:
         
         new_symbol = Symbol(name, 'variable', mutable, kind, inferred_type)
         error_msg = self.current_scope.define(new_symbol)
+        self._bind_slot(new_symbol)
+        node.symbol = new_symbol
         
         if error_msg:
             self._report_error(error_msg)
@@ -169,6 +307,11 @@ class SemanticAnalyzer:
             self._report_error(f"Erro Semântico: Variável 'const' '{name}' deve ser inicializada.")
 
     def visit_FuncDecl(self, node: FuncDecl):
+        if id(node) not in self.hoisted:
+            self._declare_function(node)
+        self._analyze_function_body(node)
+
+    def _declare_function(self, node: FuncDecl):
         name = node.name.name
         # Tipagem dinâmica: assumimos 'any' para todos os parâmetros
         param_types = ['any'] * len(node.params)
@@ -181,8 +324,14 @@ class SemanticAnalyzer:
         error_msg = self.current_scope.define(func_symbol)
         if error_msg:
             self._report_error(error_msg)
-            
+        node.symbol = func_symbol
+
+    def _analyze_function_body(self, node: FuncDecl):
+        name = node.name.name
         self._enter_scope(scope_name=f"function:{name}", is_function_scope=True)
+        outer_frame = self.frame
+        self.frame = node
+        node.slot_count = 0
         
         param_names = set()
         for param in node.params:
@@ -190,10 +339,14 @@ class SemanticAnalyzer:
             if param_name in param_names:
                 self._report_error(f"Erro Semântico: Parâmetro '{param_name}' duplicado na função '{name}'.")
             else:
-                self.current_scope.define(Symbol(param_name, 'variable', True, 'let', 'any'))
+                param_symbol = Symbol(param_name, 'variable', True, 'let', 'any')
+                self.current_scope.define(param_symbol)
+                self._bind_slot(param_symbol)
+                param.symbol = param_symbol
                 param_names.add(param_name)
         
         self.visit(node.body)
+        self.frame = outer_frame
         self._exit_scope()
 
     def visit_ReturnStmt(self, node: ReturnStmt):
@@ -232,6 +385,7 @@ class SemanticAnalyzer:
         self._exit_scope()
 
     def visit_Block(self, node: Block):
+        self._hoist_functions(node.statements)
         self.generic_visit(node)
 
     def visit_ExprStmt(self, node: ExprStmt):
@@ -242,6 +396,7 @@ class SemanticAnalyzer:
         if isinstance(node.left, Identifier):
             name = node.left.name
             symbol = self.current_scope.resolve(name)
+            node.symbol = symbol
             if symbol is None:
                 self._report_error(f"Erro Semântico: Variável '{name}' não foi declarada antes de ser atribuída.")
             elif not symbol.mutable:
@@ -254,6 +409,7 @@ class SemanticAnalyzer:
     def visit_Identifier(self, node: Identifier):
         name = node.name
         symbol = self.current_scope.resolve(name)
+        node.symbol = symbol
         if symbol is None:
             self._report_error(f"Erro Semântico: Uso de identificador '{name}' não declarado.")
 
@@ -271,6 +427,7 @@ class SemanticAnalyzer:
         if isinstance(node.callee, Identifier):
             callee_name = node.callee.name
             func_symbol = self.current_scope.resolve(callee_name)
+            node.symbol = func_symbol
             
             if func_symbol is None:
                 self._report_error(f"Erro Semântico: Função '{callee_name}' não foi declarada.")
@@ -303,4 +460,245 @@ class SemanticAnalyzer:
 
     def visit_ArrayLiteral(self, node: ArrayLiteral):
         for element in node.elements:
-            self.visit(element)
\ No newline at end of file
+            self.visit(element)
+
+
+# -----------------------
+# Análise semântica paralela
+# -----------------------
+class ParallelSemanticAnalyzer(SemanticAnalyzer):
+    """Análise em duas fases sobre a tabela de símbolos plana.
+
+    Fase 1 (sequencial): declara as funções do topo (hoisting) e percorre
+    o programa, declarando variáveis globais e analisando o código que
+    não está em funções;
+    cada símbolo global é registrado com o índice do statement que o
+    declarou. Fase 2: os corpos das funções do topo são analisados em
+    paralelo, cada um vendo só os globais declarados até a própria
+    função (a mesma visão da análise sequencial). Os erros são
+    intercalados na ordem do código-fonte.
+
+    Usa threads em Python sem GIL e processos nos demais casos. Com
+    processos, cada worker devolve junto com os erros as anotações
+    (símbolos e slots) dos corpos, em códigos compactos alinhados aos
+    nós anotáveis (ver _export_annotations), e o processo principal as
+    refaz nos próprios nós: a AST sai igual à da análise sequencial.
+    """
+    def __init__(self, workers=None, executor=None):
+        super().__init__(flat_scopes=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor  # 'process', 'thread' ou None (automático)
+
+    def _executor_kind(self):
+        if self.executor:
+            return self.executor
+        gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+        return "process" if gil_enabled else "thread"
+
+    def visit_Program(self, node: Program):
+        self.frame = node
+        node.slot_count = 0
+
+        # Fase 1: globais e código do topo. Funções são declaradas antes
+        # de tudo (hoisting), com índice -1: todos os corpos as enxergam
+        global_events = []   # (índice do statement, Symbol)
+        current_index = -1
+        self.global_scope.on_global_define = lambda symbol: global_events.append((current_index, symbol))
+        self._hoist_functions(node.statements)
+        hoisting_errors = self.errors[:]
+        errors_by_statement = {}
+        pending = []         # (índice, FuncDecl)
+        for current_index, stmt in enumerate(node.statements):
+            before = len(self.errors)
+            if isinstance(stmt, FuncDecl):
+                pending.append((current_index, stmt))
+            else:
+                self.visit(stmt)
+            errors_by_statement[current_index] = self.errors[before:]
+        self.global_scope.on_global_define = None
+
+        # Fase 2: corpos das funções
+        body_errors = dict(self._analyze_bodies(global_events, pending))
+
+        self.errors = hoisting_errors
+        for index in range(len(node.statements)):
+            self.errors.extend(errors_by_statement[index])
+            self.errors.extend(body_errors.get(index, ()))
+
+    def _analyze_bodies(self, global_events, pending):
+        """Retorna [(índice, erros)] dos corpos de ``pending``, já anotados."""
+        if self.workers <= 1 or len(pending) < 2:
+            return _analyze_function_bodies(global_events, pending)
+
+        size = -(-len(pending) // self.workers)
+        ranges = [(start, min(start + size, len(pending))) for start in range(0, len(pending), size)]
+
+        if self._executor_kind() == "thread":
+            with ThreadPoolExecutor(self.workers) as pool:
+                futures = [pool.submit(_analyze_function_bodies, global_events, pending[start:end])
+                           for start, end in ranges]
+                return [result for future in futures for result in future.result()]
+
+        # Com a AST inteira viva, cada coleta completa do gc a percorre, e
+        # custa mais que a própria análise; a parte serial deste processo
+        # só cria objetos que continuam vivos, então o gc fica pausado
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._analyze_in_processes(global_events, pending, ranges)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _analyze_in_processes(self, global_events, pending, ranges):
+        # Estado enviado uma vez por processo (herdado sem cópia com fork);
+        # símbolos sem o frame, que levaria a AST inteira na serialização
+        events = [(index, _portable_symbol(symbol)) for index, symbol in global_events]
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                 initargs=(events, pending)) as pool:
+            futures = [pool.submit(_analyze_worker_range, start, end) for start, end in ranges]
+            # Os nós a anotar são localizados enquanto os workers analisam;
+            # quando as anotações chegam, só falta atribuí-las
+            nodes = {index: _annotated_nodes(func) for index, func in pending}
+            results = []
+            for future in futures:
+                for index, errors, annotations in future.result():
+                    _import_annotations(nodes[index], annotations, global_events, self.natives)
+                    results.append((index, errors))
+        return results
+
+
+def _analyze_function_bodies(global_events, functions, natives=None):
+    """Analisa (em ordem) os corpos de ``functions`` = [(índice, FuncDecl)].
+
+    Retorna [(índice, erros)]; as anotações ficam nos próprios nós. Se
+    dado, ``natives`` recebe os símbolos das nativas usados na análise.
+    """
+    analyzer = SemanticAnalyzer(flat_scopes=True)
+    if natives is not None:
+        natives.update(analyzer.natives)
+    next_event = 0
+    results = []
+    for index, func in functions:
+        while next_event < len(global_events) and global_events[next_event][0] <= index:
+            analyzer.global_scope.bind_global(global_events[next_event][1])
+            next_event += 1
+        analyzer.errors = []
+        analyzer._analyze_function_body(func)
+        results.append((index, analyzer.errors))
+    return results
+
+
+# Estado de cada processo worker: (eventos globais, funções pendentes)
+_worker_state = None
+
+
+def _init_worker(global_events, pending):
+    global _worker_state
+    _worker_state = (global_events, pending)
+    # A AST herdada (fork) fica fora das coletas do gc do worker (que herda
+    # o gc pausado do processo principal)
+    gc.freeze()
+    gc.enable()
+
+
+def _analyze_worker_range(start, end):
+    """Como _analyze_function_bodies, mas retorna [(índice, erros,
+    anotações)]: os nós anotados ficam neste processo."""
+    global_events, pending = _worker_state
+    batch = pending[start:end]
+    natives = {}
+    results = _analyze_function_bodies(global_events, batch, natives)
+    references = {id(symbol): ('global', position) for position, (_, symbol) in enumerate(global_events)}
+    references.update((id(symbol), ('native', name)) for name, symbol in natives.items())
+    return [(index, errors, _export_annotations(func, references))
+            for (index, errors), (_, func) in zip(results, batch)]
+
+
+# Classes dos nós que a análise anota (``symbol``; FuncDecl também ``slot_count``)
+_ANNOTATED_NODES = {Identifier, VarDecl, Assign, Call, FuncDecl}
+
+# Códigos de _export_annotations além dos índices de referência
+_NOT_ANNOTATED, _NO_SYMBOL = -1, -2
+
+
+def _annotated_nodes(func):
+    """Nós de _ANNOTATED_NODES da subárvore de ``func``, em pré-ordem
+    (a mesma nos dois processos, que têm cópias da mesma árvore)"""
+    nodes, stack = [], [func]
+    while stack:
+        node = stack.pop()
+        if node.__class__ in _ANNOTATED_NODES:
+            nodes.append(node)
+        stack.extend(children(node))
+    return nodes
+
+
+def _export_annotations(func, shared):
+    """Anotações do corpo de ``func`` para o processo principal.
+
+    Retorna (códigos, referências, slots): um código por nó de
+    _annotated_nodes (_NOT_ANNOTATED, _NO_SYMBOL ou o índice em
+    referências), referências ('global', índice do evento), ('native',
+    nome) ou ('local', símbolo sem o frame, posição do frame) e
+    [(posição, slot_count)] das FuncDecl. ``shared`` mapeia id dos
+    símbolos globais e nativos para a referência. O símbolo da própria
+    função vem do hoisting, feito no processo principal.
+    """
+    nodes = _annotated_nodes(func)
+    positions = {id(node): position for position, node in enumerate(nodes)
+                 if node.__class__ is FuncDecl}
+    codes, references, slots, known = [_NOT_ANNOTATED], [], [], {}
+    for node in nodes[1:]:
+        if 'symbol' not in node.__dict__:
+            codes.append(_NOT_ANNOTATED)
+            continue
+        symbol = node.symbol
+        if symbol is None:
+            codes.append(_NO_SYMBOL)
+            continue
+        code = known.get(id(symbol))
+        if code is None:
+            code = known[id(symbol)] = len(references)
+            reference = shared.get(id(symbol))
+            if reference is None:
+                local = copy.copy(symbol)
+                local.frame = None
+                reference = ('local', local, positions[id(symbol.frame)] if symbol.frame is not None else None)
+            references.append(reference)
+        codes.append(code)
+    for position, node in enumerate(nodes):
+        if 'slot_count' in node.__dict__:
+            slots.append((position, node.slot_count))
+    return codes, references, slots
+
+
+def _import_annotations(nodes, annotations, global_events, natives):
+    """Refaz nos ``nodes`` (_annotated_nodes da função) as anotações de
+    _export_annotations, com os símbolos globais e nativos deste processo"""
+    codes, references, slots = annotations
+    symbols = []
+    for reference in references:
+        if reference[0] == 'global':
+            symbols.append(global_events[reference[1]][1])
+        elif reference[0] == 'native':
+            symbols.append(natives[reference[1]])
+        else:
+            _, local, frame = reference
+            local.frame = nodes[frame] if frame is not None else None
+            symbols.append(local)
+    for node, code in zip(nodes, codes):
+        if code >= 0:
+            node.symbol = symbols[code]
+        elif code == _NO_SYMBOL:
+            node.symbol = None
+    for position, slot_count in slots:
+        nodes[position].slot_count = slot_count
+
+
+def _portable_symbol(symbol: Symbol) -> Symbol:
+    portable = copy.copy(symbol)
+    portable.frame = None
+    portable.slot = None
+    return portable
+
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vazão da análise semântica e da geração de código
+============================================================
+
+Gera um programa grande (F funções com laços, condicionais e expressões
+aritméticas), conta os nós da AST e mede quantos nós por segundo o
+``SemanticAnalyzer`` e o ``LLVMCodeGenerator`` processam. O tempo da
+geração inclui a construção do módulo ``llvmlite.ir`` e a impressão do
+IR textual (sem otimização nem JIT).
+
+Uso:
+    python benchmarks/bench_codegen_throughput.py [--functions 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser, Node
+from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+
+FUNCTION = """
+function f{i}(a, b) {{
+    var x = a * 2 + b - {i};
+    var y = 0;
+    for (var k = 0; k < 10; k = k + 1) {{
+        if (x > k) {{
+            y = y + (x - k) * (a + 1);
+        }} else {{
+            y = y - k / (b + 1);
+        }}
+    }}
+    while (y > 100) {{
+        y = y / 2;
+    }}
+    return x + y * -1;
+}}
+"""
+
+
+def build_program(functions):
+    body = "".join(FUNCTION.format(i=i) for i in range(functions))
+    calls = " + ".join(f"f{i}(1, 2)" for i in range(min(functions, 50)))
+    return body + f"var total = {calls};\n"
+
+
+def count_nodes(node):
+    count = 1
+    for child in vars(node).values():
+        for item in (child if isinstance(child, list) else [child]):
+            if isinstance(item, Node):
+                count += count_nodes(item)
+    return count
+
+
+def measure(step, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        step()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão do frontend semântico e do codegen")
+    parser.add_argument("--functions", type=int, default=2000, help="Número de funções geradas")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10000)
+    ast = Parser(Lexer(build_program(args.functions))).parse_program()
+    nodes = count_nodes(ast)
+    print(f"{args.functions} funções, {nodes} nós na AST")
+
+    def analyze():
+        SemanticAnalyzer().analyze(ast)
+
+    def generate():
+        LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)._generate_program(ast)
+
+    print(f"{'etapa':>12} {'tempo (s)':>10} {'nós/s':>12}")
+    for name, step in (("semântica", analyze), ("codegen", generate)):
+        elapsed = measure(step, args.repeat)
+        print(f"{name:>12} {elapsed:>10.3f} {nodes / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inicialização de tabelas constantes
+==============================================
+
+Gera um programa com T tabelas de E elementos e mede o tempo de
+execução da main via JIT (a "inicialização" do script). Compara:
+
+- ``var``: literal constante, descritor sobre a global (copy-on-write)
+- ``const``: descritor global usado no lugar, sem nenhum código
+- ``dinâmico``: os mesmos literais com um termo não constante
+  (``e + zero``), materializados elemento a elemento
+
+Uso:
+    python benchmarks/bench_constant_tables.py [--tables 200] [--elements 500]
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from codegen import LLVMCodeGenerator, OptimizationLevel
+
+
+def build_program(tables, elements, kind):
+    lines = ["var zero = 0;"]
+    for t in range(tables):
+        if kind == "dinamico":
+            values = ", ".join(f"{t + e} + zero" for e in range(elements))
+        else:
+            values = ", ".join(str(t + e) for e in range(elements))
+        keyword = "const" if kind == "const" else "var"
+        lines.append(f"{keyword} tabela{t} = [{values}];")
+    lines.append(f"return tabela{tables - 1}[{elements - 1}];")
+    return "\n".join(lines)
+
+
+def run(source, repeat=5):
+    ast = Parser(Lexer(source)).parse_program()
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    generator.generate_code(ast)
+    engine = generator.compile_to_jit()
+    main = ctypes.CFUNCTYPE(ctypes.c_int32)(engine.get_function_address("main"))
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        main()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tabelas constantes")
+    parser.add_argument("--tables", type=int, default=200, help="Número de tabelas")
+    parser.add_argument("--elements", type=int, default=500, help="Elementos por tabela")
+    args = parser.parse_args()
+
+    total = args.tables * args.elements
+    print(f"{args.tables} tabelas x {args.elements} elementos ({total} elementos)")
+    print(f"{'modo':>10} {'tempo (ms)':>12} {'ns/elemento':>12}")
+    for kind in ("dinamico", "var", "const"):
+        elapsed = run(build_program(args.tables, args.elements, kind))
+        print(f"{kind:>10} {elapsed * 1e3:>12.3f} {elapsed / total * 1e9:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU alvo (--cpu) e multiversão (--multiversion)
+==========================================================
+
+A redução de ``bench_fast_math.py`` (vetorizável com fast-math) compilada
+para a CPU genérica (SSE2), para a do host (``cpu="native"``) e para a
+genérica com multiversão: o mesmo binário escolhe em tempo de execução a
+versão base, AVX2 ou AVX-512 de ``soma_sequencial``. Modo dividido
+(cache), em que as funções passam pelo pipeline do LLVM antes do JIT.
+
+Uso:
+    python benchmarks/bench_cpu.py [--n 100000000]
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import llvmlite.binding as llvm
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from effects import EffectAnalyzer
+from incremental import FunctionCache
+
+PROGRAM = """
+function soma_sequencial(escala) {{
+    var total = 0;
+    for (var i = 1; i <= {n}; i = i + 1) {{
+        total = total + i * escala;
+    }}
+    return total;
+}}
+var escala = 1;
+println(soma_sequencial(escala));
+"""
+
+CONFIGURATIONS = (
+    ("genérica", {}),
+    ("native", {"cpu": "native"}),
+    ("multiversão", {"multiversion": True}),
+)
+
+
+def build(source, options, cache_dir):
+    program = Parser(Lexer(source)).parse_program()
+    SemanticAnalyzer().analyze(program)
+    EffectAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O3, fast_math=True,
+                                  cache=FunctionCache(cache_dir), **options)
+    generator.generate_code(program)
+    return generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000_000)
+    args = parser.parse_args()
+    source = PROGRAM.format(n=args.n)
+
+    print(f"soma_sequencial({args.n}) em O3 com fast-math; host: {llvm.get_host_cpu_name()}")
+    print(f"{'alvo':>12} {'execução (s)':>13} {'Melem/s':>9}")
+    for label, options in CONFIGURATIONS:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            generator = build(source, options, cache_dir)
+            start = time.perf_counter()
+            generator.run_jit()
+            ctypes.CDLL(None).fflush(None)
+            elapsed = time.perf_counter() - start
+        print(f"{label:>12} {elapsed:>13.3f} {args.n / elapsed / 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: atributos de efeito (readnone, willreturn...) nas funções
+=====================================================================
+
+Cada função é gerada num módulo próprio (modo dividido, via cache
+incremental), então quem chama só vê a declaração da função chamada.
+Sem os atributos do ``EffectAnalyzer`` o LLVM precisa supor que toda
+chamada escreve na memória e pode não retornar: as duas chamadas
+repetidas de ``operacao_simples(x, y)`` e a chamada invariante no laço
+ficam como estão. Com os atributos elas viram uma só e saem do laço.
+
+Mede as chamadas restantes no IR de ``calcula`` e o tempo de execução.
+
+Uso:
+    python benchmarks/bench_effects.py [--iterations 20000000]
+"""
+
+import argparse
+import ctypes
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from effects import EffectAnalyzer
+from incremental import FunctionCache
+
+PROGRAM = """
+function operacao_simples(x, y) {{ return x * y + x / (y + 1); }}
+function quadrado(x) {{ return x * x; }}
+function calcula(n, base) {{
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) {{
+        total = total + operacao_simples(i, base) - operacao_simples(i, base) / 2;
+        total = total + quadrado(base);
+    }}
+    return total;
+}}
+println(calcula({iterations}, 3));
+"""
+
+
+def build(source, effects, cache_dir):
+    program = Parser(Lexer(source)).parse_program()
+    SemanticAnalyzer().analyze(program)
+    if effects:
+        EffectAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2,
+                                  cache=FunctionCache(cache_dir))
+    ir_code = generator.generate_code(program)
+    return generator, ir_code
+
+
+def calls_in(ir_code, function):
+    body = re.split(rf'define double @"?{function}"?\(', ir_code, maxsplit=1)[1].split("\n}", 1)[0]
+    return sum(1 for line in body.splitlines() if " call " in line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000_000)
+    args = parser.parse_args()
+    source = PROGRAM.format(iterations=args.iterations)
+
+    print(f"calcula({args.iterations}, 3) em O2, modo dividido")
+    print(f"{'atributos':>10} {'chamadas':>9} {'execução (s)':>13}")
+    for effects in (False, True):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            generator, ir_code = build(source, effects, cache_dir)
+            start = time.perf_counter()
+            generator.run_jit()
+            ctypes.CDLL(None).fflush(None)
+            elapsed = time.perf_counter() - start
+        print(f"{'sim' if effects else 'não':>10} {calls_in(ir_code, 'calcula'):>9} {elapsed:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
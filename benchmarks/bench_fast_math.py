@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: redução de ponto flutuante com --fast-math
+=====================================================
+
+``total = total + i`` só pode ser somado em ordem: sem ``reassoc`` o
+vetorizador não separa a soma em parciais por lane. Com fast-math
+(``LLVMCodeGenerator(fast_math=True)``) o laço de ``--n`` elementos é
+vetorizado. Modo dividido (cache), em que as funções passam pelo pipeline
+de otimização do LLVM antes do JIT.
+
+Uso:
+    python benchmarks/bench_fast_math.py [--n 100000000]
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from effects import EffectAnalyzer
+from incremental import FunctionCache
+
+PROGRAM = """
+function soma_sequencial(escala) {{
+    var total = 0;
+    for (var i = 1; i <= {n}; i = i + 1) {{
+        total = total + i * escala;
+    }}
+    return total;
+}}
+var escala = 1;
+println(soma_sequencial(escala));
+"""
+
+
+def build(source, fast_math, cache_dir):
+    program = Parser(Lexer(source)).parse_program()
+    SemanticAnalyzer().analyze(program)
+    EffectAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O3,
+                                  cache=FunctionCache(cache_dir), fast_math=fast_math)
+    ir_code = generator.generate_code(program)
+    return generator, ir_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000_000)
+    args = parser.parse_args()
+    source = PROGRAM.format(n=args.n)
+
+    print(f"soma_sequencial({args.n}) em O3, modo dividido")
+    print(f"{'fast-math':>9} {'vetorizado':>10} {'execução (s)':>13} {'Melem/s':>9}")
+    for fast_math in (False, True):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            generator, ir_code = build(source, fast_math, cache_dir)
+            start = time.perf_counter()
+            generator.run_jit()
+            ctypes.CDLL(None).fflush(None)
+            elapsed = time.perf_counter() - start
+        vectorized = "<2 x double>" in ir_code or "<4 x double>" in ir_code
+        print(f"{'sim' if fast_math else 'não':>9} {'sim' if vectorized else 'não':>10} "
+              f"{elapsed:>13.3f} {args.n / elapsed / 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recompilação incremental com cache por função
+========================================================
+
+Gera um programa com F funções e mede geração de IR + otimização (O2),
+sem contar a análise léxica/sintática:
+
+- sequencial: um módulo só, otimizado inteiro (sem cache)
+- cache frio: cada função gerada, otimizada e gravada no cache
+- cache quente: nada mudou, todas as funções vêm do disco
+- uma função alterada: só ela é regerada; o resto é religado do cache
+
+Uso:
+    python benchmarks/bench_incremental.py [--functions 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import llvmlite.binding as llvm
+
+from lexer import Lexer
+from parser import Parser
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from incremental import FunctionCache
+
+FUNCTION = """
+function f{i}(a, b) {{
+    var x = a * 2 + b - {i};
+    var y = 0;
+    for (var k = 0; k < 10; k = k + 1) {{
+        if (x > k) {{
+            y = y + (x - k) * (a + 1);
+        }} else {{
+            y = y - k / (b + 1);
+        }}
+    }}
+    return x + y + f{prev}(a, b);
+}}
+"""
+
+
+def build_program(functions, edited=None):
+    parts = ["function f0(a, b) { return a; }"]
+    for i in range(1, functions):
+        part = FUNCTION.format(i=i, prev=i - 1)
+        if i == edited:
+            part = part.replace("k < 10", "k < 11")
+        parts.append(part)
+    parts.append(f"var total = f{functions - 1}(1, 2);")
+    return "".join(parts)
+
+
+def sequential(program):
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2)
+    generator._generate_program(program)
+    module = llvm.parse_assembly(str(generator.module))
+    generator._run_pass_pipeline(module)
+    return module
+
+
+def cached(program, directory):
+    cache = FunctionCache(directory)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, cache=cache)
+    generator.generate_code(program)
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da recompilação incremental")
+    parser.add_argument("--functions", type=int, default=500, help="Número de funções")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(20000)
+    source = build_program(args.functions)
+    edited = build_program(args.functions, edited=args.functions // 2)
+    print(f"{args.functions} funções")
+
+    program = Parser(Lexer(source)).parse_program()
+    start = time.perf_counter()
+    sequential(program)
+    baseline = time.perf_counter() - start
+    print(f"{'cenário':>18} {'tempo (s)':>10} {'geradas':>8} {'speedup':>8}")
+    print(f"{'sequencial':>18} {baseline:>10.3f} {args.functions:>8} {1.0:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, text in (("cache frio", source), ("cache quente", source),
+                            ("1 função alterada", edited)):
+            program = Parser(Lexer(text)).parse_program()
+            start = time.perf_counter()
+            cache = cached(program, directory)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>18} {elapsed:>10.3f} {cache.misses:>8} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
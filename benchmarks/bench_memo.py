@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoização de funções recursivas puras
+=================================================
+
+``fib`` ingênuo faz um número exponencial de chamadas; com ``--memoize``
+(``EffectAnalyzer(memoize=True)``) cada argumento é calculado uma vez e
+as demais chamadas são acertos na tabela da função.
+
+Uso:
+    python benchmarks/bench_memo.py [--n 40]
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from effects import EffectAnalyzer
+
+PROGRAM = """
+function fib(n) {{ if (n < 2) {{ return n; }} return fib(n - 1) + fib(n - 2); }}
+println(fib({n}));
+"""
+
+
+def build(source, memoize):
+    program = Parser(Lexer(source)).parse_program()
+    SemanticAnalyzer().analyze(program)
+    EffectAnalyzer(memoize=memoize).analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2)
+    generator.generate_code(program)
+    return generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=40)
+    args = parser.parse_args()
+    source = PROGRAM.format(n=args.n)
+
+    print(f"fib({args.n}) em O2")
+    print(f"{'memoização':>10} {'execução (s)':>13}")
+    for memoize in (False, True):
+        generator = build(source, memoize)
+        start = time.perf_counter()
+        generator.run_jit()
+        ctypes.CDLL(None).fflush(None)
+        elapsed = time.perf_counter() - start
+        print(f"{'sim' if memoize else 'não':>10} {elapsed:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
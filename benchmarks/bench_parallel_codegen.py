@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: geração de código paralela com ligação de módulos
+============================================================
+
+Gera um programa com F funções e mede geração de IR + otimização (O2):
+
+- sequencial: um módulo só, otimizado inteiro no processo principal
+- ``jobs = N``: lotes de funções gerados e otimizados em N processos,
+  ligados ao módulo da main com ``link_in`` (sem reotimização)
+
+Uso:
+    python benchmarks/bench_parallel_codegen.py [--functions 1000] [--max-jobs N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import llvmlite.binding as llvm
+
+from lexer import Lexer
+from parser import Parser
+from codegen import LLVMCodeGenerator, OptimizationLevel
+
+FUNCTION = """
+function f{i}(a, b) {{
+    var x = a * 2 + b - {i};
+    var y = 0;
+    for (var k = 0; k < 10; k = k + 1) {{
+        if (x > k) {{
+            y = y + (x - k) * (a + 1);
+        }} else {{
+            y = y - k / (b + 1);
+        }}
+    }}
+    return x + y + f{prev}(a, b);
+}}
+"""
+
+
+def build_program(functions):
+    parts = ["function f0(a, b) { return a; }"]
+    parts += [FUNCTION.format(i=i, prev=i - 1) for i in range(1, functions)]
+    parts.append(f"var total = f{functions - 1}(1, 2);")
+    return "".join(parts)
+
+
+def sequential(source):
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2)
+    generator._generate_program(Parser(Lexer(source)).parse_program())
+    module = llvm.parse_assembly(str(generator.module))
+    generator._run_pass_pipeline(module)
+    return module
+
+
+def parallel(source, jobs):
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, jobs=jobs)
+    generator.generate_code(Parser(Lexer(source)).parse_program())
+    return generator.linked_module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da geração de código paralela")
+    parser.add_argument("--functions", type=int, default=1000, help="Número de funções")
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1,
+                        help="Maior número de processos testado")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(20000)
+    source = build_program(args.functions)
+    print(f"{args.functions} funções, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    sequential(source)
+    baseline = time.perf_counter() - start
+    print(f"{'jobs':>10} {'tempo (s)':>10} {'speedup':>8}")
+    print(f"{'sequencial':>10} {baseline:>10.3f} {1.0:>8.2f}")
+    jobs = 2
+    while jobs <= max(args.max_jobs, 2):
+        start = time.perf_counter()
+        parallel(source, jobs)
+        elapsed = time.perf_counter() - start
+        print(f"{jobs:>10} {elapsed:>10.3f} {baseline / elapsed:>8.2f}")
+        jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
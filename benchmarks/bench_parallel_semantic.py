@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: análise semântica paralela
+=====================================
+
+Gera um programa com F funções e compara a análise sequencial com a
+``ParallelSemanticAnalyzer`` usando de 1 a N workers (processos, ou
+threads em Python sem GIL). Com processos, o tempo inclui criar o pool e
+devolver as anotações dos corpos ao processo principal, que as refaz nos
+próprios nós enquanto os workers analisam; o ganho depende de haver um
+núcleo livre por worker.
+
+Uso:
+    python benchmarks/bench_parallel_semantic.py [--functions 4000] [--max-workers N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer, ParallelSemanticAnalyzer
+
+FUNCTION = """
+function f{i}(a, b) {{
+    let x = a * 2 + b - base;
+    var y = 0;
+    for (let k = 0; k < 10; k = k + 1) {{
+        if (x > k) {{
+            let z = (x - k) * (a + 1);
+            y = y + z;
+        }} else {{
+            y = y - k / (b + 1);
+        }}
+    }}
+    return x + y + f{prev}(a, b);
+}}
+"""
+
+
+def build_program(functions):
+    parts = ["var base = 1;", "function f0(a, b) { return a; }"]
+    parts += [FUNCTION.format(i=i, prev=i - 1) for i in range(1, functions)]
+    return "".join(parts)
+
+
+def measure(source, make_analyzer):
+    program = Parser(Lexer(source)).parse_program()
+    start = time.perf_counter()
+    errors = make_analyzer().analyze(program)
+    elapsed = time.perf_counter() - start
+    assert errors == [], errors[:3]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise semântica paralela")
+    parser.add_argument("--functions", type=int, default=4000, help="Número de funções")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="Maior número de workers testado")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(20000)
+    source = build_program(args.functions)
+    print(f"{args.functions} funções, {os.cpu_count()} CPUs")
+
+    sequential = measure(source, SemanticAnalyzer)
+    print(f"{'workers':>10} {'tempo (s)':>10} {'speedup':>8}")
+    print(f"{'sequencial':>10} {sequential:>10.3f} {1.0:>8.2f}")
+    workers = 1
+    while workers <= args.max_workers:
+        elapsed = measure(source, lambda: ParallelSemanticAnalyzer(workers=workers))
+        print(f"{workers:>10} {elapsed:>10.3f} {sequential / elapsed:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: otimização guiada por perfil (--pgo)
+===============================================
+
+Um laço quente chama ``passo``, cujo caminho raro (nunca executado no
+treino) tem várias chamadas. O mesmo programa é compilado sem perfil e
+com o perfil de uma execução de treino instrumentada (pesos dos desvios,
+``raro`` fria, bloco raro extraído por hot/cold splitting). Mostra também
+o custo da execução instrumentada. Modo dividido (cache) com o módulo
+ligado otimizado de novo (``reoptimize``), para o inliner ver a chamada
+de ``passo`` no laço da main: só com o perfil ela é quente o bastante.
+
+Uso:
+    python benchmarks/bench_pgo.py [--n 50000000]
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from effects import EffectAnalyzer
+from incremental import FunctionCache
+from pgo import raw_profile_path, source_digest, update_profile
+
+PROGRAM = """
+function raro(x) {{
+    println(x); println(x * 2); println(x * 3); println(x / 7);
+    return x - 5;
+}}
+function passo(i, escala) {{
+    if (i == -1) {{ return raro(i) + raro(escala) + raro(i + escala); }}
+    return i * escala + 1;
+}}
+var escala = 2;
+var total = 0;
+for (var i = 0; i < {n}; i = i + 1) {{ total = total + passo(i, escala); }}
+println(total);
+"""
+
+
+def build(source, cache_dir, **options):
+    program = Parser(Lexer(source)).parse_program()
+    SemanticAnalyzer().analyze(program)
+    EffectAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2,
+                                  cache=FunctionCache(cache_dir), reoptimize=True, **options)
+    generator.generate_code(program)
+    return generator
+
+
+def timed_run(generator):
+    start = time.perf_counter()
+    generator.run_jit()
+    ctypes.CDLL(None).fflush(None)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=50_000_000)
+    args = parser.parse_args()
+    source = PROGRAM.format(n=args.n)
+    digest = source_digest(source)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_path = os.path.join(work_dir, "programa.js")
+        results.append(("sem perfil", timed_run(build(source, os.path.join(work_dir, "c0")))))
+        trainer = build(source, os.path.join(work_dir, "c1"),
+                        pgo_generate=str(raw_profile_path(source_path)), source_digest=digest)
+        results.append(("instrumentado", timed_run(trainer)))
+        profile = update_profile(source_path, digest)
+        results.append(("com perfil", timed_run(build(source, os.path.join(work_dir, "c2"),
+                                                       profile=profile))))
+
+    print(f"passo() em {args.n} iterações, O2")
+    print(f"{'build':>14} {'execução (s)':>13}")
+    for label, elapsed in results:
+        print(f"{label:>14} {elapsed:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
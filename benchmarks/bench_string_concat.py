@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concatenação de strings em laço
+==========================================
+
+Constrói uma string com N pedaços (``s = s + "x"``) e mede o tempo de
+execução do programa gerado via JIT. Com o buffer crescente da runtime
+o tempo por pedaço deve ficar aproximadamente constante (custo linear).
+
+Uso:
+    python benchmarks/bench_string_concat.py [--max 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from codegen import LLVMCodeGenerator, OptimizationLevel
+
+PROGRAM = """
+var s = "";
+for (var i = 0; i < {n}; i = i + 1) {{
+    s = s + "x";
+}}
+var total = length(s);
+"""
+
+
+def run(pieces):
+    ast = Parser(Lexer(PROGRAM.format(n=pieces))).parse_program()
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    generator.generate_code(ast)
+    engine = generator.compile_to_jit()
+
+    import ctypes
+    main = ctypes.CFUNCTYPE(ctypes.c_int32)(engine.get_function_address("main"))
+    start = time.perf_counter()
+    main()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concatenação de strings")
+    parser.add_argument("--max", type=int, default=1_000_000, help="Número máximo de pedaços")
+    args = parser.parse_args()
+
+    sizes = [args.max // 8, args.max // 4, args.max // 2, args.max]
+    print(f"{'pedaços':>10} {'tempo (s)':>10} {'ns/pedaço':>10}")
+    for pieces in sizes:
+        elapsed = run(pieces)
+        print(f"{pieces:>10} {elapsed:>10.4f} {elapsed / pieces * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
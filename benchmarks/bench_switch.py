@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cadeias if/else-if de constantes como 'switch'
+=========================================================
+
+Laço no estilo de um interpretador: a cada passo um "opcode" pseudo-
+aleatório escolhe um entre ``--arms`` ramos de um if/else-if sobre a
+mesma variável. Sem o 'switch' (``codegen.MIN_SWITCH_ARMS`` acima do
+número de ramos) cada passo faz em média metade das comparações; com ele
+o despacho é um salto indexado.
+
+Uso:
+    python benchmarks/bench_switch.py [--arms 64] [--steps 20000000]
+"""
+
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+import codegen
+from codegen import LLVMCodeGenerator, OptimizationLevel
+
+
+def make_program(arms, steps):
+    chain = " else ".join(f"if (op == {op}) {{ acc = acc + {op * 3 + 1}; }}"
+                          for op in range(arms))
+    return f"""
+function interpreta(passos) {{
+    var acc = 0;
+    var s = 1;
+    for (var i = 0; i < passos; i = i + 1) {{
+        s = (s * 75 + 74) % 65537;
+        var op = s % {arms};
+        {chain} else {{ acc = 0; }}
+    }}
+    return acc;
+}}
+println(interpreta({steps}));
+"""
+
+
+def build(source, lowered):
+    program = Parser(Lexer(source)).parse_program()
+    SemanticAnalyzer().analyze(program)
+    original = codegen.MIN_SWITCH_ARMS
+    if not lowered:
+        codegen.MIN_SWITCH_ARMS = float("inf")
+    try:
+        generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2)
+        ir_code = generator.generate_code(program)
+    finally:
+        codegen.MIN_SWITCH_ARMS = original
+    assert ("switch i64" in ir_code) == lowered
+    return generator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--arms", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=20_000_000)
+    args = parser.parse_args()
+    source = make_program(args.arms, args.steps)
+
+    print(f"{args.arms} ramos, {args.steps} passos em O2")
+    print(f"{'switch':>7} {'execução (s)':>13}")
+    for lowered in (False, True):
+        generator = build(source, lowered)
+        start = time.perf_counter()
+        generator.run_jit()
+        ctypes.CDLL(None).fflush(None)
+        elapsed = time.perf_counter() - start
+        print(f"{'sim' if lowered else 'não':>7} {elapsed:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
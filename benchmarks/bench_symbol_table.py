@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tabela de símbolos com blocos profundamente aninhados
+================================================================
+
+Gera D blocos ``if`` aninhados (cada um declarando um ``let``) e, no
+mais interno, R referências a variáveis globais e do nível mais externo.
+Compara a análise semântica com a cadeia de ``SymbolTable`` (resolução
+sobe pelos pais, custo proporcional à profundidade) e com a
+``FlatSymbolTable`` (pilha por nome, custo constante).
+
+Uso:
+    python benchmarks/bench_symbol_table.py [--depth 100] [--refs 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lexer import Lexer
+from parser import Parser
+from analisadorSintatico import SemanticAnalyzer
+
+
+def build_program(depth, refs):
+    lines = ["var total = 0;", "function f(a) {"]
+    for level in range(depth):
+        lines.append(f"if (a > {level}) {{ let v{level} = {level};")
+    for r in range(refs):
+        lines.append(f"total = total + a + v0 + v{depth - 1 - r % depth};")
+    lines.append("}" * depth)
+    lines.append("return total; }")
+    return "\n".join(lines)
+
+
+def measure(program, flat_scopes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        analyzer = SemanticAnalyzer(flat_scopes=flat_scopes)
+        start = time.perf_counter()
+        errors = analyzer.analyze(program)
+        best = min(best, time.perf_counter() - start)
+    assert errors == [], errors
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da tabela de símbolos")
+    parser.add_argument("--depth", type=int, default=100, help="Níveis de blocos aninhados")
+    parser.add_argument("--refs", type=int, default=2000, help="Atribuições no bloco mais interno")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(20000)
+    program = Parser(Lexer(build_program(args.depth, args.refs))).parse_program()
+    lookups = args.refs * 4
+
+    print(f"{args.depth} níveis, {lookups} resoluções no bloco mais interno")
+    print(f"{'tabela':>10} {'tempo (ms)':>12} {'ns/resolução':>14}")
+    for name, flat in (("encadeada", False), ("plana", True)):
+        elapsed = measure(program, flat, args.repeat)
+        print(f"{name:>10} {elapsed * 1e3:>12.2f} {elapsed / lookups * 1e9:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# callgraph.py - Grafo de chamadas e remoção de funções inalcançáveis
+
+from parser import Program, FuncDecl, Block, Identifier, Node, children
+
+
+class CallGraph:
+    """Grafo de chamadas de um programa já analisado.
+
+    Vértices: o código do topo (``MAIN``) e cada ``FuncDecl``, inclusive
+    as aninhadas, pelo nome qualificado (``externa.interna``; uma
+    redeclaração no mesmo escopo vira ``f#2``). Arestas: cada ``Call``
+    (e, de forma conservadora, qualquer outro uso do nome de uma função)
+    liga a função em que aparece à função chamada.
+
+    Os nomes são resolvidos lexicamente, com o mesmo hoisting por bloco do
+    SemanticAnalyzer, e não pelos símbolos: corpos analisados em outro
+    processo não têm anotações. Um nome declarado mais de uma vez no
+    mesmo escopo liga a todas as declarações. Funções nativas ficam fora
+    do grafo.
+    """
+
+    MAIN = "<main>"
+
+    def __init__(self, ast: Program):
+        self.functions = {}               # nome qualificado -> FuncDecl
+        self.edges = {self.MAIN: set()}   # nome -> nomes chamados
+        self._names = {}                  # id(FuncDecl) -> nome qualificado
+        self._scopes = []                 # pilha de {nome: [nomes qualificados]}
+        self._visit_statements(ast.statements, self.MAIN, "")
+        self.callers_of = {name: set() for name in self.edges}
+        for caller, callees in self.edges.items():
+            for callee in callees:
+                self.callers_of[callee].add(caller)
+
+    # -------------------
+    # Construção
+    # -------------------
+
+    def _visit_statements(self, statements, owner, prefix):
+        scope = {}
+        for stmt in statements:
+            if isinstance(stmt, FuncDecl):
+                self._register(stmt, prefix, scope)
+        self._scopes.append(scope)
+        for stmt in statements:
+            self._visit(stmt, owner, prefix)
+        self._scopes.pop()
+
+    def _register(self, func: FuncDecl, prefix, scope):
+        name = prefix + func.name.name
+        qualified, count = name, 1
+        while qualified in self.functions:
+            count += 1
+            qualified = f"{name}#{count}"
+        self._names[id(func)] = qualified
+        self.functions[qualified] = func
+        self.edges[qualified] = set()
+        scope.setdefault(func.name.name, []).append(qualified)
+
+    def _visit(self, node, owner, prefix):
+        if isinstance(node, FuncDecl):
+            if id(node) not in self._names:
+                # Declaração fora de uma lista de statements
+                self._register(node, prefix, self._scopes[-1])
+            qualified = self._names[id(node)]
+            self._visit(node.body, qualified, qualified + ".")
+            return
+        if isinstance(node, Block):
+            self._visit_statements(node.statements, owner, prefix)
+            return
+        if isinstance(node, Identifier):
+            self.edges[owner].update(self._resolve(node.name))
+            return
+        for item in children(node):
+            self._visit(item, owner, prefix)
+
+    def _resolve(self, name):
+        for scope in reversed(self._scopes):
+            if name in scope:
+                return scope[name]
+        return ()
+
+    # -------------------
+    # Consultas
+    # -------------------
+
+    def callees(self, name):
+        return sorted(self.edges[name])
+
+    def callers(self, name):
+        return sorted(self.callers_of[name])
+
+    def fan_out(self, name):
+        return len(self.edges[name])
+
+    def fan_in(self, name):
+        return len(self.callers_of[name])
+
+    def reachable(self):
+        """Funções alcançáveis a partir do código do topo"""
+        seen = {self.MAIN}
+        stack = [self.MAIN]
+        while stack:
+            for callee in self.edges[stack.pop()]:
+                if callee not in seen:
+                    seen.add(callee)
+                    stack.append(callee)
+        seen.discard(self.MAIN)
+        return seen
+
+    def unreachable(self):
+        reachable = self.reachable()
+        return [name for name in self.functions if name not in reachable]
+
+    def sccs(self):
+        """Componentes fortemente conexas das funções (Tarjan iterativo),
+        em ordem topológica reversa: chamadas antes de quem as chama"""
+        index, lowlink, on_stack = {}, {}, set()
+        stack, components = [], []
+        for root in self.functions:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.edges[root])))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, pending = work[-1]
+                child = next(pending, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.edges[child]))))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+        return components
+
+    def is_recursive(self, name):
+        """A função pode chamar a si mesma (direta ou indiretamente)"""
+        if name in self.edges[name]:
+            return True
+        return any(name in component and len(component) > 1 for component in self.sccs())
+
+    # -------------------
+    # Remoção e relatório
+    # -------------------
+
+    def prune(self, ast: Program):
+        """Remove da AST as funções inalcançáveis; retorna seus nomes
+        (as aninhadas em uma função removida vão junto)"""
+        dead = self.unreachable()
+        dead_nodes = {id(self.functions[name]) for name in dead}
+        if dead_nodes:
+            _remove_functions(ast, dead_nodes)
+        return dead
+
+    def dump(self):
+        reachable = self.reachable()
+        lines = [f"📞 Grafo de chamadas: {len(self.functions)} funções, "
+                 f"{len(reachable)} alcançáveis"]
+        for name in [self.MAIN] + list(self.functions):
+            mark = "" if name == self.MAIN or name in reachable else "  (inalcançável)"
+            callees = ", ".join(self.callees(name)) or "-"
+            lines.append(f"  {name} [entrada {self.fan_in(name)}, saída {self.fan_out(name)}]"
+                         f" -> {callees}{mark}")
+        recursive = [component for component in self.sccs()
+                     if len(component) > 1 or component[0] in self.edges[component[0]]]
+        if recursive:
+            lines.append("  Recursão (SCCs): " + "; ".join(
+                "{" + ", ".join(component) + "}" for component in recursive))
+        return "\n".join(lines)
+
+
+def _remove_functions(node, dead_nodes):
+    for key, child in vars(node).items():
+        if isinstance(child, list):
+            kept = [item for item in child
+                    if not (isinstance(item, FuncDecl) and id(item) in dead_nodes)]
+            if len(kept) != len(child):
+                setattr(node, key, kept)
+            for item in kept:
+                if isinstance(item, Node):
+                    _remove_functions(item, dead_nodes)
+        elif isinstance(child, FuncDecl) and id(child) in dead_nodes:
+            setattr(node, key, Block([]))
+        elif isinstance(child, Node):
+            _remove_functions(child, dead_nodes)
@@ -4,11 +4,22 @@ import llvmlite.binding as llvm
 from parser import *
 from tokens import TokenType
 import os
+import re
 import tempfile
 import subprocess
 import sys
 from pathlib import Path
 from enum import Enum
+from runtime import RuntimeLibrary
+from incremental import referenced_names
+from specialize import (
+    MAX_CLONES_PER_FUNCTION, clone_name, parse_clone_name, clone_attributes, return_shape
+)
+from loophints import (
+    LOOP_HINTS_TAG, parse_loop_hints, hint_text, hint_attributes, hinted_loops, loop_remarks
+)
+from pgo import PROFILE_HEADER
+from concurrent.futures import ProcessPoolExecutor
 
 # Níveis de otimização
 class OptimizationLevel(Enum):
@@ -19,18 +30,56 @@ class OptimizationLevel(Enum):
     Os = 4  # Otimizar para tamanho
     Oz = 5  # Otimizar agressivamente para tamanho
 
+# Nativas tratadas direto em _generate_call (nunca viram chamada de cauda)
+NATIVE_FUNCTIONS = {"print", "println", "length", "push", "pop", "concat"}
+
+# Cadeias if/else-if com ao menos este número de comparações da mesma
+# variável com constantes inteiras viram um 'switch' (ver _switch_chain)
+MIN_SWITCH_ARMS = 4
+# Maior inteiro que um double representa exatamente
+MAX_EXACT_INTEGER = 2 ** 53
+
+# Fast-math (--fast-math ou "// @fastmath" na função): flags da aritmética
+# de ponto flutuante (reassoc permite vetorizar reduções como
+# ``total = total + i``) e as opções de alvo correspondentes
+FAST_MATH_FLAGS = ('reassoc', 'nnan', 'ninf', 'contract')
+FAST_MATH_ATTRIBUTES = ('"no-infs-fp-math"="true"', '"no-nans-fp-math"="true"')
+
+# Multiversão (--multiversion ou "// @multiversion" na função): uma versão
+# por nível x86-64, na ordem de RuntimeLibrary._emit_js_cpu_level
+CPU_VERSIONS = (
+    ("default", ()),
+    ("avx2", ('"target-cpu"="x86-64-v3"',)),
+    ("avx512", ('"target-cpu"="x86-64-v4"',)),
+)
+
+# Modo dividido: genéricas que ficaram só declaradas levam o erro original
+# no módulo da função (e no cache): !js.failed.generics = !{!{!"f", !"erro"}}
+FAILED_GENERICS_METADATA = "js.failed.generics"
+
 # Import explícito das classes que usamos
 from parser import (
     Program, VarDecl, FuncDecl, ReturnStmt, IfStmt, Block, ExprStmt,
-    WhileStmt, ForStmt, Identifier, Literal, Unary, Binary, Assign, Call
+    WhileStmt, ForStmt, Identifier, Literal, Unary, Binary, Assign, Call,
+    Index, ArrayLiteral, children
 )
 
+class _FunctionAttributes(ir.FunctionAttributes):
+    """Atributos de função, incluindo os que o llvmlite ainda não lista"""
+    _known = (ir.FunctionAttributes._known | {'willreturn'} | set(FAST_MATH_ATTRIBUTES)
+              | {attribute for _, attributes in CPU_VERSIONS for attribute in attributes})
+
+
 class LLVMCodeGenerator:
-    def __init__(self, optimization_level=OptimizationLevel.O2):
+    def __init__(self, optimization_level=OptimizationLevel.O2, instrument_allocations=False,
+                 jobs=1, reoptimize=False, shared_runtime=False, cache=None,
+                 max_clones=MAX_CLONES_PER_FUNCTION, memo_stats=False, fast_math=False,
+                 cpu=None, multiversion=False, pgo_generate=None, source_digest=None, profile=None):
         # Inicialização do LLVM (removida chamada deprecated)
         try:
             llvm.initialize_native_target()
             llvm.initialize_native_asmprinter()
+            llvm.initialize_native_asmparser()   # asm inline (cpuid)
         except:
             pass  # Em versões mais recentes, a inicialização é automática
         
@@ -58,8 +107,102 @@ class LLVMCodeGenerator:
         self.void_type = ir.VoidType()
         self.bool_type = ir.IntType(1)
         
+        # Runtime (strings, arrays, arena) emitida sob demanda
+        self.instrument_allocations = instrument_allocations
+        # Relatório das tabelas de memoização ao final da execução
+        self.memo_stats = memo_stats
+        # Fast-math no programa todo; fp_flags: flags da função atual
+        self.fast_math = fast_math
+        self.fp_flags = FAST_MATH_FLAGS if fast_math else ()
+        # CPU alvo: None (genérica), "native" (a do host) ou um nome do LLVM
+        self.cpu = cpu
+        # Multiversão de todas as funções com laços (além das anotadas); só x86-64
+        self.multiversion = multiversion
+        self.multiversion_supported = llvm.get_process_triple().startswith("x86_64")
+        # PGO: build instrumentado (arquivo onde a main anexa os contadores,
+        # identificado pelo digest do fonte) e perfil das execuções de
+        # treino (pgo.Profile) que guia o build otimizado
+        self.pgo_generate = pgo_generate
+        self.source_digest = source_digest
+        self.profile = profile
+        self.profile_sites = {}   # função LLVM -> desvios numerados
+        self.runtime = RuntimeLibrary(self.module, instrument_allocations=instrument_allocations,
+                                      shared=shared_runtime or jobs > 1 or cache is not None)
+        self.string_type = self.runtime.string_ptr_type
+        self.array_type = self.runtime.array_ptr_type
+        
+        # Marca da arena tirada na entrada da função atual (None = não usa arena)
+        self.arena_mark = None
+        # Arrays na pilha da função atual: id(ArrayLiteral) -> (cabeçalho, dados)
+        self.stack_arrays = {}
+        # Nomes de arrays que podem ser escritos no frame atual (ver _written_arrays)
+        self.written_arrays = set()
+        # Slots resolvidos pelo analisador semântico: nó do frame atual
+        # (Program/FuncDecl) e seus allocas indexados por Symbol.slot
+        self.frame_node = None
+        self.slots = []
+        # Funções geradas, por símbolo resolvido
+        self.function_values = {}
+        # Variáveis do topo do programa: globais do módulo (ver
+        # _generate_global_var_decl) e constantes numéricas como imediatos
+        self.global_variables = {}   # nome -> ir.GlobalVariable
+        self.global_constants = {}   # nome -> ir.Constant
+        
+        # Geração paralela: funções do topo geradas em processos (um módulo
+        # por lote), ligadas depois ao módulo da main
+        self.jobs = jobs
+        self.reoptimize = reoptimize
+        self.deferred_functions = set()   # id(FuncDecl) geradas fora deste módulo
+        self.linked_module = None         # Resultado da ligação (llvm.ModuleRef)
+        # Recompilação incremental: bitcode por função (incremental.FunctionCache)
+        self.cache = cache
+        # Especialização pelos tipos dos argumentos (ver _specialize)
+        self.max_clones = max_clones
+        self.function_decls = {}       # nome LLVM da função genérica -> FuncDecl
+        self.clones = {}               # (nome genérico, tipos) -> ir.Function
+        self.pending_clones = []       # (FuncDecl, clone) com corpo por gerar
+        self.external_clones = set()   # id(FuncDecl) cujos clones vêm de outro módulo
+        self.clone_linkage = 'internal'
+        self.clone_report = {}         # nome genérico -> [tipos de cada clone]
+        self.clone_fallbacks = 0       # chamadas mantidas na genérica pelo limite
+        self.in_clone = False
+        self.failed_generics = {}      # nome -> erro da versão genérica (só clones)
+        # Chamadas em posição de cauda (ver _generate_tail_call)
+        self.tail_block = None         # Bloco de volta da recursão em cauda
+        self.param_slots = []          # allocas dos parâmetros da função atual
+        self.tail_loops = []           # funções com recursão em cauda (viram laço)
+        # Dicas de laço (// @unroll(4)...): função LLVM -> laços com dicas
+        self.hinted_loops = {}
+        self.rejected_loop_hints = []  # anotações de laço inválidas
+        # Memoização da função atual: (tabela, chave, bloco do acerto) ou None
+        self.memo = None
+        
+        # Tabelas de despacho {classe do nó: método}, montadas uma vez
+        self._statement_handlers = {
+            VarDecl: self._generate_var_decl,
+            FuncDecl: self._generate_func_decl,
+            ReturnStmt: self._generate_return,
+            IfStmt: self._generate_if,
+            WhileStmt: self._generate_while,
+            ForStmt: self._generate_for,
+            ExprStmt: self._generate_expr_stmt,
+            Block: self._generate_block,
+        }
+        self._expression_handlers = {
+            Literal: self._generate_literal,
+            Identifier: self._generate_identifier,
+            Binary: self._generate_binary,
+            Unary: self._generate_unary,
+            Assign: self._generate_assign,
+            Call: self._generate_call,
+            ArrayLiteral: self._generate_array_literal,
+            Index: self._generate_index,
+        }
+        
         # Funções built-in
         self._declare_builtin_functions()
+        if self.profile is not None:
+            self._add_profile_summary()
         
     def _declare_builtin_functions(self):
         """Declara funções built-in como printf"""
@@ -87,15 +230,38 @@ class LLVMCodeGenerator:
         self.scope_stack[-1][name] = alloca_inst
         
     def _get_variable(self, name):
-        """Busca variável nos escopos (do mais recente ao mais antigo)"""
+        """Busca variável nos escopos (do mais recente ao mais antigo) e nas globais"""
         for scope in reversed(self.scope_stack):
             if name in scope:
                 return scope[name]
-        return None
+        return self.global_variables.get(name)
+        
+    def _enter_frame(self, frame_node):
+        """Prepara os slots do frame (Program/FuncDecl) que será gerado"""
+        self.frame_node = frame_node
+        self.slots = [None] * getattr(frame_node, 'slot_count', 0)
+        
+    def _bind_slot(self, node, alloca_inst):
+        """Guarda o alloca no slot do símbolo resolvido para o nó (se houver)"""
+        symbol = getattr(node, 'symbol', None)
+        if symbol is not None and symbol.frame is self.frame_node:
+            self.slots[symbol.slot] = alloca_inst
+        
+    def _lookup_variable(self, node, name):
+        """Variável pelo slot resolvido (O(1)); sem resolução, busca nos escopos"""
+        symbol = getattr(node, 'symbol', None)
+        if symbol is not None and symbol.frame is self.frame_node:
+            alloca_inst = self.slots[symbol.slot]
+            if alloca_inst is not None:
+                return alloca_inst
+        return self._get_variable(name)
         
     def generate_code(self, ast_node):
         """Gera código LLVM IR para o AST"""
         if isinstance(ast_node, Program):
+            if self._split_mode():
+                return self._generate_split(ast_node)
+            
             # Gera código não otimizado
             ir_code = self._generate_program(ast_node)
             
@@ -112,77 +278,118 @@ class LLVMCodeGenerator:
         # Cria função main
         main_type = ir.FunctionType(self.int32_type, [])
         main_func = ir.Function(self.module, main_type, name="main")
+        if self.fast_math:
+            main_func.attributes = _FunctionAttributes(FAST_MATH_ATTRIBUTES)
         block = main_func.append_basic_block(name="entry")
         self.builder = ir.IRBuilder(block)
         self.function = main_func
+        self._enter_frame(program_node)
+        self._profile_entry()
+        
+        # Primeira fase: protótipos de todas as funções, para que chamadas
+        # (inclusive para funções definidas depois) sejam diretas
+        self._declare_functions(program_node)
+        
+        if self._frame_uses_arena(program_node):
+            self._take_arena_mark()
+        self.written_arrays = self._written_arrays(program_node)
         
-        # Gera código para todos os statements
+        # Gera código para os statements do topo (funções ficam para depois)
         for stmt in program_node.statements:
+            if isinstance(stmt, FuncDecl):
+                continue
             self._generate_statement(stmt)
             
         # Sempre adiciona return 0 no final se o bloco não foi terminado
         current_block = self.builder.block
         if not current_block.is_terminated:
             self.builder.ret(ir.Constant(self.int32_type, 0))
+        
+        self._finish_frame(is_main=True)
+        
+        # Segunda fase: corpos das funções do topo (todas as globais já existem);
+        # as geradas em outros módulos (modo dividido) ficam de fora
+        for stmt in program_node.statements:
+            if isinstance(stmt, FuncDecl) and id(stmt) not in self.deferred_functions:
+                self._generate_func_decl(stmt)
+        self._generate_pending_clones()
+        self._apply_entry_profile(main_func)
+        if not self._split_mode():
+            self._check_generic_calls(
+                (instr.callee.name for func in self.module.functions for block in func.blocks
+                 for instr in block.instructions if isinstance(instr, ir.CallInstr)))
+            if self.pgo_generate:
+                self.runtime.define_profile_writer(self.pgo_generate, self._profile_header(),
+                                                   self.runtime.profile_sites())
             
         return str(self.module)
         
     def _generate_statement(self, stmt):
         """Gera código para um statement"""
-        if isinstance(stmt, VarDecl):
-            return self._generate_var_decl(stmt)
-        elif isinstance(stmt, FuncDecl):
-            return self._generate_func_decl(stmt)
-        elif isinstance(stmt, ReturnStmt):
-            return self._generate_return(stmt)
-        elif isinstance(stmt, IfStmt):
-            return self._generate_if(stmt)
-        elif isinstance(stmt, WhileStmt):
-            return self._generate_while(stmt)
-        elif isinstance(stmt, ForStmt):
-            return self._generate_for(stmt)
-        elif isinstance(stmt, ExprStmt):
-            return self._generate_expression(stmt.expr)
-        elif isinstance(stmt, Block):
-            return self._generate_block(stmt)
-        else:
-            raise ValueError(f"Tipo de statement não suportado: {type(stmt)}")
+        handler = self._statement_handlers.get(stmt.__class__)
+        if handler is None:
+            handler = self._lookup_handler(self._statement_handlers, stmt)
+            if handler is None:
+                raise ValueError(f"Tipo de statement não suportado: {type(stmt)}")
+        return handler(stmt)
+        
+    def _lookup_handler(self, handlers, node):
+        """Procura o handler de uma subclasse de nó e o guarda na tabela"""
+        for cls in type(node).__mro__[1:]:
+            if cls in handlers:
+                handlers[type(node)] = handlers[cls]
+                return handlers[cls]
+        return None
+        
+    def _generate_expr_stmt(self, stmt):
+        """Gera código para statement de expressão"""
+        return self._generate_expression(stmt.expr)
             
+
     def _generate_var_decl(self, var_decl):
         """Gera código para declaração de variável"""
         var_name = var_decl.name.name
         
+        # Gera o inicializador antes de declarar a variável (o nome ainda
+        # se refere ao escopo externo dentro do próprio inicializador)
+        init_value = None
+        if var_decl.initializer:
+            constant_values = None
+            if var_decl.kind == 'const' and var_name not in self.written_arrays:
+                constant_values = self._constant_array_values(var_decl.initializer)
+            if constant_values is not None:
+                # Array constante nunca escrito: usa o descritor global no lugar
+                init_value = self.runtime.constant_array_header(constant_values)
+            else:
+                init_value = self._generate_expression(var_decl.initializer)
+        
         # Determina o tipo baseado no inicializador
         var_type = self.double_type  # Padrão
         if var_decl.initializer:
             if isinstance(var_decl.initializer, Literal):
                 if isinstance(var_decl.initializer.value, str):
-                    var_type = ir.PointerType(self.int8_type)
+                    var_type = self.string_type
                 elif isinstance(var_decl.initializer.value, bool):
                     var_type = self.bool_type
                 else:
                     var_type = self.double_type
+            elif init_value is not None and init_value.type in (self.string_type, self.array_type):
+                var_type = init_value.type
         
-        # Aloca espaço na stack
-        alloca_inst = self.builder.alloca(var_type, name=var_name)
+        if self.current_scope == 0:
+            return self._generate_global_var_decl(var_decl, var_type, init_value)
+        
+        # Aloca espaço na stack (no bloco de entrada: dentro de laços, inclusive
+        # o da recursão em cauda, a pilha não cresce a cada iteração)
+        alloca_inst = self._entry_alloca(var_type, var_name)
         self._add_variable(var_name, alloca_inst)
+        self._bind_slot(var_decl, alloca_inst)
         
-        # Se há inicializador, gera código e armazena
+        # Se há inicializador, armazena o valor já gerado
         if var_decl.initializer:
-            init_value = self._generate_expression(var_decl.initializer)
             if init_value:
-                # Conversão de tipos apenas se necessário
-                if var_type == self.double_type and init_value.type != self.double_type:
-                    if init_value.type == self.int32_type:
-                        init_value = self.builder.sitofp(init_value, self.double_type)
-                    elif init_value.type == self.bool_type:
-                        init_value = self.builder.uitofp(init_value, self.double_type)
-                elif var_type == self.bool_type and init_value.type != self.bool_type:
-                    if init_value.type == self.double_type:
-                        zero = ir.Constant(self.double_type, 0.0)
-                        init_value = self.builder.fcmp_unordered('!=', init_value, zero)
                 # Para strings, armazena diretamente
-                self.builder.store(init_value, alloca_inst)
+                self.builder.store(self._convert_for_store(init_value, var_type), alloca_inst)
         else:
             # Inicializa com valor padrão
             if var_type == self.double_type:
@@ -195,18 +402,88 @@ class LLVMCodeGenerator:
             
         return alloca_inst
         
-    def _generate_func_decl(self, func_decl):
-        """Gera código para declaração de função"""
-        func_name = func_decl.name.name
-        
-        # Define tipos dos parâmetros (todos como double por simplicidade)
-        param_types = [self.double_type] * len(func_decl.params)
+    def _entry_alloca(self, var_type, name):
+        entry = self.function.entry_basic_block
+        if self.builder.block is entry:
+            # Nada volta para o bloco de entrada: a posição atual serve
+            return self.builder.alloca(var_type, name=name)
+        entry_builder = ir.IRBuilder(entry)
+        entry_builder.position_at_start(entry)
+        return entry_builder.alloca(var_type, name=name)
+
+    def _convert_for_store(self, value, var_type):
+        """Converte o valor para o tipo da variável (apenas se necessário)"""
+        if var_type == self.double_type and value.type != self.double_type:
+            if value.type == self.int32_type:
+                return self.builder.sitofp(value, self.double_type)
+            elif value.type == self.bool_type:
+                return self.builder.uitofp(value, self.double_type)
+        elif var_type == self.bool_type and value.type != self.bool_type:
+            if value.type == self.double_type:
+                zero = ir.Constant(self.double_type, 0.0)
+                return self.builder.fcmp_unordered('!=', value, zero)
+        return value
         
-        # Tipo da função (retorna double)
-        func_type = ir.FunctionType(self.double_type, param_types)
+    def _generate_global_var_decl(self, var_decl, var_type, init_value):
+        """Gera uma declaração do topo do programa como global do módulo.
         
-        # Cria a função
-        func = ir.Function(self.module, func_type, name=func_name)
+        ``const`` numérico/booleano com inicializador constante vira valor
+        imediato (nenhuma memória); ``const`` string/array constante vira
+        global ``constant``. As demais viram globais ``internal`` (sem
+        linkage no modo dividido, para os módulos das funções enxergarem),
+        inicializadas na main quando o valor não é constante.
+        """
+        var_name = var_decl.name.name
+        is_constant = (isinstance(init_value, (ir.Constant, ir.GlobalValue))
+                       and init_value.type == var_type)
+        if var_decl.kind == 'const' and is_constant and var_type in (self.double_type, self.bool_type):
+            self.global_variables.pop(var_name, None)
+            self.global_constants[var_name] = init_value
+            return init_value
+        
+        self.global_constants.pop(var_name, None)
+        global_var = self.global_variables.get(var_name)
+        if global_var is not None:
+            # Redeclaração ('var' no topo): reaproveita a global
+            if global_var.type.pointee != var_type:
+                raise ValueError(f"Variável global redeclarada com outro tipo: {var_name}")
+        else:
+            global_var = self._declare_global(var_name, var_type)
+            global_var.initializer = ir.Constant(var_type, None)
+            if not self._split_mode():
+                global_var.linkage = 'internal'
+            self.global_variables[var_name] = global_var
+            if is_constant:
+                # Valor conhecido em tempo de compilação: dispensa o store
+                global_var.initializer = init_value
+                global_var.global_constant = var_decl.kind == 'const'
+                return global_var
+        
+        if init_value is not None:
+            self.builder.store(self._convert_for_store(init_value, var_type), global_var)
+        return global_var
+        
+    def _declare_global(self, var_name, var_type):
+        """Cria a global de uma variável do topo (nome estável entre módulos)"""
+        return ir.GlobalVariable(self.module, var_type, name=f"global.{var_name}")
+        
+    def _split_mode(self):
+        """Funções do topo geradas em módulos separados (paralelo/cache)"""
+        return self.jobs > 1 or self.cache is not None
+        
+    def _generate_func_decl(self, func_decl, clone=None):
+        """Gera código para declaração de função (ou o corpo de um clone dela)"""
+        if clone is not None:
+            func = clone
+        else:
+            # Cria a função (ou completa o protótipo já declarado)
+            func = self._declare_function_prototype(func_decl)
+            symbol = getattr(func_decl, 'symbol', None)
+            if symbol is not None:
+                self.function_values[symbol] = func
+            if self.in_clone:
+                # Aninhada no corpo de um clone: gerada junto com a genérica
+                return func
         
         # Nomeia parâmetros
         for i, param in enumerate(func_decl.params):
@@ -218,6 +495,27 @@ class LLVMCodeGenerator:
         # Salva estado atual
         old_builder = self.builder
         old_function = self.function
+        old_arena_mark = self.arena_mark
+        old_stack_arrays = self.stack_arrays
+        old_written_arrays = self.written_arrays
+        old_frame_node, old_slots = self.frame_node, self.slots
+        old_in_clone = self.in_clone
+        old_tail_block, old_param_slots = self.tail_block, self.param_slots
+        old_memo = self.memo
+        old_fp_flags = self.fp_flags
+        if self.fast_math or 'fastmath' in getattr(func_decl, 'annotations', ()):
+            self.fp_flags = FAST_MATH_FLAGS
+            for attribute in FAST_MATH_ATTRIBUTES:
+                func.attributes.add(attribute)
+        else:
+            self.fp_flags = ()
+        self.in_clone = clone is not None
+        self.tail_block, self.param_slots = None, []
+        self.memo = None
+        self.arena_mark = None
+        self.stack_arrays = {}
+        self.written_arrays = self._written_arrays(func_decl.body)
+        self._enter_frame(func_decl)
         
         # Novo builder para esta função
         self.builder = ir.IRBuilder(entry_block)
@@ -226,19 +524,55 @@ class LLVMCodeGenerator:
         # Entra em novo escopo
         self._enter_scope()
         
+        if self._frame_uses_arena(func_decl.body):
+            self._take_arena_mark()
+        self._allocate_stack_arrays(func_decl.body)
+        
         # Aloca espaço para parâmetros no stack e os carrega
         for i, param in enumerate(func_decl.params):
             param_name = param.name
-            param_alloca = self.builder.alloca(self.double_type, name=param_name)
+            param_alloca = self.builder.alloca(func.args[i].type, name=param_name)
             self.builder.store(func.args[i], param_alloca)
             self._add_variable(param_name, param_alloca)
+            self._bind_slot(param, param_alloca)
+            self.param_slots.append(param_alloca)
+        self._profile_entry()
         
-        # Gera código do corpo da função
-        self._generate_statement(func_decl.body)
+        # Função pura memoizada (EffectAnalyzer): consulta a tabela na entrada
+        if clone is None and getattr(func_decl, 'memoize', False):
+            self._memo_lookup()
         
-        # Se o bloco não foi terminado com return, adiciona return 0.0
-        if not self.builder.block.is_terminated:
-            self.builder.ret(ir.Constant(self.double_type, 0.0))
+        # Recursão em cauda: o corpo começa num bloco próprio, para onde
+        # ``return f(...)`` da própria função salta com os novos argumentos
+        if _has_self_tail_call(func_decl.body, func_decl.name.name):
+            self.tail_block = func.append_basic_block(name="tailrecurse")
+            self.builder.branch(self.tail_block)
+            self.builder.position_at_end(self.tail_block)
+        
+        # Gera código do corpo da função
+        scope_depth = len(self.scope_stack)
+        try:
+            self._generate_statement(func_decl.body)
+        except ValueError as error:
+            if clone is not None or not func_decl.params:
+                raise
+            # Corpo que só faz sentido com strings/arrays nos parâmetros: a
+            # versão genérica fica só declarada e as chamadas usam os clones
+            # (chamá-la com números é erro, ver _check_generic_calls)
+            func.blocks.clear()
+            self.failed_generics[func.name] = str(error)
+            del self.scope_stack[scope_depth:]
+            self.current_scope = scope_depth - 1
+        else:
+            # Se o bloco não foi terminado com return, adiciona return 0.0 (ou null)
+            if not self.builder.block.is_terminated:
+                self.builder.ret(self._default_return_value())
+            
+            # Libera a arena do frame em todos os retornos
+            self._finish_frame()
+            if self.memo is not None:
+                self._memo_store_results()
+            self._apply_entry_profile(func)
         
         # Sai do escopo
         self._exit_scope()
@@ -246,9 +580,112 @@ class LLVMCodeGenerator:
         # Restaura estado anterior
         self.builder = old_builder
         self.function = old_function
+        self.arena_mark = old_arena_mark
+        self.stack_arrays = old_stack_arrays
+        self.written_arrays = old_written_arrays
+        self.frame_node, self.slots = old_frame_node, old_slots
+        self.in_clone = old_in_clone
+        self.tail_block, self.param_slots = old_tail_block, old_param_slots
+        self.memo = old_memo
+        self.fp_flags = old_fp_flags
+        
+        if clone is None and func.name not in self.failed_generics and self._multiversioned(func_decl):
+            self._generate_versions(func_decl, func)
+        return func
         
+    def _multiversioned(self, func_decl):
+        """Função quente a multiversionar: anotada com ``// @multiversion`` ou,
+        com --multiversion, com laços. Aninhadas no corpo (geradas só com a
+        genérica) e memoização (feita na genérica) impedem a multiversão."""
+        if not self.multiversion_supported or getattr(func_decl, 'memoize', False):
+            return False
+        if 'multiversion' not in getattr(func_decl, 'annotations', ()):
+            if not (self.multiversion and _has_node(func_decl.body, (WhileStmt, ForStmt))):
+                return False
+        return not _has_node(func_decl.body, FuncDecl)
+        
+    def _generate_versions(self, func_decl, func):
+        """Corpo de ``func`` gerado de novo em uma versão por CPU_VERSIONS
+        (``f.default``, ``f.avx2``, ``f.avx512``, com ``target-cpu``), e
+        ``func`` vira o despacho: salta (musttail) para a versão do nível
+        de ``js_cpu_level``. A recursão dentro de uma versão chama a própria
+        versão. O despacho escreve o cache do nível, então perde os
+        atributos de memória do EffectAnalyzer."""
+        symbol = getattr(func_decl, 'symbol', None)
+        versions = []
+        for suffix, attributes in CPU_VERSIONS:
+            version = ir.Function(self.module, func.function_type, name=f"{func.name}.{suffix}")
+            version.linkage = 'internal'
+            version.attributes = _FunctionAttributes(func.attributes)
+            for attribute in attributes:
+                version.attributes.add(attribute)
+            if symbol is not None:
+                self.function_values[symbol] = version
+            self._generate_func_decl(func_decl, version)
+            versions.append(version)
+        if symbol is not None:
+            self.function_values[symbol] = func
+        
+        func.blocks.clear()
+        for attribute in ('readnone', 'readonly', 'cold'):
+            func.attributes.discard(attribute)
+        func.metadata.pop('prof', None)   # As chamadas contam nas versões
+        builder = ir.IRBuilder(func.append_basic_block(name="entry"))
+        level = self.runtime.call(builder, "js_cpu_level", [], result_name="cpu_level")
+        blocks = [func.append_basic_block(name=f"call_{suffix}") for suffix, _ in CPU_VERSIONS]
+        switch = builder.switch(level, blocks[0])
+        for index, block in enumerate(blocks[1:], start=1):
+            switch.add_case(ir.Constant(self.int32_type, index), block)
+        for version, block in zip(versions, blocks):
+            builder.position_at_end(block)
+            builder.ret(builder.call(version, list(func.args), tail='musttail'))
+        
+    def multiversioned_functions(self):
+        """Funções com versões por CPU (inclusive as geradas em outros módulos)"""
+        module = self.linked_module if self.linked_module is not None else self.module
+        suffix = "." + CPU_VERSIONS[-1][0]
+        return [func.name[:-len(suffix)] for func in module.functions if func.name.endswith(suffix)]
+        
+    def _declare_functions(self, node):
+        """Primeira fase: declara o protótipo de toda FuncDecl da subárvore
+        (inclusive aninhadas), antes de gerar qualquer corpo"""
+        if isinstance(node, FuncDecl):
+            func = self._declare_function_prototype(node)
+            symbol = getattr(node, 'symbol', None)
+            if symbol is not None:
+                self.function_values[symbol] = func
+            if _has_self_tail_call(node.body, node.name.name):
+                self.tail_loops.append(func.name)
+        for item in children(node):
+            self._declare_functions(item)
+        
+    def _declare_function_prototype(self, func_decl):
+        """Declara (uma vez) a função no módulo: double f(double, ...)"""
+        func_name = func_decl.name.name
+        existing = self.module.globals.get(func_name)
+        if isinstance(existing, ir.Function) and existing.is_declaration:
+            self.function_decls[existing.name] = func_decl
+            return existing
+        
+        # Tipo da função: parâmetros double; retorna double, a não ser que
+        # todo return seja string/array (ver _return_type)
+        params = ('double',) * len(func_decl.params)
+        func_type = ir.FunctionType(self._return_type(func_decl, params), [self.double_type] * len(params))
+        func = ir.Function(self.module, func_type, name=func_name)
+        self.function_decls[func.name] = func_decl
+        # Efeitos deduzidos pelo EffectAnalyzer (readnone, norecurse...): valem
+        # também nas declarações dos módulos que só chamam a função
+        func.attributes = _FunctionAttributes(self._function_effects(func_decl))
         return func
         
+    def _function_effects(self, func_decl):
+        """Atributos do EffectAnalyzer; no build instrumentado os contadores
+        são escritos por toda função, que perde readnone/readonly"""
+        effects = getattr(func_decl, 'effects', ())
+        if self.pgo_generate:
+            return tuple(attribute for attribute in effects if attribute not in ('readnone', 'readonly'))
+        return effects
+        
     def _generate_return(self, return_stmt):
         """Gera código para statement return"""
         # Verifica se o bloco já foi terminado
@@ -256,7 +693,12 @@ class LLVMCodeGenerator:
             return
             
         if return_stmt.value:
-            ret_value = self._generate_expression(return_stmt.value)
+            if isinstance(return_stmt.value, Call) and self.function.name != "main":
+                ret_value = self._generate_tail_call(return_stmt.value)
+                if ret_value is None:
+                    return  # Virou salto de volta ao início da função
+            else:
+                ret_value = self._generate_expression(return_stmt.value)
             if ret_value:
                 # Se estamos na função main, converte para int32
                 if self.function.name == "main":
@@ -266,21 +708,26 @@ class LLVMCodeGenerator:
                         ret_value = self.builder.zext(ret_value, self.int32_type)
                     self.builder.ret(ret_value)
                 else:
-                    # Para funções definidas pelo usuário, converte para double
-                    if ret_value.type == self.int32_type:
-                        ret_value = self.builder.sitofp(ret_value, self.double_type)
-                    elif ret_value.type == self.bool_type:
-                        ret_value = self.builder.uitofp(ret_value, self.double_type)
+                    # Funções do usuário retornam double (clones podem retornar string/array)
+                    return_type = self.function.function_type.return_type
+                    if return_type == self.double_type and ret_value.type != return_type:
+                        ret_value = self._to_double(ret_value)
+                    elif ret_value.type != return_type:
+                        raise ValueError(f"Tipo de retorno incompatível em '{self.function.name}'")
                     self.builder.ret(ret_value)
         else:
             # Retorno vazio
             if self.function.name == "main":
                 self.builder.ret(ir.Constant(self.int32_type, 0))
             else:
-                self.builder.ret(ir.Constant(self.double_type, 0.0))
+                self.builder.ret(self._default_return_value())
             
     def _generate_if(self, if_stmt):
         """Gera código para statement if"""
+        chain = _switch_chain(if_stmt)
+        if chain is not None and self._generate_switch(*chain):
+            return
+        
         # Avalia condição
         cond_value = self._generate_expression(if_stmt.condition)
         
@@ -301,108 +748,95 @@ class LLVMCodeGenerator:
         merge_block = self.function.append_basic_block(name=f"if_merge_{counter}")
         
         # Branch condicional
-        if else_block:
-            self.builder.cbranch(cond_value, then_block, else_block)
-        else:
-            self.builder.cbranch(cond_value, then_block, merge_block)
+        self._profiled_branch(cond_value, then_block, else_block or merge_block)
             
         # Gera código do then
         self.builder.position_at_end(then_block)
         self._generate_statement(if_stmt.then_branch)
-        if not then_block.is_terminated:
+        if not self.builder.block.is_terminated:
             self.builder.branch(merge_block)
             
         # Gera código do else (se existir)
         if else_block:
             self.builder.position_at_end(else_block)
             self._generate_statement(if_stmt.else_branch)
-            if not else_block.is_terminated:
+            if not self.builder.block.is_terminated:
                 self.builder.branch(merge_block)
         
         # Posiciona builder no bloco merge para continuar
         self.builder.position_at_end(merge_block)
                 
-    def _generate_while(self, while_stmt):
-        """Gera código para loop while"""
-        # Cria blocos básicos com nomes únicos
-        self.block_counter += 1
-        counter = self.block_counter
-        
-        cond_block = self.function.append_basic_block(name=f"while_cond_{counter}")
-        body_block = self.function.append_basic_block(name=f"while_body_{counter}")
-        end_block = self.function.append_basic_block(name=f"while_end_{counter}")
-        
-        # Branch para o bloco de condição
-        self.builder.branch(cond_block)
-        
-        # Gera código da condição
-        self.builder.position_at_end(cond_block)
-        cond_value = self._generate_expression(while_stmt.condition)
-        
-        # Converte para bool se necessário
-        if cond_value.type == self.double_type:
-            zero = ir.Constant(self.double_type, 0.0)
-            cond_value = self.builder.fcmp_unordered('!=', cond_value, zero)
-        elif cond_value.type == self.int32_type:
-            zero = ir.Constant(self.int32_type, 0)
-            cond_value = self.builder.icmp_signed('!=', cond_value, zero)
-        
-        # Branch condicional
-        self.builder.cbranch(cond_value, body_block, end_block)
-        
-        # Gera código do corpo
-        self.builder.position_at_end(body_block)
-        self._enter_scope()
-        self._generate_statement(while_stmt.body)
-        self._exit_scope()
-        
-        # Branch de volta para a condição (se o bloco não foi terminado)
-        if not self.builder.block.is_terminated:
-            self.builder.branch(cond_block)
-        
-        # Continue no bloco final
-        self.builder.position_at_end(end_block)
+    def _generate_switch(self, subject, arms, default):
+        """``if (x == c1) {...} else if (x == c2) {...} ...`` como 'switch' sobre
+        x convertido para i64. Com x NaN todo '==' é verdadeiro (fcmp
+        unordered), então vai para o primeiro ramo; x não inteiro (ou fora
+        da faixa exata de um double) não é nenhuma das constantes e vai
+        para o 'else'. Retorna False (nada gerado) se x não é double."""
+        value = self._generate_expression(subject)
+        if value.type != self.double_type:
+            return False
         
-    def _generate_while(self, while_stmt):
-        """Gera código para loop while"""
-        # Cria blocos básicos com nomes únicos
         self.block_counter += 1
         counter = self.block_counter
+        case_blocks = [self.function.append_basic_block(name=f"switch_case_{counter}_{index}")
+                       for index in range(len(arms))]
+        default_block = self.function.append_basic_block(name=f"switch_default_{counter}") if default else None
+        range_block = self.function.append_basic_block(name=f"switch_range_{counter}")
+        exact_block = self.function.append_basic_block(name=f"switch_exact_{counter}")
+        switch_block = self.function.append_basic_block(name=f"switch_{counter}")
+        merge_block = self.function.append_basic_block(name=f"switch_merge_{counter}")
+        otherwise = default_block or merge_block
+        
+        is_nan = self.builder.fcmp_unordered('uno', value, value, name="switch_nan")
+        self.builder.cbranch(is_nan, case_blocks[0], range_block)
+        
+        # fptosi fora da faixa é poison: testa antes de converter
+        self.builder.position_at_end(range_block)
+        limit = ir.Constant(self.double_type, float(MAX_EXACT_INTEGER))
+        in_range = self.builder.and_(
+            self.builder.fcmp_ordered('<=', value, limit),
+            self.builder.fcmp_ordered('>=', value, self.builder.fneg(limit)), name="switch_in_range")
+        self.builder.cbranch(in_range, exact_block, otherwise)
+        
+        self.builder.position_at_end(exact_block)
+        key = self.builder.fptosi(value, ir.IntType(64), name="switch_key")
+        exact = self.builder.fcmp_ordered('==', self.builder.sitofp(key, self.double_type), value)
+        self.builder.cbranch(exact, switch_block, otherwise)
+        
+        self.builder.position_at_end(switch_block)
+        switch = self.builder.switch(key, otherwise)
+        for (constant, _), block in zip(arms, case_blocks):
+            switch.add_case(ir.Constant(ir.IntType(64), constant), block)
+        
+        for (_, branch), block in zip(arms, case_blocks):
+            self.builder.position_at_end(block)
+            self._generate_statement(branch)
+            if not self.builder.block.is_terminated:
+                self.builder.branch(merge_block)
+        if default_block:
+            self.builder.position_at_end(default_block)
+            self._generate_statement(default)
+            if not self.builder.block.is_terminated:
+                self.builder.branch(merge_block)
         
-        cond_block = self.function.append_basic_block(name=f"while_cond_{counter}")
-        body_block = self.function.append_basic_block(name=f"while_body_{counter}")
-        end_block = self.function.append_basic_block(name=f"while_end_{counter}")
-        
-        # Branch para o bloco de condição
-        self.builder.branch(cond_block)
-        
-        # Gera código da condição
-        self.builder.position_at_end(cond_block)
-        cond_value = self._generate_expression(while_stmt.condition)
-        
-        # Converte para bool se necessário
+        self.builder.position_at_end(merge_block)
+        return True
+                
+    def _generate_condition(self, expr):
+        """Valor i1 de uma condição (número: ``!= 0``)"""
+        cond_value = self._generate_expression(expr)
         if cond_value.type == self.double_type:
             zero = ir.Constant(self.double_type, 0.0)
             cond_value = self.builder.fcmp_unordered('!=', cond_value, zero)
         elif cond_value.type == self.int32_type:
             zero = ir.Constant(self.int32_type, 0)
             cond_value = self.builder.icmp_signed('!=', cond_value, zero)
+        return cond_value
         
-        # Branch condicional
-        self.builder.cbranch(cond_value, body_block, end_block)
-        
-        # Gera código do corpo
-        self.builder.position_at_end(body_block)
-        self._enter_scope()
-        self._generate_statement(while_stmt.body)
-        self._exit_scope()
-        
-        # Branch de volta para a condição (se o bloco não foi terminado)
-        if not self.builder.block.is_terminated:
-            self.builder.branch(cond_block)
-        
-        # Continue no bloco final
-        self.builder.position_at_end(end_block)
+    def _generate_while(self, while_stmt):
+        """Gera código para loop while (rotacionado, ver _generate_loop)"""
+        self._generate_loop("while", while_stmt.condition, while_stmt.body, None,
+                            while_stmt.annotations)
         
     def _generate_for(self, for_stmt):
         """Gera código para loop for"""
@@ -413,58 +847,74 @@ class LLVMCodeGenerator:
         if for_stmt.init:
             self._generate_statement(for_stmt.init)
         
+        self._generate_loop("for", for_stmt.condition, for_stmt.body, for_stmt.increment,
+                            for_stmt.annotations)
+        
+        # Sai do escopo
+        self._exit_scope()
+        
+    def _generate_loop(self, kind, condition, body, increment, annotations):
+        """Laço rotacionado: a condição é testada uma vez antes de entrar
+        (guarda) e de novo no fim de cada volta (latch), que é o único salto
+        de volta e leva os metadados ``llvm.loop`` das dicas do laço.
+        Sem condição o laço é infinito (o latch salta direto)."""
         # Cria blocos básicos com nomes únicos
         self.block_counter += 1
         counter = self.block_counter
         
-        cond_block = self.function.append_basic_block(name=f"for_cond_{counter}")
-        body_block = self.function.append_basic_block(name=f"for_body_{counter}")
-        inc_block = self.function.append_basic_block(name=f"for_inc_{counter}")
-        end_block = self.function.append_basic_block(name=f"for_end_{counter}")
-        
-        # Branch para o bloco de condição
-        self.builder.branch(cond_block)
+        body_block = self.function.append_basic_block(name=f"{kind}_body_{counter}")
+        latch_block = self.function.append_basic_block(name=f"{kind}_latch_{counter}")
+        end_block = self.function.append_basic_block(name=f"{kind}_end_{counter}")
         
-        # Gera código da condição
-        self.builder.position_at_end(cond_block)
-        if for_stmt.condition:
-            cond_value = self._generate_expression(for_stmt.condition)
-            
-            # Converte para bool se necessário
-            if cond_value.type == self.double_type:
-                zero = ir.Constant(self.double_type, 0.0)
-                cond_value = self.builder.fcmp_unordered('!=', cond_value, zero)
-            elif cond_value.type == self.int32_type:
-                zero = ir.Constant(self.int32_type, 0)
-                cond_value = self.builder.icmp_signed('!=', cond_value, zero)
-            
-            # Branch condicional
-            self.builder.cbranch(cond_value, body_block, end_block)
+        # Guarda: o corpo pode não executar nenhuma vez
+        if condition is not None:
+            self._profiled_branch(self._generate_condition(condition), body_block, end_block)
         else:
-            # Sem condição = loop infinito (vai direto pro corpo)
             self.builder.branch(body_block)
         
         # Gera código do corpo
         self.builder.position_at_end(body_block)
-        self._generate_statement(for_stmt.body)
-        
-        # Branch para incremento (se o bloco não foi terminado)
+        self._enter_scope()
+        self._generate_statement(body)
+        self._exit_scope()
         if not self.builder.block.is_terminated:
-            self.builder.branch(inc_block)
-        
-        # Gera código de incremento
-        self.builder.position_at_end(inc_block)
-        if for_stmt.increment:
-            self._generate_expression(for_stmt.increment)
-        
-        # Branch de volta para a condição
-        self.builder.branch(cond_block)
+            self.builder.branch(latch_block)
+        
+        # Incremento e teste no fim da volta
+        self.builder.position_at_end(latch_block)
+        if increment is not None:
+            self._generate_expression(increment)
+        if condition is not None:
+            backedge = self._profiled_branch(self._generate_condition(condition), body_block, end_block)
+        else:
+            backedge = self.builder.branch(body_block)
+        self._attach_loop_hints(backedge, annotations)
         
         # Continue no bloco final
         self.builder.position_at_end(end_block)
         
-        # Sai do escopo
-        self._exit_scope()
+    def _attach_loop_hints(self, backedge, annotations):
+        """Metadados ``llvm.loop`` (ver loophints.py) no salto de volta"""
+        hints, rejected = parse_loop_hints(annotations)
+        self.rejected_loop_hints.extend(rejected)
+        if not hints:
+            return
+        count = self.hinted_loops.get(self.function.name, 0) + 1
+        self.hinted_loops[self.function.name] = count
+        label = f"{self.function.name}#{count}"
+        operands = [self.module.add_metadata([LOOP_HINTS_TAG, label] + [hint_text(hint) for hint in hints])]
+        for hint in hints:
+            for name, value in hint_attributes(hint):
+                if value is None:
+                    operands.append(self.module.add_metadata([name]))
+                else:
+                    width, number = value
+                    constant = ir.Constant(ir.IntType(1 if width == 'i1' else 32), number)
+                    operands.append(self.module.add_metadata([name, constant]))
+        # ID do laço: nó único que aponta para si mesmo
+        loop_id = self.module.add_metadata(operands)
+        loop_id.operands = (loop_id,) + loop_id.operands
+        backedge.set_metadata('llvm.loop', loop_id)
         
     def _generate_block(self, block):
         """Gera código para um bloco"""
@@ -475,68 +925,33 @@ class LLVMCodeGenerator:
         
     def _generate_expression(self, expr):
         """Gera código para uma expressão"""
-        if isinstance(expr, Literal):
-            return self._generate_literal(expr)
-        elif isinstance(expr, Identifier):
-            return self._generate_identifier(expr)
-        elif isinstance(expr, Binary):
-            return self._generate_binary(expr)
-        elif isinstance(expr, Unary):
-            return self._generate_unary(expr)
-        elif isinstance(expr, Assign):
-            return self._generate_assign(expr)
-        elif isinstance(expr, Call):
-            return self._generate_call(expr)
-        else:
-            raise ValueError(f"Tipo de expressão não suportado: {type(expr)}")
+        handler = self._expression_handlers.get(expr.__class__)
+        if handler is None:
+            handler = self._lookup_handler(self._expression_handlers, expr)
+            if handler is None:
+                raise ValueError(f"Tipo de expressão não suportado: {type(expr)}")
+        return handler(expr)
             
     def _generate_literal(self, literal):
         """Gera código para literal"""
         value = literal.value
-        if isinstance(value, (int, float)):
-            return ir.Constant(self.double_type, float(value))
-        elif isinstance(value, bool):
+        if isinstance(value, bool):  # Antes de int: bool é subclasse de int
             return ir.Constant(self.bool_type, value)
+        elif isinstance(value, (int, float)):
+            return ir.Constant(self.double_type, float(value))
         elif isinstance(value, str):
-            # Corrige problema com encoding UTF-8
-            try:
-                string_bytes = (value + '\0').encode('utf-8')
-                string_type = ir.ArrayType(self.int8_type, len(string_bytes))
-                string_const = ir.Constant(string_type, bytearray(string_bytes))
-                
-                # Cria global variable com nome único
-                import time
-                global_name = f".str.{int(time.time() * 1000000) % 1000000}"
-                string_global = ir.GlobalVariable(self.module, string_type, name=global_name)
-                string_global.linkage = 'private'
-                string_global.global_constant = True
-                string_global.initializer = string_const
-                
-                # Retorna pointer para o primeiro elemento
-                return self.builder.gep(string_global, [ir.Constant(self.int32_type, 0), ir.Constant(self.int32_type, 0)])
-            except UnicodeEncodeError:
-                # Fallback para strings com caracteres especiais
-                safe_string = value.encode('ascii', 'replace').decode('ascii')
-                string_bytes = (safe_string + '\0').encode('ascii')
-                string_type = ir.ArrayType(self.int8_type, len(string_bytes))
-                string_const = ir.Constant(string_type, bytearray(string_bytes))
-                
-                import time
-                global_name = f".str.{int(time.time() * 1000000) % 1000000}"
-                string_global = ir.GlobalVariable(self.module, string_type, name=global_name)
-                string_global.linkage = 'private'
-                string_global.global_constant = True
-                string_global.initializer = string_const
-                
-                return self.builder.gep(string_global, [ir.Constant(self.int32_type, 0), ir.Constant(self.int32_type, 0)])
+            # Descritor estático {len, hash, data, buf}: comprimento em O(1)
+            return self.runtime.string_literal(value)
         else:
             raise ValueError(f"Tipo de literal não suportado: {type(value)}")
             
     def _generate_identifier(self, identifier):
         """Gera código para identificador (carrega valor da variável)"""
         var_name = identifier.name
-        alloca_inst = self._get_variable(var_name)
+        alloca_inst = self._lookup_variable(identifier, var_name)
         if alloca_inst is None:
+            if var_name in self.global_constants:
+                return self.global_constants[var_name]
             raise ValueError(f"Variável não declarada: {var_name}")
         return self.builder.load(alloca_inst, name=var_name)
         
@@ -544,7 +959,11 @@ class LLVMCodeGenerator:
         """Gera código para expressão binária"""
         left = self._generate_expression(binary.left)
         right = self._generate_expression(binary.right)
-        
+
+        # Strings: '+' concatena, '=='/'!=' comparam conteúdo
+        if left.type == self.string_type or right.type == self.string_type:
+            return self._generate_string_binary(binary.operator, left, right, binary)
+
         # Converte ambos para double para simplificar
         if left.type == self.int32_type:
             left = self.builder.sitofp(left, self.double_type)
@@ -560,15 +979,15 @@ class LLVMCodeGenerator:
         
         # Operações aritméticas
         if op == '+':
-            return self.builder.fadd(left, right, name="addtmp")
+            return self.builder.fadd(left, right, name="addtmp", flags=self.fp_flags)
         elif op == '-':
-            return self.builder.fsub(left, right, name="subtmp")
+            return self.builder.fsub(left, right, name="subtmp", flags=self.fp_flags)
         elif op == '*':
-            return self.builder.fmul(left, right, name="multmp")
+            return self.builder.fmul(left, right, name="multmp", flags=self.fp_flags)
         elif op == '/':
-            return self.builder.fdiv(left, right, name="divtmp")
+            return self.builder.fdiv(left, right, name="divtmp", flags=self.fp_flags)
         elif op == '%':
-            return self.builder.frem(left, right, name="modtmp")
+            return self.builder.frem(left, right, name="modtmp", flags=self.fp_flags)
         # Operações de comparação
         elif op == '<':
             return self.builder.fcmp_unordered('<', left, right, name="cmptmp")
@@ -597,7 +1016,36 @@ class LLVMCodeGenerator:
             return self.builder.or_(left_bool, right_bool, name="ortmp")
         else:
             raise ValueError(f"Operador binário não suportado: {op}")
-            
+
+    def _to_string_value(self, value, arena):
+        """Converte um valor qualquer para string da runtime"""
+        if value.type == self.string_type:
+            return value
+        if value.type == self.bool_type:
+            return self.builder.select(value,
+                                       self.runtime.string_literal("true"),
+                                       self.runtime.string_literal("false"))
+        if value.type == self.int32_type:
+            value = self.builder.sitofp(value, self.double_type)
+        return self.runtime.call(self.builder, "js_str_from_number", [value, arena], "numstr")
+
+    def _generate_string_binary(self, op, left, right, node):
+        """Gera código para operações binárias envolvendo strings"""
+        # Conversões podem ser o próprio resultado (ex: "" + 1), então
+        # seguem a mesma decisão de alocação do nó
+        arena = self._arena_flag(node)
+        left = self._to_string_value(left, arena)
+        right = self._to_string_value(right, arena)
+        if op == '+':
+            return self.runtime.call(self.builder, "js_str_concat", [left, right, arena], "concattmp")
+        elif op == '==':
+            return self.runtime.call(self.builder, "js_str_equals", [left, right], "streq")
+        elif op == '!=':
+            equal = self.runtime.call(self.builder, "js_str_equals", [left, right], "streq")
+            return self.builder.not_(equal, name="strne")
+        else:
+            raise ValueError(f"Operador não suportado para strings: {op}")
+
     def _generate_unary(self, unary):
         """Gera código para expressão unária"""
         operand = self._generate_expression(unary.right)
@@ -605,7 +1053,8 @@ class LLVMCodeGenerator:
         
         if op == '-':
             if operand.type == self.double_type:
-                return self.builder.fsub(ir.Constant(self.double_type, 0.0), operand, name="negtmp")
+                return self.builder.fsub(ir.Constant(self.double_type, 0.0), operand, name="negtmp",
+                                         flags=self.fp_flags)
             elif operand.type == self.int32_type:
                 return self.builder.sub(ir.Constant(self.int32_type, 0), operand, name="negtmp")
         elif op == '!':
@@ -622,12 +1071,16 @@ class LLVMCodeGenerator:
             
     def _generate_assign(self, assign):
         """Gera código para atribuição"""
+        if isinstance(assign.left, Index):
+            return self._generate_index_assign(assign)
         if not isinstance(assign.left, Identifier):
             raise ValueError("Atribuição só suportada para identificadores")
             
         var_name = assign.left.name
-        alloca_inst = self._get_variable(var_name)
+        alloca_inst = self._lookup_variable(assign, var_name)
         if alloca_inst is None:
+            if var_name in self.global_constants:
+                raise ValueError(f"Atribuição a constante: {var_name}")
             raise ValueError(f"Variável não declarada: {var_name}")
             
         value = self._generate_expression(assign.value)
@@ -650,6 +1103,209 @@ class LLVMCodeGenerator:
         self.builder.store(value, alloca_inst)
         return value
         
+    def _to_double(self, value):
+        """Converte um valor numérico/booleano para double"""
+        if value.type == self.int32_type:
+            return self.builder.sitofp(value, self.double_type)
+        elif value.type == self.bool_type:
+            return self.builder.uitofp(value, self.double_type)
+        elif value.type != self.double_type:
+            raise ValueError(f"Valor não numérico onde um número era esperado: {value.type}")
+        return value
+
+    def _generate_array_literal(self, array_literal):
+        """Gera código para literal de array (elementos numéricos)"""
+        constant_values = self._constant_array_values(array_literal)
+        if constant_values is not None:
+            return self._generate_constant_array(array_literal, constant_values)
+        elements = [self._to_double(self._generate_expression(element))
+                    for element in array_literal.elements]
+        if id(array_literal) in self.stack_arrays:
+            # Não escapa e executa no máximo uma vez por chamada: pilha
+            array, data = self.stack_arrays[id(array_literal)]
+            self.runtime.init_stack_array(self.builder, array, data, data.type.pointee.count)
+        else:
+            capacity = ir.Constant(self.runtime.int64_type, max(len(elements), 4))
+            arena = self._arena_flag(array_literal)
+            array = self.runtime.call(self.builder, "js_array_new", [capacity, arena], "arraytmp")
+        data = self.runtime.array_data(self.builder, array)
+        for i, element in enumerate(elements):
+            slot = self.builder.gep(data, [ir.Constant(self.runtime.int64_type, i)])
+            self.builder.store(element, slot)
+        self.runtime.store_field(self.builder, ir.Constant(self.runtime.int64_type, len(elements)), array, 0)
+        return array
+
+    def _generate_constant_array(self, array_literal, values):
+        """Array cujos elementos são constantes: aponta para a global (copy-on-write)"""
+        if id(array_literal) in self.stack_arrays:
+            array, _ = self.stack_arrays[id(array_literal)]
+            self.runtime.init_shared_array(self.builder, array, values, fixed=True)
+            return array
+        length = ir.Constant(self.runtime.int64_type, len(values))
+        data = self.runtime.constant_array_data(values)
+        arena = self._arena_flag(array_literal)
+        return self.runtime.call(self.builder, "js_array_new_shared", [length, data, arena], "arraytmp")
+
+    def _constant_array_values(self, node):
+        """Lista de floats se ``node`` é um literal de array com elementos constantes"""
+        if not isinstance(node, ArrayLiteral) or not node.elements:
+            return None
+        values = []
+        for element in node.elements:
+            value = self._constant_number(element)
+            if value is None:
+                return None
+            values.append(value)
+        return values
+
+    def _constant_number(self, expr):
+        """Avalia expressões numéricas constantes simples (ou retorna None)"""
+        if isinstance(expr, Literal):
+            if isinstance(expr.value, (bool, int, float)):
+                return float(expr.value)
+            return None
+        if isinstance(expr, Unary) and expr.operator == '-':
+            value = self._constant_number(expr.right)
+            return None if value is None else -value
+        if isinstance(expr, Binary) and expr.operator in ('+', '-', '*'):
+            left = self._constant_number(expr.left)
+            right = self._constant_number(expr.right)
+            if left is None or right is None:
+                return None
+            if expr.operator == '+':
+                return left + right
+            if expr.operator == '-':
+                return left - right
+            return left * right
+        return None
+
+    def _written_arrays(self, node):
+        """Nomes que aparecem como destino de escrita de array (push/pop, arr[i] = v)
+        ou como argumento de funções do usuário; inclui funções aninhadas"""
+        names = set()
+        if isinstance(node, Assign) and isinstance(node.left, Index):
+            if isinstance(node.left.collection, Identifier):
+                names.add(node.left.collection.name)
+        elif isinstance(node, Call) and isinstance(node.callee, Identifier):
+            if node.callee.name not in ("print", "println", "length"):
+                names.update(arg.name for arg in node.args if isinstance(arg, Identifier))
+        for item in children(node):
+            names |= self._written_arrays(item)
+        return names
+
+    def _generate_index(self, index):
+        """Gera código para leitura arr[i]"""
+        collection = self._generate_expression(index.collection)
+        if collection.type != self.array_type:
+            raise ValueError("Indexação só suportada para arrays")
+        position = self._to_double(self._generate_expression(index.index))
+        return self.runtime.array_get_inline(self.builder, collection, position)
+
+    def _generate_index_assign(self, assign):
+        """Gera código para escrita arr[i] = valor"""
+        collection = self._generate_expression(assign.left.collection)
+        if collection.type != self.array_type:
+            raise ValueError("Indexação só suportada para arrays")
+        position = self._to_double(self._generate_expression(assign.left.index))
+        value = self._to_double(self._generate_expression(assign.value))
+        self.runtime.call(self.builder, "js_array_set", [collection, position, value])
+        return value
+
+    # -------------------
+    # Arena por frame
+    # -------------------
+
+    def _arena_flag(self, node):
+        """i1 indicando se a alocação do nó pode ir para a arena do frame.
+
+        Só nós marcados pelo frontend com ``escapes = False`` usam a arena;
+        na ausência da informação a alocação vai para o heap.
+        """
+        in_arena = self.arena_mark is not None and getattr(node, 'escapes', True) is False
+        return ir.Constant(self.bool_type, in_arena)
+
+    def _frame_uses_arena(self, node):
+        """Verifica se o corpo (sem funções aninhadas) tem alocações que não escapam"""
+        if getattr(node, 'escapes', True) is False:
+            return True
+        for item in children(node):
+            if not isinstance(item, FuncDecl) and self._frame_uses_arena(item):
+                return True
+        return False
+
+    def _allocate_stack_arrays(self, node):
+        """Cria no bloco de entrada os allocas dos arrays marcados com ``stack``"""
+        if isinstance(node, ArrayLiteral) and getattr(node, 'stack', False):
+            capacity = max(len(node.elements), 4)
+            header = self.builder.alloca(self.runtime.array_type, name="stack_array")
+            data = None
+            if self._constant_array_values(node) is None:
+                data = self.builder.alloca(ir.ArrayType(self.double_type, capacity), name="stack_data")
+            self.stack_arrays[id(node)] = (header, data)
+        for item in children(node):
+            if not isinstance(item, FuncDecl):
+                self._allocate_stack_arrays(item)
+
+    def _take_arena_mark(self):
+        """Tira a marca da arena na entrada da função (antes de qualquer alocação)"""
+        chunk_var, top_var = self.runtime.arena_state()
+        self.arena_mark = (self.builder.load(chunk_var, name="arena_chunk"),
+                           self.builder.load(top_var, name="arena_top"))
+
+    def _finish_frame(self, is_main=False):
+        """Antes de cada 'ret': libera a arena do frame e, na main, imprime os relatórios"""
+        if self.arena_mark is None and not (is_main and (self.instrument_allocations or self.memo_stats
+                                                         or self.pgo_generate)):
+            return
+        for block in self.function.blocks:
+            terminator = block.terminator
+            if terminator is None or terminator.opname != 'ret':
+                continue
+            frame_builder = ir.IRBuilder(block)
+            frame_builder.position_before(terminator)
+            if self.arena_mark is not None:
+                self.runtime.call(frame_builder, "js_arena_release", list(self.arena_mark))
+            if is_main and self.instrument_allocations:
+                self.runtime.call(frame_builder, "js_alloc_report", [])
+            if is_main and self.memo_stats:
+                self.runtime.call(frame_builder, "js_memo_report", [])
+            if is_main and self.pgo_generate:
+                # Definida depois de gerar todas as funções (ver define_profile_writer)
+                frame_builder.call(self.runtime.declare_c_function("js_pgo_write", self.void_type, []), [])
+
+    def _memo_lookup(self):
+        """Na entrada: procura os argumentos na tabela da função e, se
+        achar, retorna o valor guardado. A chave usa os argumentos
+        originais (a recursão em cauda só reescreve os parâmetros)."""
+        func = self.function
+        table = self.runtime.memo_table(func.name, len(func.args))
+        key = self.builder.alloca(ir.ArrayType(self.double_type, len(func.args)), name="memo_key")
+        for index, arg in enumerate(func.args):
+            self.builder.store(arg, self.builder.gep(key, [ir.Constant(self.int32_type, 0),
+                                                           ir.Constant(self.int32_type, index)]))
+        key = self.builder.gep(key, [ir.Constant(self.int32_type, 0), ir.Constant(self.int32_type, 0)])
+        cached = self.runtime.call(self.builder, "js_memo_find", [table, key], "memo_cached")
+        hit_block = func.append_basic_block(name="memo_hit")
+        miss_block = func.append_basic_block(name="memo_miss")
+        is_hit = self.builder.icmp_unsigned('!=', cached, ir.Constant(cached.type, None))
+        self.builder.cbranch(is_hit, hit_block, miss_block)
+        self.builder.position_at_end(hit_block)
+        self.builder.ret(self.builder.load(cached, name="memo_value"))
+        self.builder.position_at_end(miss_block)
+        self.memo = (table, key, hit_block)
+
+    def _memo_store_results(self):
+        """Antes de cada 'ret' (exceto o do acerto): guarda o resultado na tabela"""
+        table, key, hit_block = self.memo
+        for block in self.function.blocks:
+            terminator = block.terminator
+            if block is hit_block or terminator is None or terminator.opname != 'ret':
+                continue
+            memo_builder = ir.IRBuilder(block)
+            memo_builder.position_before(terminator)
+            result = terminator.operands[0]
+            self.runtime.call(memo_builder, "js_memo_store", [table, key, result])
+
     def _generate_call(self, call):
         """Gera código para chamada de função"""
         if isinstance(call.callee, Identifier):
@@ -659,7 +1315,10 @@ class LLVMCodeGenerator:
             if func_name == "println" or func_name == "print":
                 if len(call.args) == 1:
                     arg = self._generate_expression(call.args[0])
-                    if arg.type.is_pointer:  # String
+                    if arg.type == self.string_type:
+                        newline = ir.Constant(self.bool_type, func_name == "println")
+                        return self.runtime.call(self.builder, "js_str_print", [arg, newline])
+                    elif arg.type.is_pointer:  # String C
                         return self.builder.call(self.puts_func, [arg])
                     else:
                         # Converte número para string (simplificado - usa printf)
@@ -687,47 +1346,451 @@ class LLVMCodeGenerator:
                             arg = self.builder.uitofp(arg, self.double_type)
                             
                         return self.builder.call(self.printf_func, [fmt_ptr, arg])
-            
-            # Suporte para funções definidas pelo usuário
-            # Procura a função no módulo
-            try:
-                func = self.module.get_global(func_name)
-                if func is not None:
-                    # Gera argumentos
-                    args = []
-                    for arg_expr in call.args:
-                        arg_value = self._generate_expression(arg_expr)
-                        
-                        # Converte para double se necessário
-                        if arg_value.type == self.int32_type:
-                            arg_value = self.builder.sitofp(arg_value, self.double_type)
-                        elif arg_value.type == self.bool_type:
-                            arg_value = self.builder.uitofp(arg_value, self.double_type)
-                        
-                        args.append(arg_value)
-                    
-                    # Chama a função
-                    return self.builder.call(func, args, name="calltmp")
-            except:
-                pass
+
+            if func_name == "length" and len(call.args) == 1:
+                arg = self._generate_expression(call.args[0])
+                if arg.type == self.string_type:
+                    # O(1): o descritor já carrega o comprimento
+                    length = self.runtime.string_length(self.builder, arg)
+                    return self.builder.uitofp(length, self.double_type, name="lentmp")
+                if arg.type == self.array_type:
+                    length = self.runtime.array_length(self.builder, arg)
+                    return self.builder.uitofp(length, self.double_type, name="lentmp")
+
+            if func_name == "push" and len(call.args) == 2:
+                array = self._generate_expression(call.args[0])
+                value = self._to_double(self._generate_expression(call.args[1]))
+                return self.runtime.call(self.builder, "js_array_push", [array, value])
+
+            if func_name == "pop" and len(call.args) == 1:
+                array = self._generate_expression(call.args[0])
+                return self.runtime.call(self.builder, "js_array_pop", [array], "poptmp")
+
+            if func_name == "concat" and len(call.args) == 2:
+                left = self._generate_expression(call.args[0])
+                right = self._generate_expression(call.args[1])
+                return self._generate_string_binary('+', left, right, call)
+
+            target = self._user_call_target(call, func_name)
+            if target is not None:
+                func, args = target
+                return self.builder.call(func, args, name="calltmp")
                         
         raise ValueError(f"Chamada de função não suportada: {call}")
+
+    def _user_call_target(self, call, func_name):
+        """(função ou clone chamado, argumentos já gerados) de uma chamada a
+        função do usuário, ou None se o nome não é de uma função"""
+        # Funções do usuário: todas já declaradas na primeira fase
+        # (_declare_functions), então a chamada é sempre direta
+        func = self.function_values.get(getattr(call, 'symbol', None))
+        if func is None:
+            func = self.module.globals.get(func_name)
+        if not isinstance(func, ir.Function) or func.function_type.var_arg:
+            return None
+        if len(call.args) != len(func.args):
+            raise ValueError(f"Função '{func_name}' espera {len(func.args)} argumentos, "
+                             f"recebeu {len(call.args)}")
+        args = [self._generate_expression(arg_expr) for arg_expr in call.args]
+        kinds = tuple(self._value_kind(arg) for arg in args)
+        if any(kind != 'double' for kind in kinds):
+            clone = self._specialize(func, kinds)
+            if clone is not None:
+                return clone, args
+            if any(kind in ('string', 'array') for kind in kinds):
+                raise ValueError(f"Limite de {self.max_clones} especializações atingido "
+                                 f"para '{func_name}' (argumentos {', '.join(kinds)})")
+        return func, [self._to_double(arg) for arg in args]
+
+    def _generate_tail_call(self, call):
+        """``return f(...)``: valor da chamada, marcada ``musttail`` (mesma
+        assinatura e nada a fazer depois dela: liberar a arena, guardar o
+        resultado na tabela de memoização) ou ``tail``; se ``f``
+        é a própria função, guarda os argumentos nos parâmetros e salta
+        para o início do corpo (laço, inclusive em O0) e retorna None.
+
+        ``tail`` é sempre válido: o chamado nunca recebe ponteiros para a
+        pilha do chamador (arrays passados a funções escapam e ficam no
+        heap). Pelo mesmo motivo a arena do frame pode ser liberada antes
+        do salto."""
+        func_name = call.callee.name if isinstance(call.callee, Identifier) else None
+        if func_name is None or func_name in NATIVE_FUNCTIONS:
+            return self._generate_expression(call)
+        target = self._user_call_target(call, func_name)
+        if target is None:
+            return self._generate_expression(call)
+        func, args = target
+        if func is self.function and self.tail_block is not None:
+            for slot, arg in zip(self.param_slots, args):
+                self.builder.store(arg, slot)
+            if self.arena_mark is not None:
+                self.runtime.call(self.builder, "js_arena_release", list(self.arena_mark))
+            self.builder.branch(self.tail_block)
+            return None
+        must = (func.function_type == self.function.function_type and self.arena_mark is None
+                and self.memo is None)
+        return self.builder.call(func, args, name="calltmp", tail='musttail' if must else 'tail')
+        
+    # -------------------
+    # Especialização por tipos
+    # -------------------
+
+    def _value_kind(self, value):
+        """Tipo de um argumento para a especialização (ver specialize.KINDS)"""
+        return self._type_kind(value.type)
+
+    def _type_kind(self, llvm_type):
+        if llvm_type == self.bool_type:
+            return 'bool'
+        if llvm_type == self.string_type:
+            return 'string'
+        if llvm_type == self.array_type:
+            return 'array'
+        return 'double'
+
+    def _kind_type(self, kind):
+        return {'double': self.double_type, 'bool': self.bool_type,
+                'string': self.string_type, 'array': self.array_type}[kind]
+
+    def _specialize(self, func, kinds, force=False):
+        """Clone de ``func`` com parâmetros dos tipos ``kinds`` (ou None: a
+        chamada usa a genérica). O corpo é gerado depois, em
+        _generate_pending_clones; no modo dividido os clones das funções do
+        topo só são declarados aqui e gerados num módulo à parte."""
+        key = (func.name, kinds)
+        if key in self.clones:
+            return self.clones[key]
+        func_decl = self.function_decls.get(func.name)
+        signatures = self.clone_report.setdefault(func.name, [])
+        if func_decl is None or (len(signatures) >= self.max_clones and not force):
+            self.clone_fallbacks += 1
+            return None
+        clone_type = ir.FunctionType(self._return_type(func_decl, kinds),
+                                     [self._kind_type(kind) for kind in kinds])
+        clone = ir.Function(self.module, clone_type, name=clone_name(func.name, kinds))
+        clone.attributes = _FunctionAttributes(clone_attributes(self._function_effects(func_decl), kinds))
+        self.clones[key] = clone
+        signatures.append(kinds)
+        if id(func_decl) not in self.external_clones:
+            if self.clone_linkage:
+                clone.linkage = self.clone_linkage
+            self.pending_clones.append((func_decl, clone))
+        return clone
+
+    def _return_type(self, func_decl, kinds):
+        """string/array se todos os ``return`` da versão com parâmetros ``kinds``
+        produzem esse tipo; senão double"""
+        returned = {self._resolve_kind(kind, kinds) for kind in return_shape(func_decl)}
+        if len(returned) == 1 and returned <= {'string', 'array'}:
+            return self._kind_type(returned.pop())
+        return self.double_type
+
+    def _resolve_kind(self, kind, kinds):
+        if isinstance(kind, str):
+            return kind
+        if kind[0] == 'param':
+            return kinds[kind[1]]
+        left, right = self._resolve_kind(kind[1], kinds), self._resolve_kind(kind[2], kinds)
+        return 'string' if 'string' in (left, right) else 'double'
+
+    def _check_generic_calls(self, callees):
+        """Erro se alguma chamada usa uma versão genérica que não pôde ser gerada"""
+        if not self.failed_generics:
+            return
+        for name in callees:
+            if name in self.failed_generics:
+                raise ValueError(self.failed_generics[name])
+
+    def _generate_pending_clones(self):
+        while self.pending_clones:
+            func_decl, clone = self.pending_clones.pop(0)
+            self._generate_func_decl(func_decl, clone)
+
+    def _default_return_value(self):
+        """Retorno implícito da função atual: 0.0 (ou null nos clones string/array)"""
+        return_type = self.function.function_type.return_type
+        if return_type == self.double_type:
+            return ir.Constant(self.double_type, 0.0)
+        return ir.Constant(return_type, None)
+
+    # -------------------
+    # PGO
+    # -------------------
+
+    def _profiled_branch(self, cond_value, true_block, false_block):
+        """cbranch de uma condição do programa (if, guarda e latch dos laços),
+        que é o ponto ``f#N`` do perfil: no build instrumentado conta as
+        vezes em que cada lado foi tomado; com perfil leva os pesos
+        (branch_weights) que guiam o layout dos blocos e o inliner"""
+        count = self.profile_sites.get(self.function.name, 0) + 1
+        self.profile_sites[self.function.name] = count
+        site = f"{self.function.name}#{count}"
+        if self.pgo_generate:
+            counters = self.runtime.profile_counters(site, 2)
+            taken = self.builder.zext(cond_value, ir.IntType(64))
+            self._count(counters, 0, taken)
+            self._count(counters, 1, self.builder.sub(ir.Constant(ir.IntType(64), 1), taken))
+        branch = self.builder.cbranch(cond_value, true_block, false_block)
+        weights = self.profile.branch_weights(site) if self.profile is not None else None
+        if weights is not None:
+            branch.set_weights(weights)
+        return branch
+
+    def _profile_entry(self):
+        """Na entrada da função atual: conta a chamada (build instrumentado)"""
+        if self.pgo_generate:
+            counters = self.runtime.profile_counters(self.function.name, 1)
+            self._count(counters, 0, ir.Constant(ir.IntType(64), 1))
+
+    def _count(self, counters, slot, amount):
+        pointer = self.builder.gep(counters, [ir.Constant(self.int32_type, 0), ir.Constant(self.int32_type, slot)])
+        self.builder.store(self.builder.add(self.builder.load(pointer), amount), pointer)
+
+    def _apply_entry_profile(self, func):
+        """Chamadas de ``func`` no perfil: ``function_entry_count`` e, se
+        nenhuma execução de treino a chamou, ``cold``"""
+        count = self.profile.entry_count(func.name) if self.profile is not None else None
+        if count is None:
+            return
+        func.set_metadata('prof', self.module.add_metadata(
+            ["function_entry_count", ir.Constant(ir.IntType(64), count)]))
+        if count == 0:
+            func.attributes.add('cold')
+
+    def _add_profile_summary(self):
+        """Flag de módulo ``ProfileSummary``: sem ele o LLVM não classifica
+        funções e chamadas em quentes/frias. Igual em todos os módulos do
+        modo dividido, como a ligação exige."""
+        fields, detailed = self.profile.summary()
+        int64_type = ir.IntType(64)
+        operands = [self.module.add_metadata(["ProfileFormat", "InstrProf"])]
+        operands += [self.module.add_metadata([name, ir.Constant(int64_type, value)])
+                     for name, value in fields]
+        cutoffs = self.module.add_metadata([
+            self.module.add_metadata([ir.Constant(self.int32_type, cutoff), ir.Constant(int64_type, minimum),
+                                      ir.Constant(self.int32_type, count)])
+            for cutoff, minimum, count in detailed])
+        operands.append(self.module.add_metadata(["DetailedSummary", cutoffs]))
+        self.module.add_named_metadata("llvm.module.flags", [
+            ir.Constant(self.int32_type, 1), "ProfileSummary", self.module.add_metadata(operands)])
+
+    def _profile_header(self):
+        return f"{PROFILE_HEADER} {self.source_digest or '-'}"
+
+    def _link_profile_writer(self, linked):
+        """Modo dividido: os contadores estão nos módulos das funções, então
+        ``js_pgo_write`` é definida num módulo à parte que os declara"""
+        prefix = RuntimeLibrary.PGO_COUNTER_PREFIX
+        sites = [(global_var.name[len(prefix):], global_var.global_value_type.element_count)
+                 for global_var in linked.global_variables if global_var.name.startswith(prefix)]
+        writer = ir.Module(name="pgo")
+        RuntimeLibrary(writer, shared=True).define_profile_writer(self.pgo_generate, self._profile_header(),
+                                                                  sites)
+        linked.link_in(llvm.parse_assembly(str(writer)))
+
+    # -------------------
+    # Geração paralela
+    # -------------------
+
+    def _generate_split(self, program):
+        """Gera as funções do topo em módulos separados e os liga ao da main.
+
+        Cada lote de funções vira um módulo próprio (as demais funções do
+        programa entram como declarações), otimizado e serializado em
+        bitcode. Com ``jobs > 1`` os lotes são gerados em processos; com
+        ``cache`` cada função é um lote e só as que mudaram desde o último
+        build são geradas. A runtime compartilhada (linkonce_odr/common)
+        garante uma única cópia das funções e do estado após a ligação.
+        """
+        functions = [stmt for stmt in program.statements if isinstance(stmt, FuncDecl)]
+        self.deferred_functions = {id(func_decl) for func_decl in functions}
+        self.external_clones = set(self.deferred_functions)
+        self._generate_program(program)
+        
+        linked = llvm.parse_assembly(str(self.module))
+        options = (self.optimization_level, self.instrument_allocations, self.max_clones, self.fast_math,
+                   self.cpu, self.multiversion, self.pgo_generate, self.profile)
+        layout = self._global_layout()
+        if self.cache is not None:
+            # Quem chama depende da aridade, dos efeitos e dos tipos de
+            # retorno dos clones (return_shape) das funções chamadas
+            signatures = {func_decl.name.name: (len(func_decl.params), getattr(func_decl, 'effects', ()),
+                                                return_shape(func_decl))
+                          for func_decl in functions}
+            signatures.update(layout)
+            keys = [self.cache.fingerprint(func_decl, signatures, options) for func_decl in functions]
+            bitcodes = [self.cache.load(key) for key in keys]
+            missing = [index for index, bitcode in enumerate(bitcodes) if bitcode is None]
+            generated = self._generate_function_modules(
+                functions, options, layout, [(index, index + 1) for index in missing])
+            for index, bitcode in zip(missing, generated):
+                self.cache.store(keys[index], bitcode)
+                bitcodes[index] = bitcode
+        else:
+            size = -(-len(functions) // (self.jobs * 2)) if functions else 1
+            ranges = [(start, min(start + size, len(functions)))
+                      for start in range(0, len(functions), size)]
+            bitcodes = self._generate_function_modules(functions, options, layout, ranges)
+        for bitcode in bitcodes:
+            linked.link_in(llvm.parse_bitcode(bitcode))
+        # Clones das funções do topo pedidos por qualquer módulo: um módulo à
+        # parte, regerado a cada build (não entram no cache)
+        requests = self._clone_requests(linked, functions)
+        if requests:
+            bitcode, report = _generate_clones(functions, options, layout, requests)
+            linked.link_in(llvm.parse_bitcode(bitcode))
+            for name, signatures in report.items():
+                known = self.clone_report.setdefault(name, [])
+                known.extend(kinds for kinds in signatures if kinds not in known)
+        # Genéricas que ficaram só declaradas (ver _generate_func_decl)
+        names = {func_decl.name.name for func_decl in functions}
+        failed = {func.name for func in linked.functions if func.is_declaration and func.name in names}
+        if failed:
+            callees = [list(instr.operands)[-1].name for func in linked.functions for block in func.blocks
+                       for instr in block.instructions if instr.opcode == 'call']
+            if failed.intersection(callees):
+                self.failed_generics.update(_failed_generics(str(linked)))
+                self._check_generic_calls(callees)
+        if self.pgo_generate:
+            self._link_profile_writer(linked)
+        # Ligados os módulos, as globais do topo voltam a ser internas
+        for global_var in self.global_variables.values():
+            linked.get_global_variable(global_var.name).linkage = llvm.Linkage.internal
+        
+        if self.reoptimize:
+            # Com tudo num módulo só, o inliner enxerga chamadas entre lotes
+            self._run_pass_pipeline(linked)
+        linked.verify()
+        self.linked_module = linked
+        return str(linked)
+
+    @staticmethod
+    def _clone_requests(linked, functions):
+        """[(função, tipos)] dos clones só declarados no módulo ligado"""
+        names = {func_decl.name.name for func_decl in functions}
+        requests = []
+        for func in linked.functions:
+            parsed = parse_clone_name(func.name)
+            if func.is_declaration and parsed is not None and parsed[0] in names:
+                requests.append(parsed)
+        return requests
+
+    def _generate_function_modules(self, functions, options, layout, ranges):
+        """Bitcode otimizado de cada intervalo de ``functions``, em ordem."""
+        if not ranges:
+            return []
+        if self.jobs > 1:
+            with ProcessPoolExecutor(self.jobs, initializer=_init_codegen_worker,
+                                     initargs=(functions, options, layout)) as pool:
+                return list(pool.map(_generate_function_range, ranges))
+        return [_generate_functions(functions, options, layout, start, end) for start, end in ranges]
+
+    def _global_layout(self):
+        """Descrição serializável das variáveis do topo, para os módulos das funções:
+        nome -> (tipo, valor imediato ou None, global constante?)"""
+        kinds = {self.double_type: 'number', self.bool_type: 'boolean',
+                 self.string_type: 'string', self.array_type: 'array'}
+        layout = {}
+        for name, constant in self.global_constants.items():
+            layout[name] = (kinds[constant.type], constant.constant, True)
+        for name, global_var in self.global_variables.items():
+            layout[name] = (kinds[global_var.type.pointee], None, global_var.global_constant)
+        return layout
+
+    def _declare_globals(self, layout):
+        """Declara (external) as variáveis do topo definidas no módulo da main"""
+        types = {'number': self.double_type, 'boolean': self.bool_type,
+                 'string': self.string_type, 'array': self.array_type}
+        for name, (kind, value, constant) in layout.items():
+            if value is not None:
+                self.global_constants[name] = ir.Constant(types[kind], value)
+            else:
+                global_var = self._declare_global(name, types[kind])
+                global_var.global_constant = constant
+                self.global_variables[name] = global_var
+
+    def _run_pass_pipeline(self, llvm_module):
+        """Otimiza um módulo (llvm.ModuleRef) com o pipeline padrão do nível configurado"""
+        level = self._get_llvm_opt_level()
+        if self.optimization_level == OptimizationLevel.O0:
+            return
+        target_machine = self._target_machine(opt=level)
+        tuning = llvm.create_pipeline_tuning_options(speed_level=level)
+        # Com perfil, blocos que o treino nunca executou saem da função
+        # (hot/cold splitting); a opção é do processo, então só vale
+        # enquanto o pipeline é montado
+        if self.profile is not None:
+            llvm.set_option("", "--hot-cold-split=true")
+        try:
+            pass_builder = llvm.create_pass_builder(target_machine, tuning)
+            module_pass_manager = pass_builder.getModulePassManager()
+        finally:
+            if self.profile is not None:
+                llvm.set_option("", "--hot-cold-split=false")
+        module_pass_manager.run(llvm_module, pass_builder)
+
+    def loop_remarks(self):
+        """[(laço, dica, aplicada?)] das dicas de laço, conferidas numa cópia
+        do módulo otimizada com o pipeline do nível (em O0 nada se aplica)"""
+        loops = hinted_loops(self._module_ir())
+        if not loops:
+            return []
+        llvm_module = self._llvm_module()
+        self._run_pass_pipeline(llvm_module)
+        return loop_remarks(str(llvm_module), loops)
+
+    def _target_machine(self, opt=2):
+        """Target machine do host para a CPU pedida (--cpu): a genérica,
+        a do host com as features dele ("native") ou uma CPU do LLVM"""
+        cpu, features = "", ""
+        if self.cpu == "native":
+            cpu, features = llvm.get_host_cpu_name(), llvm.get_host_cpu_features().flatten()
+        elif self.cpu:
+            cpu = self.cpu
+        return llvm.Target.from_default_triple().create_target_machine(cpu=cpu, features=features, opt=opt)
+
+    def _module_ir(self):
+        """IR textual a compilar (o módulo ligado, na geração paralela)"""
+        if self.linked_module is not None:
+            return str(self.linked_module)
+        return str(self.module)
+
+    def _llvm_module(self):
+        """Cópia nova do módulo a compilar como llvm.ModuleRef"""
+        if self.linked_module is not None:
+            return llvm.parse_bitcode(self.linked_module.as_bitcode())
+        return llvm.parse_assembly(str(self.module))
         
     def compile_to_object(self, output_file):
         """Compila o módulo LLVM para arquivo objeto"""
         # Cria target machine
-        target = llvm.Target.from_default_triple()
-        target_machine = target.create_target_machine()
+        target_machine = self._target_machine()
         
         # Compila para arquivo objeto
         with open(output_file, 'wb') as f:
-            f.write(target_machine.emit_object(llvm.parse_assembly(str(self.module))))
-            
+            f.write(target_machine.emit_object(self._llvm_module()))
+
+    def compile_to_jit(self):
+        """Compila o módulo em memória (MCJIT) e retorna o execution engine"""
+        llvm_module = self._llvm_module()
+        llvm_module.verify()
+        target_machine = self._target_machine(opt=self._get_llvm_opt_level())
+        engine = llvm.create_mcjit_compiler(llvm_module, target_machine)
+        engine.finalize_object()
+        return engine
+
+    def run_jit(self):
+        """Executa a função main via JIT e retorna o código de saída"""
+        import ctypes
+        engine = self.compile_to_jit()
+        main_ptr = engine.get_function_address("main")
+        return ctypes.CFUNCTYPE(ctypes.c_int32)(main_ptr)()
+
     def compile_to_executable(self, output_file):
         """Compila o módulo LLVM para executável"""
         # Salva IR em arquivo temporário
         with tempfile.NamedTemporaryFile(mode='w', suffix='.ll', delete=False, encoding='utf-8') as f:
-            f.write(str(self.module))
+            f.write(self._module_ir())
             ir_file = f.name
             
         try:
@@ -737,6 +1800,12 @@ class LLVMCodeGenerator:
             # Adiciona flags de otimização baseadas no nível
             opt_flags = self._get_clang_optimization_flags()
             clang_cmd.extend(opt_flags)
+            if self.fast_math:
+                clang_cmd.append('-ffast-math')
+            if self.cpu:
+                clang_cmd.append(f'-march={self.cpu}')
+            if self.profile is not None:
+                clang_cmd.extend(['-mllvm', '-hot-cold-split=true'])
             
             # Detecta plataforma e ajusta comando
             if sys.platform.startswith('win'):
@@ -923,3 +1992,152 @@ class LLVMCodeGenerator:
                 print(f"   💾 Redução de tamanho: {size_diff} caracteres ({size_diff/stats_before['module_size']*100:.1f}%)")
             
         return result
+
+
+def _switch_chain(if_stmt):
+    """(variável, [(constante, ramo)], else final) de um if/else-if cujas
+    condições comparam a mesma variável com constantes inteiras distintas,
+    ou None se a cadeia é curta demais (ver MIN_SWITCH_ARMS)"""
+    subject, arms, seen = None, [], set()
+    node = if_stmt
+    while isinstance(node, IfStmt):
+        case = _switch_case(node.condition)
+        if case is None:
+            break
+        identifier, constant = case
+        if subject is None:
+            subject = identifier
+        elif (identifier.name != subject.name
+              or getattr(identifier, 'symbol', None) is not getattr(subject, 'symbol', None)):
+            break
+        if constant in seen:
+            return None
+        seen.add(constant)
+        arms.append((constant, node.then_branch))
+        node = node.else_branch
+    if len(arms) < MIN_SWITCH_ARMS:
+        return None
+    return subject, arms, node
+
+
+def _switch_case(condition):
+    """(identificador, constante) de ``x == c`` ou ``c == x`` com c inteiro"""
+    if not (isinstance(condition, Binary) and condition.operator == '=='):
+        return None
+    for identifier, literal in ((condition.left, condition.right), (condition.right, condition.left)):
+        negate = isinstance(literal, Unary) and literal.operator == '-'
+        if negate:
+            literal = literal.right   # -c antes do ConstantFolder
+        if isinstance(identifier, Identifier) and isinstance(literal, Literal):
+            value = literal.value
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and float(value).is_integer() and abs(value) <= MAX_EXACT_INTEGER):
+                return identifier, -int(value) if negate else int(value)
+    return None
+
+
+def _has_node(node, types):
+    """A subárvore contém um nó de ``types``?"""
+    if isinstance(node, types):
+        return True
+    for item in children(node):
+        if _has_node(item, types):
+            return True
+    return False
+
+
+def _has_self_tail_call(node, name):
+    """O corpo (sem as funções aninhadas) tem ``return name(...)``"""
+    if isinstance(node, FuncDecl):
+        return False
+    if isinstance(node, ReturnStmt):
+        value = node.value
+        return (isinstance(value, Call) and isinstance(value.callee, Identifier)
+                and value.callee.name == name)
+    for item in children(node):
+        if _has_self_tail_call(item, name):
+            return True
+    return False
+
+
+# Estado de cada processo da geração paralela: (funções do topo, opções)
+_codegen_worker_state = None
+
+
+def _init_codegen_worker(functions, options, layout):
+    global _codegen_worker_state
+    _codegen_worker_state = (functions, options, layout)
+
+
+def _generate_function_range(bounds):
+    start, end = bounds
+    functions, options, layout = _codegen_worker_state
+    return _generate_functions(functions, options, layout, start, end)
+
+
+def _generate_functions(functions, options, layout, start, end):
+    """Gera functions[start:end] num módulo próprio e devolve o bitcode otimizado."""
+    generator = _split_generator(options, layout)
+    generator.external_clones = {id(func_decl) for func_decl in functions}
+    # Só declara as funções que o lote pode chamar
+    batch = functions[start:end]
+    names = set().union(*(referenced_names(func_decl) for func_decl in batch))
+    for func_decl in functions:
+        if func_decl.name.name in names:
+            generator._declare_function_prototype(func_decl)
+    for func_decl in batch:
+        generator._declare_functions(func_decl)
+    for func_decl in batch:
+        generator._generate_func_decl(func_decl)
+    generator._generate_pending_clones()
+    for name, error in generator.failed_generics.items():
+        generator.module.add_named_metadata(FAILED_GENERICS_METADATA, [name, error])
+    llvm_module = llvm.parse_assembly(str(generator.module))
+    generator._run_pass_pipeline(llvm_module)
+    return llvm_module.as_bitcode()
+
+
+def _generate_clones(functions, options, layout, requests):
+    """Gera os clones pedidos [(função, tipos)] (e os que eles pedirem) num
+    módulo próprio, com linkage externa; devolve (bitcode, relatório)."""
+    generator = _split_generator(options, layout)
+    generator.clone_linkage = None
+    for func_decl in functions:
+        generator._declare_functions(func_decl)
+    for name, kinds in requests:
+        generator._specialize(generator.module.globals[name], kinds, force=True)
+    generator._generate_pending_clones()
+    llvm_module = llvm.parse_assembly(str(generator.module))
+    generator._run_pass_pipeline(llvm_module)
+    return llvm_module.as_bitcode(), generator.clone_report
+
+
+def _failed_generics(module_ir):
+    """{nome: erro} do metadado FAILED_GENERICS_METADATA do IR ligado"""
+    named = re.search(rf'^!{re.escape(FAILED_GENERICS_METADATA)} = !\{{(.*)\}}$', module_ir, re.M)
+    if named is None:
+        return {}
+    failed = {}
+    for node in named.group(1).split(", "):
+        name, error = re.search(rf'^{node} = !\{{!"(.*)", !"(.*)"\}}$', module_ir, re.M).groups()
+        failed[_metadata_string(name)] = _metadata_string(error)
+    return failed
+
+
+def _metadata_string(text):
+    # O IR escreve aspas, barras e bytes não ASCII como \XX
+    return re.sub(rb'\\([0-9A-F]{2})', lambda match: bytes([int(match.group(1), 16)]),
+                  text.encode()).decode()
+
+
+def _split_generator(options, layout):
+    """Gerador de um módulo do modo dividido (runtime compartilhada, globais externas)"""
+    (optimization_level, instrument_allocations, max_clones, fast_math, cpu, multiversion,
+     pgo_generate, profile) = options
+    generator = LLVMCodeGenerator(optimization_level=optimization_level,
+                                  instrument_allocations=instrument_allocations,
+                                  shared_runtime=True, max_clones=max_clones, fast_math=fast_math,
+                                  cpu=cpu, multiversion=multiversion, pgo_generate=pgo_generate,
+                                  profile=profile)
+    generator._declare_globals(layout)
+    return generator
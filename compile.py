@@ -20,14 +20,18 @@ Exemplos:
     python compile.py programa.txt --ast
     python compile.py programa.txt --ir
     python compile.py programa.txt --debug
+    python compile.py programa.txt --callgraph
 """
 
 import sys
 import argparse
+import ctypes
 import os
 import tempfile
 from pathlib import Path
 
+import llvmlite.binding as llvm
+
 # Imports do frontend
 from lexer import Lexer
 from tokens import TokenType, Token
@@ -35,10 +39,19 @@ from parser import Parser
 
 # Import do backend
 from codegen import LLVMCodeGenerator, OptimizationLevel
+from escape import EscapeAnalyzer
+from folding import ConstantFolder
+from deadcode import DeadCodeEliminator
+from callgraph import CallGraph
+from effects import EffectAnalyzer
+from incremental import FunctionCache
+from specialize import MAX_CLONES_PER_FUNCTION
+from partial import PartialEvaluator, EVAL_BUDGET
+from pgo import source_digest, raw_profile_path, profile_path, update_profile
 
 # Import do analisador semântico (se disponível)
 try:
-    from analisadorSintatico import SemanticAnalyzer
+    from analisadorSintatico import SemanticAnalyzer, ParallelSemanticAnalyzer
     SEMANTIC_ANALYZER_AVAILABLE = True
 except ImportError:
     SEMANTIC_ANALYZER_AVAILABLE = False
@@ -96,7 +109,10 @@ def print_ast(ast_node, indent=0):
 
 def compile_file(filename, output_name=None, show_tokens=False, show_ast=False, 
                 show_ir=False, no_compile=False, debug=False, optimization_level=OptimizationLevel.O2,
-                show_optimize_stats=False):
+                show_optimize_stats=False, alloc_stats=False, jobs=1, cache_dir=None,
+                show_callgraph=False, max_clones=MAX_CLONES_PER_FUNCTION, memoize=False,
+                memo_stats=False, eval_budget=EVAL_BUDGET, loop_remarks=False, fast_math=False,
+                cpu=None, multiversion=False, pgo_gen=False, pgo_use=False, pgo=False):
     """Função principal de compilação"""
     
     # 1. LEITURA DO CÓDIGO FONTE
@@ -156,7 +172,11 @@ def compile_file(filename, output_name=None, show_tokens=False, show_ast=False,
     # 4. ANÁLISE SEMÂNTICA (se disponível)
     if SEMANTIC_ANALYZER_AVAILABLE:
         print("\n3️⃣ Análise Semântica...")
-        analyzer = SemanticAnalyzer()
+        if jobs > 1:
+            # Corpos de função analisados em paralelo (erros na ordem do código)
+            analyzer = ParallelSemanticAnalyzer(workers=jobs)
+        else:
+            analyzer = SemanticAnalyzer()
         semantic_errors = analyzer.analyze(ast)
         
         if semantic_errors:
@@ -169,18 +189,146 @@ def compile_file(filename, output_name=None, show_tokens=False, show_ast=False,
     else:
         print("\n⚠️ Análise Semântica pulada (não disponível)")
     
+    # Dobramento/propagação de constantes e poda de desvios constantes
+    fold_report = ConstantFolder().fold(ast)
+    if fold_report['removed']:
+        print(f"🧮 Constantes: {fold_report['folded']} expressões dobradas, "
+              f"{fold_report['propagated']} usos propagados, {fold_report['pruned']} desvios podados "
+              f"({fold_report['removed']} nós removidos)")
+    
+    # Código inalcançável, variáveis nunca lidas e stores mortos
+    dead_report = DeadCodeEliminator().eliminate(ast)
+    if dead_report['removed']:
+        print(f"🧹 Código morto: {dead_report['unreachable']} statements inalcançáveis, "
+              f"{dead_report['dead_vars']} variáveis e {dead_report['dead_stores']} stores removidos "
+              f"({dead_report['removed']} nós removidos)")
+    
+    # Grafo de chamadas: funções que o código do topo nunca alcança não são geradas
+    call_graph = CallGraph(ast)
+    if show_callgraph:
+        print("\n" + call_graph.dump())
+    unreachable = call_graph.prune(ast)
+    if unreachable:
+        print(f"🌲 Tree shaking: {len(unreachable)} funções inalcançáveis removidas "
+              f"({', '.join(unreachable)})")
+    
+    # Efeitos das funções viram atributos LLVM (readnone, readonly, norecurse...)
+    # (e funções puras marcadas com // @memo ou, com --memoize, recursivas
+    # ganham uma tabela de resultados)
+    effect_analyzer = EffectAnalyzer(memoize=memoize)
+    effect_report = effect_analyzer.analyze(ast, call_graph)
+    if call_graph.functions:
+        print(f"🔬 Efeitos: {effect_report['readnone']} readnone, {effect_report['readonly']} readonly, "
+              f"{effect_report['norecurse']} norecurse, {effect_report['willreturn']} willreturn")
+    if effect_analyzer.memoized:
+        print(f"🧠 Memoização: {', '.join(effect_analyzer.memoized)}")
+    for func_name in effect_analyzer.memo_rejected:
+        print(f"⚠️ @memo ignorado em '{func_name}': a função não é pura (lê ou escreve memória)")
+    
+    # Avaliação parcial: chamadas puras com argumentos constantes viram o
+    # resultado; funções que deixam de ser chamadas saem da AST
+    eval_report = PartialEvaluator(budget=eval_budget).evaluate(ast)
+    if eval_report['folded'] or eval_report['aborted']:
+        print(f"🧪 Avaliação parcial: {eval_report['folded']} chamadas dobradas em "
+              f"{eval_report['steps']} passos, {eval_report['aborted']} abandonadas "
+              f"(orçamento de {eval_budget} passos)")
+    if eval_report['folded']:
+        unreachable = CallGraph(ast).prune(ast)
+        if unreachable:
+            print(f"🌲 Tree shaking: {len(unreachable)} funções inalcançáveis removidas "
+                  f"({', '.join(unreachable)})")
+    
+    # Análise de escape: decide pilha/arena/heap para cada alocação
+    escape_report = EscapeAnalyzer().analyze(ast)
+    for func_name, counts in escape_report.items():
+        if counts['stack'] or counts['arena']:
+            print(f"🧭 Análise de escape: {func_name}: {counts['stack']} na pilha, "
+                  f"{counts['arena']} na arena, {counts['heap']} no heap")
+    
     # 5. GERAÇÃO DE CÓDIGO LLVM IR
     print("\n4️⃣ Geração de Código LLVM IR...")
     
     try:
-        code_generator = LLVMCodeGenerator(optimization_level=optimization_level)
+        # PGO: execuções instrumentadas anexam contadores a <fonte>.pgo.raw,
+        # juntados em <fonte>.pgo (só as da versão atual do fonte)
+        digest = source_digest(source_code)
+        profile = None
+        if pgo:
+            # Um comando só: build instrumentado, execução de treino via JIT,
+            # junção do perfil e o build otimizado abaixo
+            print("🏋️ PGO: execução de treino instrumentada...")
+            trainer = LLVMCodeGenerator(optimization_level=optimization_level, max_clones=max_clones,
+                                        fast_math=fast_math, cpu=cpu, multiversion=multiversion,
+                                        pgo_generate=str(raw_profile_path(filename)), source_digest=digest)
+            trainer.generate_code(ast)
+            sys.stdout.flush()
+            trainer.run_jit()
+            ctypes.CDLL(None).fflush(None)   # Saída do programa antes dos relatórios
+        if pgo or pgo_use:
+            profile = update_profile(filename, digest)
+            if profile.stale_runs:
+                print(f"⚠️ PGO: {profile.stale_runs} execuções de outra versão do fonte descartadas")
+            if profile.runs:
+                cold = profile.cold_functions()
+                print(f"📈 Perfil: {profile.runs} execuções, {len(profile.counts)} pontos "
+                      f"({profile_path(filename)})" + (f"; frias: {', '.join(cold)}" if cold else ""))
+            else:
+                print(f"⚠️ PGO: sem perfil para '{filename}' (gere com --pgo-gen e execute, ou use --pgo)")
+                profile = None
+        
+        code_generator = LLVMCodeGenerator(optimization_level=optimization_level,
+                                           instrument_allocations=alloc_stats,
+                                           jobs=jobs,
+                                           cache=FunctionCache(cache_dir) if cache_dir else None,
+                                           max_clones=max_clones,
+                                           memo_stats=memo_stats,
+                                           fast_math=fast_math,
+                                           cpu=cpu,
+                                           multiversion=multiversion,
+                                           pgo_generate=str(raw_profile_path(filename)) if pgo_gen else None,
+                                           source_digest=digest,
+                                           profile=profile)
         
         # Mostra informações de otimização
         if optimization_level != OptimizationLevel.O0:
             print(f"🎛️ Nível de otimização: {optimization_level.name}")
+        if fast_math:
+            print("⚡ Fast-math: aritmética reassociável, sem NaN/infinitos (reassoc nnan ninf contract)")
+        if cpu == "native":
+            print(f"🖥️ CPU alvo: {llvm.get_host_cpu_name()} (host)")
+        elif cpu:
+            print(f"🖥️ CPU alvo: {cpu}")
+        if pgo_gen:
+            print(f"📊 PGO: build instrumentado; cada execução anexa contadores a "
+                  f"{raw_profile_path(filename)} (recompile depois com --pgo-use)")
+        if multiversion and not code_generator.multiversion_supported:
+            print("⚠️ Multiversão ignorada: só disponível em x86-64")
         
         llvm_ir = code_generator.generate_code(ast)
         print("✅ LLVM IR gerado com sucesso")
+        if code_generator.cache is not None:
+            print(f"♻️ Cache incremental: {code_generator.cache.hits} funções reutilizadas, "
+                  f"{code_generator.cache.misses} geradas")
+        clones = [f"{name}({', '.join(kinds)})"
+                  for name, signatures in code_generator.clone_report.items() for kinds in signatures]
+        if clones:
+            print(f"🧬 Especialização: {len(clones)} clones ({', '.join(clones)})")
+        if code_generator.clone_fallbacks:
+            print(f"   {code_generator.clone_fallbacks} chamadas na versão genérica "
+                  f"(limite de {max_clones} clones por função)")
+        if code_generator.tail_loops:
+            print(f"🔁 Recursão em cauda vira laço: {', '.join(code_generator.tail_loops)}")
+        multiversioned = code_generator.multiversioned_functions()
+        if multiversioned:
+            print(f"🧩 Multiversão (base/AVX2/AVX-512, escolhida pelo cpuid): {', '.join(multiversioned)}")
+        for annotation in code_generator.rejected_loop_hints:
+            print(f"⚠️ Dica de laço desconhecida ignorada: @{annotation}")
+        if loop_remarks:
+            remarks = code_generator.loop_remarks()
+            if remarks:
+                print(f"🔄 Dicas de laço ({optimization_level.name}):")
+            for loop, hint, honored in remarks:
+                print(f"   {loop} @{hint}: {'aplicada' if honored else 'ignorada pelo LLVM'}")
         
         if show_ir:
             print("\n--- 🔧 LLVM IR GERADO ---")
@@ -254,6 +402,7 @@ Exemplos de uso:
   python compile.py programa.txt --ir           # Mostrar LLVM IR
   python compile.py programa.txt --debug        # Modo debug (verbose)
   python compile.py programa.txt --no-compile   # Só gerar IR, não compilar
+  python compile.py programa.txt --callgraph    # Mostrar grafo de chamadas
         """
     )
     
@@ -264,12 +413,50 @@ Exemplos de uso:
     parser.add_argument('--ir', action='store_true', help='Mostrar LLVM IR gerado')
     parser.add_argument('--debug', action='store_true', help='Modo debug (verbose)')
     parser.add_argument('--no-compile', action='store_true', help='Não compilar para executável')
+    parser.add_argument('--callgraph', action='store_true',
+                       help='Mostrar o grafo de chamadas (entrada/saída de cada função, recursão e funções inalcançáveis)')
     
     # Opções de otimização
     parser.add_argument('-O', '--optimize', choices=['0', '1', '2', '3', 's', 'z'], 
                        default='2', help='Nível de otimização (0=sem, 1=básico, 2=moderado, 3=agressivo, s=tamanho, z=tamanho+)')
     parser.add_argument('--optimize-stats', action='store_true', help='Mostrar estatísticas de otimização')
     parser.add_argument('--no-optimize', action='store_true', help='Desabilita todas as otimizações (equivale a -O0)')
+    parser.add_argument('--alloc-stats', action='store_true',
+                       help='Build instrumentado: imprime alocações (heap/arena) e pico do heap ao final da execução')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='Número de processos para as etapas paralelas (análise semântica e geração de código)')
+    parser.add_argument('--max-clones', type=int, default=MAX_CLONES_PER_FUNCTION, metavar='N',
+                       help='Máximo de versões especializadas (por tipos dos argumentos) de cada função')
+    parser.add_argument('--memoize', action='store_true',
+                       help='Memoiza as funções recursivas puras (além das anotadas com // @memo)')
+    parser.add_argument('--memo-stats', action='store_true',
+                       help='Imprime acertos, faltas e despejos das tabelas de memoização ao final da execução')
+    parser.add_argument('--eval-budget', type=int, default=EVAL_BUDGET, metavar='N',
+                       help='Passos do avaliador que executa em tempo de compilação as chamadas puras '
+                            'com argumentos constantes (0 desliga)')
+    parser.add_argument('--loop-remarks', action='store_true',
+                       help='Informa se cada dica de laço (// @unroll(4), // @vectorize...) foi aplicada')
+    parser.add_argument('--fast-math', action='store_true',
+                       help='Aritmética de ponto flutuante reassociável e sem NaN/infinitos '
+                            '(vetoriza reduções; // @fastmath vale só para uma função)')
+    parser.add_argument('--cpu', metavar='CPU',
+                       help='CPU alvo: "native" (a do host, com todas as suas extensões) ou um nome '
+                            'do LLVM/clang como "x86-64-v3" ou "skylake-avx512"')
+    parser.add_argument('--multiversion', action='store_true',
+                       help='Gera as funções com laços em versões base, AVX2 e AVX-512, escolhidas '
+                            'em tempo de execução (// @multiversion marca uma função)')
+    pgo_group = parser.add_mutually_exclusive_group()
+    pgo_group.add_argument('--pgo-gen', action='store_true',
+                       help='Build instrumentado: cada execução anexa os contadores de chamadas e '
+                            'desvios a <fonte>.pgo.raw')
+    pgo_group.add_argument('--pgo-use', action='store_true',
+                       help='Junta as execuções instrumentadas em <fonte>.pgo e otimiza com o perfil '
+                            '(pesos dos desvios, funções quentes/frias, hot/cold splitting)')
+    pgo_group.add_argument('--pgo', action='store_true',
+                       help='PGO num comando só: execução de treino instrumentada (JIT), junção do '
+                            'perfil e build otimizado com ele')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                       help='Recompilação incremental: reaproveita o código otimizado das funções que não mudaram')
     
     args = parser.parse_args()
     
@@ -306,7 +493,22 @@ Exemplos de uso:
         no_compile=args.no_compile,
         debug=args.debug,
         optimization_level=opt_level,
-        show_optimize_stats=args.optimize_stats
+        show_optimize_stats=args.optimize_stats,
+        alloc_stats=args.alloc_stats,
+        jobs=args.jobs,
+        cache_dir=args.cache_dir,
+        show_callgraph=args.callgraph,
+        max_clones=args.max_clones,
+        memoize=args.memoize,
+        memo_stats=args.memo_stats,
+        eval_budget=args.eval_budget,
+        loop_remarks=args.loop_remarks,
+        fast_math=args.fast_math,
+        cpu=args.cpu,
+        multiversion=args.multiversion,
+        pgo_gen=args.pgo_gen,
+        pgo_use=args.pgo_use,
+        pgo=args.pgo
     )
     
     if success:
@@ -0,0 +1,250 @@
+# deadcode.py - Eliminação de código morto e de stores mortos sobre a AST
+
+from parser import (
+    Program, VarDecl, FuncDecl, ReturnStmt, IfStmt, Block, ExprStmt,
+    Identifier, Literal, Unary, Binary, Assign, Call, Node,
+    ArrayLiteral, WhileStmt, ForStmt, children
+)
+
+
+class DeadCodeEliminator:
+    """Remove da AST o que não pode afetar o resultado do programa.
+
+    - statements depois de um ``return`` no mesmo bloco (inclusive depois
+      de um ``if``/``else`` em que os dois ramos retornam); declarações de
+      função são mantidas, pois são içadas;
+    - variáveis que nunca são lidas: a declaração e todas as atribuições
+      a elas somem (se o valor tiver efeitos, só a expressão fica);
+    - stores sobrescritos pelo statement seguinte (``x = a; x = b;``)
+      quando ``b`` não lê ``x``;
+    - statements de expressão sem efeito.
+
+    Usa os símbolos do SemanticAnalyzer: só variáveis com ``symbol`` são
+    candidatas, e um identificador sem anotação (ex.: corpos analisados
+    em outro processo) mantém vivas todas as variáveis com o mesmo nome,
+    assim como variáveis do topo declaradas mais de uma vez (a global é a
+    mesma para todas as declarações). Repete até não haver mais mudanças,
+    pois remover um store pode matar outra variável.
+    """
+
+    def __init__(self):
+        self.report = {'unreachable': 0, 'dead_vars': 0, 'dead_stores': 0, 'removed': 0}
+
+    def eliminate(self, ast: Program):
+        names = [stmt.name.name for stmt in ast.statements if isinstance(stmt, VarDecl)]
+        self.redeclared = {name for name in names if names.count(name) > 1}
+        while True:
+            self.reads = {}
+            self.unresolved = set()
+            self.declared = []    # (Symbol, nome) das VarDecl anotadas
+            self._count_reads(ast)
+            self.dead = {symbol: name for symbol, name in self.declared
+                         if not self.reads.get(symbol) and name not in self.unresolved
+                         and name not in self.redeclared}
+            self.changed = False
+            ast.statements = self._eliminate_statements(ast.statements)
+            if not self.changed:
+                break
+        return self.report
+
+    def _drop(self, node):
+        """Contabiliza os nós removidos com ``node``. Só é preciso outra
+        iteração se o que saiu lia alguma variável, pois ela pode ter
+        ficado sem leituras."""
+        size, reads = _size_and_reads(node)
+        self.report['removed'] += size
+        if reads:
+            self.changed = True
+
+    # -------------------
+    # Uso das variáveis
+    # -------------------
+
+    def _count_reads(self, node):
+        if isinstance(node, Identifier):
+            symbol = getattr(node, 'symbol', None)
+            if symbol is None:
+                self.unresolved.add(node.name)
+            else:
+                self.reads[symbol] = self.reads.get(symbol, 0) + 1
+            return
+        if isinstance(node, Assign) and isinstance(node.left, Identifier):
+            self._count_reads(node.value)
+            return
+        if isinstance(node, VarDecl):
+            symbol = getattr(node, 'symbol', None)
+            if symbol is not None:
+                self.declared.append((symbol, node.name.name))
+            if node.initializer is not None:
+                self._count_reads(node.initializer)
+            return
+        if isinstance(node, FuncDecl):
+            self._count_reads(node.body)
+            return
+        if isinstance(node, Call):
+            for arg in node.args:
+                self._count_reads(arg)
+            if not isinstance(node.callee, Identifier):
+                self._count_reads(node.callee)
+            return
+        for item in children(node):
+            self._count_reads(item)
+
+    def _is_dead_target(self, assign):
+        return (isinstance(assign, Assign) and isinstance(assign.left, Identifier)
+                and getattr(assign, 'symbol', None) in self.dead)
+
+    # -------------------
+    # Statements
+    # -------------------
+
+    def _eliminate_statements(self, statements):
+        result = []
+        terminated = False
+        for index, stmt in enumerate(statements):
+            if terminated and not isinstance(stmt, FuncDecl):
+                self.report['unreachable'] += 1
+                self._drop(stmt)
+                continue
+            following = statements[index + 1] if index + 1 < len(statements) else None
+            if self._overwritten(stmt, following):
+                self.report['dead_stores'] += 1
+                self.report['removed'] += 2   # Assign + identificador de destino
+                stmt = ExprStmt(stmt.expr.value)
+            stmt = self._eliminate_statement(stmt)
+            if stmt is None:
+                continue
+            result.append(stmt)
+            terminated = terminated or _terminates(stmt)
+        return result
+
+    def _eliminate_statement(self, stmt):
+        """Retorna o statement simplificado, o que o substitui ou None (removido)."""
+        if isinstance(stmt, VarDecl):
+            if getattr(stmt, 'symbol', None) in self.dead:
+                self.report['dead_vars'] += 1
+                if stmt.initializer is None or _is_pure(stmt.initializer):
+                    self._drop(stmt)
+                    return None
+                # VarDecl + nome viram um ExprStmt: um nó a menos
+                self.report['removed'] += 1
+                return ExprStmt(self._eliminate_expression(stmt.initializer))
+            if stmt.initializer is not None:
+                stmt.initializer = self._eliminate_expression(stmt.initializer)
+        elif isinstance(stmt, ExprStmt):
+            stmt.expr = self._eliminate_expression(stmt.expr)
+            if _is_pure(stmt.expr):
+                self._drop(stmt)
+                return None
+        elif isinstance(stmt, FuncDecl):
+            stmt.body = self._eliminate_branch(stmt.body)
+        elif isinstance(stmt, ReturnStmt):
+            stmt.value = self._eliminate_expression(stmt.value)
+        elif isinstance(stmt, Block):
+            stmt.statements = self._eliminate_statements(stmt.statements)
+        elif isinstance(stmt, IfStmt):
+            stmt.condition = self._eliminate_expression(stmt.condition)
+            stmt.then_branch = self._eliminate_branch(stmt.then_branch)
+            if stmt.else_branch is not None:
+                stmt.else_branch = self._eliminate_statement(stmt.else_branch)
+        elif isinstance(stmt, WhileStmt):
+            stmt.condition = self._eliminate_expression(stmt.condition)
+            stmt.body = self._eliminate_branch(stmt.body)
+        elif isinstance(stmt, ForStmt):
+            stmt.init = self._eliminate_statement(stmt.init)
+            stmt.condition = self._eliminate_expression(stmt.condition)
+            stmt.increment = self._eliminate_expression(stmt.increment)
+            if stmt.increment is not None and _is_pure(stmt.increment):
+                self._drop(stmt.increment)
+                stmt.increment = None
+            stmt.body = self._eliminate_branch(stmt.body)
+        elif isinstance(stmt, Node):
+            return self._eliminate_expression(stmt)
+        return stmt
+
+    def _eliminate_branch(self, stmt):
+        """Corpo obrigatório (função, then, laço): nunca fica None"""
+        eliminated = self._eliminate_statement(stmt)
+        if eliminated is None:
+            self.report['removed'] -= 1
+            return Block([])
+        return eliminated
+
+    def _overwritten(self, stmt, following):
+        """``x = a;`` seguido de ``x = b;`` (b não lê x): o primeiro store é morto"""
+        if not (isinstance(stmt, ExprStmt) and isinstance(following, ExprStmt)):
+            return False
+        first, second = stmt.expr, following.expr
+        if not (isinstance(first, Assign) and isinstance(second, Assign)
+                and isinstance(first.left, Identifier) and isinstance(second.left, Identifier)):
+            return False
+        symbol = getattr(first, 'symbol', None)
+        if symbol is None or getattr(second, 'symbol', None) is not symbol:
+            return False
+        # Sem chamadas no segundo valor: uma função poderia ler a variável
+        return _is_pure(second.value) and not _reads_name(second.value, first.left.name)
+
+    # -------------------
+    # Expressões
+    # -------------------
+
+    def _eliminate_expression(self, expr):
+        if expr is None:
+            return None
+        if self._is_dead_target(expr):
+            self.report['dead_stores'] += 1
+            self.report['removed'] += 2   # Assign + identificador de destino
+            return self._eliminate_expression(expr.value)
+        for key, child in vars(expr).items():
+            if isinstance(child, list):
+                setattr(expr, key, [self._eliminate_expression(item) if isinstance(item, Node) else item
+                                    for item in child])
+            elif isinstance(child, Node) and not (isinstance(expr, Assign) and key == 'left'
+                                                  and isinstance(child, Identifier)):
+                setattr(expr, key, self._eliminate_expression(child))
+        return expr
+
+
+def _is_pure(expr):
+    """Expressão sem efeitos observáveis (chamadas, atribuições e indexação
+    são consideradas impuras)"""
+    if isinstance(expr, (Literal, Identifier)):
+        return True
+    if isinstance(expr, Binary):
+        return _is_pure(expr.left) and _is_pure(expr.right)
+    if isinstance(expr, Unary):
+        return _is_pure(expr.right)
+    if isinstance(expr, ArrayLiteral):
+        return all(_is_pure(element) for element in expr.elements)
+    return False
+
+
+def _size_and_reads(node):
+    """(número de nós da subárvore, se ela tem identificador com símbolo)"""
+    size, reads = 1, isinstance(node, Identifier) and getattr(node, 'symbol', None) is not None
+    for item in children(node):
+        child_size, child_reads = _size_and_reads(item)
+        size += child_size
+        reads = reads or child_reads
+    return size, reads
+
+
+def _reads_name(expr, name):
+    if isinstance(expr, Identifier):
+        return expr.name == name
+    for item in children(expr):
+        if _reads_name(item, name):
+            return True
+    return False
+
+
+def _terminates(stmt):
+    """O statement sempre sai da função (return em todos os caminhos)"""
+    if isinstance(stmt, ReturnStmt):
+        return True
+    if isinstance(stmt, Block):
+        return any(_terminates(child) for child in stmt.statements)
+    if isinstance(stmt, IfStmt):
+        return (stmt.else_branch is not None and _terminates(stmt.then_branch)
+                and _terminates(stmt.else_branch))
+    return False
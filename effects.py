@@ -0,0 +1,236 @@
+# effects.py - Análise de efeitos das funções (atributos LLVM)
+
+from parser import (
+    Program, VarDecl, FuncDecl, Identifier, Literal, Unary, Binary, Assign,
+    Call, Index, ArrayLiteral, WhileStmt, ForStmt, ReturnStmt, children
+)
+from callgraph import CallGraph
+from specialize import return_shape
+
+# Ordem dos efeitos sobre a memória: o de uma função é o maior entre o
+# do próprio corpo e o das funções que ela chama
+NONE, READ, WRITE = 0, 1, 2
+MEMORY_ATTRIBUTES = {NONE: 'readnone', READ: 'readonly'}
+
+# Nativas que só leem memória; as demais (print, push, concat...) escrevem
+READING_NATIVES = {"length"}
+
+
+class EffectAnalyzer:
+    """Deduz atributos LLVM de cada função a partir do grafo de chamadas.
+
+    Efeito local do corpo (sem as funções aninhadas, que são vértices
+    próprios do grafo):
+    - escreve: literais string e arrays (alocam na runtime), nativas
+      exceto ``length``, escrita em array, atribuição ou leitura de algo
+      que não é local nem global numérica, uso de função como valor;
+    - lê: globais numéricas, indexação e ``length``;
+    - nada: o resto (aritmética sobre parâmetros e locais).
+
+    Os efeitos são os da versão genérica, de parâmetros double (clones
+    com strings/arrays ficam só com os atributos de
+    specialize.POINTER_SAFE_ATTRIBUTES): uma função que não toca em
+    strings/arrays nem em globais não numéricas não acessa memória do
+    chamador. Uma global inicializada com a chamada de uma função do
+    usuário é numérica se o clone chamado retorna número (return_shape).
+    Os efeitos são fechados pelas SCCs do grafo (chamadas antes).
+    Resultado em ``func_decl.effects``:
+    - ``nounwind`` sempre (a linguagem não tem exceções);
+    - ``readnone``/``readonly`` conforme o efeito;
+    - ``norecurse`` fora de ciclos do grafo;
+    - ``willreturn`` sem laços nem recursão, sem escrita e só chamando
+      funções ``willreturn``.
+
+    Memoização: funções ``readnone`` com parâmetros (puras: o resultado só
+    depende dos argumentos double) recebem ``memoize = True`` se anotadas
+    com ``// @memo`` ou, com ``memoize``, se forem recursivas. Com
+    ``memoize`` ficam de fora as componentes cujas chamadas recursivas são
+    todas ``return f(...)``: a tabela impediria o ``musttail`` entre elas
+    (a recursão mútua em cauda voltaria a crescer a pilha) e só guardaria
+    os argumentos de entrada. A tabela de resultados é memória escrita a
+    cada chamada, então a função (e quem a chama) passa a ter efeito de
+    escrita.
+    """
+
+    def __init__(self, memoize=False):
+        self.memoize = memoize
+        self.report = {'readnone': 0, 'readonly': 0, 'norecurse': 0, 'willreturn': 0}
+        self.memoized = []        # funções memoizadas
+        self.memo_rejected = []   # anotadas com @memo, mas não puras
+
+    def analyze(self, ast: Program, call_graph: CallGraph = None):
+        graph = call_graph or CallGraph(ast)
+        self.numeric_globals = _numeric_globals(ast)
+        self.user_functions = {func.name.name for func in graph.functions.values()}
+        reachable = graph.reachable()
+        memory, willreturn = {}, {}
+        for component in graph.sccs():
+            recursive = len(component) > 1 or component[0] in graph.edges[component[0]]
+            callees = set().union(*(graph.edges[name] for name in component)) - set(component)
+            effect, loops = NONE, False
+            for name in component:
+                local_effect, has_loop = self._local_effect(graph.functions[name])
+                effect = max(effect, local_effect)
+                loops = loops or has_loop
+            effect = max([effect] + [memory[callee] for callee in callees])
+            effect = self._select_memoized(graph, component, recursive, effect)
+            returns = (not recursive and not loops and effect != WRITE
+                       and all(willreturn[callee] for callee in callees))
+            for name in component:
+                memory[name], willreturn[name] = effect, returns
+                attributes = ['nounwind']
+                if effect in MEMORY_ATTRIBUTES:
+                    attributes.append(MEMORY_ATTRIBUTES[effect])
+                if not recursive:
+                    attributes.append('norecurse')
+                if returns:
+                    attributes.append('willreturn')
+                if name in reachable:
+                    for attribute in attributes[1:]:
+                        self.report[attribute] += 1
+                graph.functions[name].effects = tuple(sorted(attributes))
+        return self.report
+
+    def _select_memoized(self, graph, component, recursive, effect):
+        """Marca as funções memoizadas da componente; retorna o efeito dela"""
+        memoized = False
+        automatic = (self.memoize and recursive
+                     and not all(_only_tail_calls(graph.functions[name].body, component)
+                                 for name in component))
+        for name in component:
+            func = graph.functions[name]
+            wanted = 'memo' in getattr(func, 'annotations', ()) or automatic
+            if not wanted:
+                continue
+            if effect == NONE and func.params:
+                func.memoize = memoized = True
+                self.memoized.append(name)
+            elif 'memo' in getattr(func, 'annotations', ()):
+                self.memo_rejected.append(name)
+        return WRITE if memoized else effect
+
+    # -------------------
+    # Efeito local
+    # -------------------
+
+    def _local_effect(self, func: FuncDecl):
+        """(efeito do corpo, tem laço?)"""
+        self.locals = {param.name for param in func.params}
+        self._collect_locals(func.body)
+        self.effect, self.loops = NONE, False
+        self._visit(func.body)
+        return self.effect, self.loops
+
+    def _collect_locals(self, node):
+        if isinstance(node, FuncDecl):
+            return  # Escopo de outra função
+        if isinstance(node, VarDecl):
+            self.locals.add(node.name.name)
+        for item in children(node):
+            self._collect_locals(item)
+
+    def _visit(self, node):
+        if isinstance(node, FuncDecl):
+            return
+        if isinstance(node, (WhileStmt, ForStmt)):
+            self.loops = True
+        elif isinstance(node, Literal):
+            if isinstance(node.value, str):
+                self.effect = WRITE
+        elif isinstance(node, ArrayLiteral):
+            self.effect = WRITE
+        elif isinstance(node, Index):
+            self.effect = max(self.effect, READ)
+        elif isinstance(node, Identifier):
+            self._use(node.name)
+        elif isinstance(node, Assign):
+            if isinstance(node.left, Identifier):
+                if node.left.name not in self.locals:
+                    self.effect = WRITE
+                self._visit(node.value)
+                return
+            self.effect = WRITE
+        elif isinstance(node, Call):
+            callee = node.callee
+            if not isinstance(callee, Identifier) or callee.name in self.locals:
+                self.effect = WRITE
+            elif callee.name not in self.user_functions:
+                # Nativa (a chamada de função do usuário é aresta do grafo)
+                self.effect = max(self.effect, READ if callee.name in READING_NATIVES else WRITE)
+            for arg in node.args:
+                self._visit(arg)
+            return
+        for item in children(node):
+            self._visit(item)
+
+    def _use(self, name):
+        if name in self.locals:
+            return
+        if name in self.numeric_globals:
+            self.effect = max(self.effect, READ)
+        else:
+            # Global string/array, variável de outra função ou função como valor
+            self.effect = WRITE
+
+
+def _only_tail_calls(node, component):
+    """As chamadas às funções de ``component`` no corpo (sem as funções
+    aninhadas) são todas ``return f(...)``"""
+    if isinstance(node, FuncDecl):
+        return True
+    if isinstance(node, ReturnStmt) and isinstance(node.value, Call):
+        node = node.value  # A chamada em cauda; os argumentos não são
+    elif isinstance(node, Call) and isinstance(node.callee, Identifier) and node.callee.name in component:
+        return False
+    return all(_only_tail_calls(item, component) for item in children(node))
+
+
+def _numeric_globals(ast: Program):
+    """Variáveis do topo que o codegen guarda como double/i1 (todas as
+    declarações do nome precisam ser numéricas)"""
+    shapes = {stmt.name.name: return_shape(stmt) for stmt in ast.statements
+              if isinstance(stmt, FuncDecl)}
+    numeric, other = set(), set()
+    for stmt in ast.statements:
+        if isinstance(stmt, VarDecl):
+            name = stmt.name.name
+            if stmt.initializer is None or _is_numeric(stmt.initializer, numeric, shapes):
+                numeric.add(name)
+            else:
+                other.add(name)
+    return numeric - other
+
+
+def _is_numeric(expr, numeric, shapes):
+    if isinstance(expr, Literal):
+        return not isinstance(expr.value, str)
+    if isinstance(expr, Identifier):
+        return expr.name in numeric
+    if isinstance(expr, Unary):
+        return True
+    if isinstance(expr, Binary):
+        if expr.operator == '+':
+            return _is_numeric(expr.left, numeric, shapes) and _is_numeric(expr.right, numeric, shapes)
+        return True
+    if isinstance(expr, Index):
+        return True
+    if isinstance(expr, Call):
+        name = expr.callee.name if isinstance(expr.callee, Identifier) else None
+        if name in shapes:
+            # O clone chamado retorna o tipo dos argumentos que repassa
+            return all(_is_numeric_kind(kind, expr.args, numeric, shapes) for kind in shapes[name])
+        # Das nativas, só estas retornam strings
+        return name not in ("input", "concat")
+    if isinstance(expr, Assign):
+        return _is_numeric(expr.value, numeric, shapes)
+    return False
+
+
+def _is_numeric_kind(kind, args, numeric, shapes):
+    """Se um tipo de return_shape é número na chamada com ``args``"""
+    if not isinstance(kind, tuple):
+        return kind in ('double', 'bool')
+    if kind[0] == 'param':
+        return kind[1] >= len(args) or _is_numeric(args[kind[1]], numeric, shapes)
+    return (_is_numeric_kind(kind[1], args, numeric, shapes)
+            and _is_numeric_kind(kind[2], args, numeric, shapes))
@@ -0,0 +1,243 @@
+# escape.py - Análise de escape sobre a AST
+
+from parser import (
+    Program, VarDecl, FuncDecl, ReturnStmt, IfStmt, Block, ExprStmt,
+    Identifier, Literal, Unary, Binary, Assign, Call, Index, Node,
+    ArrayLiteral, WhileStmt, ForStmt, children
+)
+
+# Funções nativas que não guardam referência aos argumentos
+# ('concat' é tratada à parte: o resultado pode ser um dos operandos)
+NON_CAPTURING_NATIVES = {"print", "println", "length", "push", "pop", "toNumber"}
+
+# Arrays literais até este tamanho podem ir para a pilha
+MAX_STACK_ARRAY_ELEMENTS = 16
+
+
+class EscapeAnalyzer:
+    """Marca os pontos de alocação de cada função que não escapam dela.
+
+    Pontos de alocação: ``ArrayLiteral``, ``Binary('+')`` (concatenação de
+    strings) e ``concat(...)``. Um valor escapa quando é retornado,
+    atribuído a uma variável que não é local da função ou passado para
+    uma chamada que pode guardá-lo. A análise é insensível ao fluxo e
+    agrupa variáveis locais pelo nome (sombreamento só torna o resultado
+    mais conservador).
+
+    Cada ponto recebe ``escapes`` (True/False); arrays literais pequenos,
+    fora de laços e que não escapam recebem também ``stack = True``.
+    O código no topo do programa não é analisado (fica no heap).
+    """
+
+    def __init__(self):
+        # Relatório: nome da função -> {'stack': n, 'arena': n, 'heap': n}
+        self.report = {}
+
+    def analyze(self, ast: Program):
+        for stmt in ast.statements:
+            self._visit_functions(stmt)
+        return self.report
+
+    def _visit_functions(self, node):
+        """Encontra declarações de função (inclusive aninhadas)."""
+        if isinstance(node, FuncDecl):
+            self._analyze_function(node)
+        for child in children(node):
+            self._visit_functions(child)
+
+    # -------------------
+    # Análise de uma função
+    # -------------------
+
+    def _analyze_function(self, func: FuncDecl):
+        self.locals = {param.name for param in func.params}
+        self._collect_locals(func.body)
+        self.params = {param.name for param in func.params}
+        self.string_vars = self._collect_string_vars(func.body)
+
+        self.sites = []          # (nó, dentro_de_laço)
+        self.flows = {}          # variável local -> conjunto de fontes atribuídas
+        self.escaping = set()    # fontes que escapam diretamente
+        self.loop_depth = 0
+
+        self._visit(func.body)
+        escaped = self._propagate()
+
+        counts = {'stack': 0, 'arena': 0, 'heap': 0}
+        for site, in_loop in self.sites:
+            site.escapes = site in escaped
+            site.stack = (not site.escapes and not in_loop
+                          and isinstance(site, ArrayLiteral)
+                          and len(site.elements) <= MAX_STACK_ARRAY_ELEMENTS)
+            if site.escapes:
+                counts['heap'] += 1
+            elif site.stack:
+                counts['stack'] += 1
+            else:
+                counts['arena'] += 1
+        self.report[func.name.name] = counts
+
+    def _collect_locals(self, node):
+        if isinstance(node, FuncDecl):
+            return  # Escopo de outra função
+        if isinstance(node, VarDecl):
+            self.locals.add(node.name.name)
+        for child in children(node):
+            self._collect_locals(child)
+
+    def _collect_string_vars(self, body):
+        """Variáveis locais que podem guardar strings (ponto fixo)."""
+        assignments = []
+        self._collect_assignments(body, assignments)
+        string_vars = set()
+        changed = True
+        while changed:
+            changed = False
+            for name, value in assignments:
+                if name not in string_vars and self._may_be_string(value, string_vars):
+                    string_vars.add(name)
+                    changed = True
+        return string_vars
+
+    def _collect_assignments(self, node, out):
+        if isinstance(node, FuncDecl):
+            return
+        if isinstance(node, VarDecl) and node.initializer is not None:
+            out.append((node.name.name, node.initializer))
+        elif isinstance(node, Assign) and isinstance(node.left, Identifier):
+            out.append((node.left.name, node.value))
+        for child in children(node):
+            self._collect_assignments(child, out)
+
+    def _may_be_string(self, expr, string_vars):
+        """Parâmetros contam de propósito como fontes que não alocam: com
+        clones (strings/arrays nos parâmetros) uma concatenação só de
+        parâmetros fica sem marca e vai para o heap, o destino padrão.
+        Variáveis globais são tratadas de forma conservadora."""
+        if isinstance(expr, Literal):
+            return isinstance(expr.value, str)
+        if isinstance(expr, Identifier):
+            if expr.name in self.params:
+                return False
+            return expr.name not in self.locals or expr.name in string_vars
+        if isinstance(expr, Binary):
+            return expr.operator == '+' and (self._may_be_string(expr.left, string_vars)
+                                             or self._may_be_string(expr.right, string_vars))
+        if isinstance(expr, Assign):
+            return self._may_be_string(expr.value, string_vars)
+        if isinstance(expr, Call):
+            return isinstance(expr.callee, Identifier) and expr.callee.name == "concat"
+        return False
+
+    def _propagate(self):
+        """Fecha o conjunto de fontes que escapam seguindo as atribuições."""
+        escaped = set()
+        worklist = list(self.escaping)
+        while worklist:
+            source = worklist.pop()
+            if source in escaped:
+                continue
+            escaped.add(source)
+            if isinstance(source, str):  # Variável local: tudo que foi atribuído a ela escapa
+                worklist.extend(self.flows.get(source, ()))
+        return {source for source in escaped if isinstance(source, Node)}
+
+    def _escape(self, sources):
+        self.escaping.update(sources)
+
+    def _assign_to(self, name, sources):
+        if name in self.locals:
+            self.flows.setdefault(name, set()).update(sources)
+        else:
+            self._escape(sources)
+
+    # -------------------
+    # Statements
+    # -------------------
+
+    def _visit(self, node):
+        if node is None or isinstance(node, FuncDecl):
+            return
+        if isinstance(node, VarDecl):
+            if node.initializer is not None:
+                self._assign_to(node.name.name, self._sources(node.initializer))
+        elif isinstance(node, ReturnStmt):
+            if node.value is not None:
+                self._escape(self._sources(node.value))
+        elif isinstance(node, ExprStmt):
+            self._sources(node.expr)
+        elif isinstance(node, IfStmt):
+            self._sources(node.condition)
+            self._visit(node.then_branch)
+            self._visit(node.else_branch)
+        elif isinstance(node, (WhileStmt, ForStmt)):
+            self.loop_depth += 1
+            if isinstance(node, ForStmt):
+                self._visit(node.init)
+                self._sources(node.increment)
+            self._sources(node.condition)
+            self._visit(node.body)
+            self.loop_depth -= 1
+        elif isinstance(node, Block):
+            for stmt in node.statements:
+                self._visit(stmt)
+        else:
+            self._sources(node)
+
+    # -------------------
+    # Expressões
+    # -------------------
+
+    def _site(self, node):
+        self.sites.append((node, self.loop_depth > 0))
+        return {node}
+
+    def _sources(self, expr):
+        """Retorna as fontes (pontos de alocação/variáveis locais) que o valor pode ter."""
+        if expr is None:
+            return set()
+        if isinstance(expr, ArrayLiteral):
+            for element in expr.elements:
+                self._escape(self._sources(element))
+            return self._site(expr)
+        if isinstance(expr, Identifier):
+            return {expr.name} if expr.name in self.locals else set()
+        if isinstance(expr, Binary):
+            left = self._sources(expr.left)
+            right = self._sources(expr.right)
+            if expr.operator == '+' and self._may_be_string(expr, self.string_vars):
+                # Concatenação pode devolver um dos operandos
+                return self._site(expr) | left | right
+            return set()
+        if isinstance(expr, Unary):
+            self._sources(expr.right)
+            return set()
+        if isinstance(expr, Assign):
+            value = self._sources(expr.value)
+            if isinstance(expr.left, Identifier):
+                self._assign_to(expr.left.name, value)
+            else:
+                self._sources(expr.left)
+                self._escape(value)
+            return value
+        if isinstance(expr, Index):
+            self._sources(expr.collection)
+            self._sources(expr.index)
+            return set()
+        if isinstance(expr, Call):
+            return self._call_sources(expr)
+        return set()
+
+    def _call_sources(self, call: Call):
+        callee = call.callee.name if isinstance(call.callee, Identifier) else None
+        arg_sources = [self._sources(arg) for arg in call.args]
+        if callee == "concat" and callee not in self.locals:
+            result = self._site(call)
+            for sources in arg_sources:
+                result |= sources
+            return result
+        if callee not in NON_CAPTURING_NATIVES or callee in self.locals:
+            # Chamada de função do usuário/desconhecida: pode guardar os argumentos
+            for sources in arg_sources:
+                self._escape(sources)
+        return set()
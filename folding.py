@@ -0,0 +1,254 @@
+# folding.py - Dobramento e propagação de constantes sobre a AST
+
+import math
+
+from parser import (
+    Program, VarDecl, FuncDecl, ReturnStmt, IfStmt, Block, ExprStmt,
+    Identifier, Literal, Unary, Binary, Assign, Call, Index, Node,
+    ArrayLiteral, WhileStmt, ForStmt, children
+)
+
+ARITHMETIC = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+    '%': math.fmod,           # frem: sinal do dividendo, como em C
+}
+
+COMPARISONS = {
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+# Resultado de uma avaliação que não pode ser feita em tempo de compilação
+NOT_CONSTANT = object()
+
+
+class ConstantFolder:
+    """Dobra expressões constantes da AST entre a análise semântica e o codegen.
+
+    - aritmética, comparações e ``&&``/``||`` entre números e booleanos,
+      com a semântica do codegen (doubles, comparações ``unordered``, os
+      dois lados de ``&&``/``||`` sempre avaliados);
+    - concatenação e igualdade de literais string;
+    - propagação de ``const`` (e de ``var``/``let`` nunca reatribuídas)
+      cujo inicializador dobra para um literal, pelos símbolos do
+      SemanticAnalyzer (nós sem símbolo não são propagados);
+    - poda de ``IfStmt``/``WhileStmt`` com condição constante.
+
+    ``report`` conta expressões dobradas, usos propagados, desvios
+    podados e o total de nós removidos da AST.
+    """
+
+    def __init__(self):
+        self.constants = {}   # Symbol -> valor do literal
+        self.report = {'folded': 0, 'propagated': 0, 'pruned': 0, 'removed': 0}
+
+    def fold(self, ast: Program):
+        self.assigned = set()
+        self.declarations = {}
+        self._collect_writes(ast)
+        ast.statements = self._fold_statements(ast.statements)
+        return self.report
+
+    def _collect_writes(self, node):
+        """Nomes reatribuídos e número de declarações de cada nome (por nome:
+        corpos sem anotação também contam)."""
+        if isinstance(node, Assign) and isinstance(node.left, Identifier):
+            self.assigned.add(node.left.name)
+        elif isinstance(node, VarDecl):
+            name = node.name.name
+            self.declarations[name] = self.declarations.get(name, 0) + 1
+        for item in children(node):
+            self._collect_writes(item)
+
+    # -------------------
+    # Statements
+    # -------------------
+
+    def _fold_statements(self, statements):
+        folded = []
+        for stmt in statements:
+            stmt = self._fold_statement(stmt)
+            if stmt is not None:
+                folded.append(stmt)
+        return folded
+
+    def _fold_statement(self, stmt):
+        """Retorna o statement dobrado, o que o substitui ou None (removido)."""
+        if isinstance(stmt, VarDecl):
+            if stmt.initializer is not None:
+                stmt.initializer = self._fold_initializer(stmt.initializer)
+                self._record_constant(stmt)
+        elif isinstance(stmt, FuncDecl):
+            stmt.body = self._fold_branch(stmt.body)
+        elif isinstance(stmt, ReturnStmt):
+            stmt.value = self._fold_expression(stmt.value)
+        elif isinstance(stmt, ExprStmt):
+            stmt.expr = self._fold_expression(stmt.expr)
+        elif isinstance(stmt, Block):
+            stmt.statements = self._fold_statements(stmt.statements)
+        elif isinstance(stmt, IfStmt):
+            stmt.condition = self._fold_expression(stmt.condition)
+            truth = self._condition_truth(stmt.condition)
+            if truth is not None:
+                self.report['pruned'] += 1
+                # Somem o IfStmt, a condição e o ramo descartado
+                dropped = stmt.else_branch if truth else stmt.then_branch
+                self.report['removed'] += 1 + count_nodes(stmt.condition)
+                if dropped is not None:
+                    self.report['removed'] += count_nodes(dropped)
+                return self._fold_statement(stmt.then_branch if truth else stmt.else_branch)
+            stmt.then_branch = self._fold_branch(stmt.then_branch)
+            if stmt.else_branch is not None:
+                stmt.else_branch = self._fold_statement(stmt.else_branch)
+        elif isinstance(stmt, WhileStmt):
+            stmt.condition = self._fold_expression(stmt.condition)
+            if self._condition_truth(stmt.condition) is False:
+                self.report['pruned'] += 1
+                self.report['removed'] += count_nodes(stmt)
+                return None
+            stmt.body = self._fold_branch(stmt.body)
+        elif isinstance(stmt, ForStmt):
+            stmt.init = self._fold_statement(stmt.init)
+            stmt.condition = self._fold_expression(stmt.condition)
+            stmt.increment = self._fold_expression(stmt.increment)
+            stmt.body = self._fold_branch(stmt.body)
+        elif isinstance(stmt, Node):
+            return self._fold_expression(stmt)
+        return stmt
+
+    def _fold_branch(self, stmt):
+        """Corpo obrigatório (função, then, laço): nunca fica None"""
+        folded = self._fold_statement(stmt)
+        if folded is None:
+            self.report['removed'] -= 1
+            return Block([])
+        return folded
+
+    def _fold_initializer(self, expr):
+        folded = self._fold_expression(expr)
+        if (isinstance(folded, Literal) and isinstance(folded.value, bool)
+                and not isinstance(expr, Literal)):
+            # Um literal booleano mudaria o tipo da variável no codegen
+            # (i1 em vez de double); mantém a expressão
+            self.report['propagated' if isinstance(expr, Identifier) else 'folded'] -= 1
+            self.report['removed'] -= count_nodes(expr) - 1
+            return expr
+        return folded
+
+    def _record_constant(self, var_decl):
+        symbol = getattr(var_decl, 'symbol', None)
+        if symbol is None or not isinstance(var_decl.initializer, Literal):
+            return
+        name = var_decl.name.name
+        if var_decl.kind == 'const' or (name not in self.assigned
+                                        and self.declarations.get(name) == 1):
+            self.constants[symbol] = var_decl.initializer.value
+
+    # -------------------
+    # Expressões
+    # -------------------
+
+    def _fold_expression(self, expr):
+        if isinstance(expr, Identifier):
+            symbol = getattr(expr, 'symbol', None)
+            if symbol is not None and symbol in self.constants:
+                self.report['propagated'] += 1
+                return Literal(self.constants[symbol])
+        elif isinstance(expr, Binary):
+            expr.left = self._fold_expression(expr.left)
+            expr.right = self._fold_expression(expr.right)
+            if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+                value = evaluate_binary(expr.operator, expr.left.value, expr.right.value)
+                if value is not NOT_CONSTANT:
+                    self.report['folded'] += 1
+                    self.report['removed'] += 2
+                    return Literal(value)
+        elif isinstance(expr, Unary):
+            expr.right = self._fold_expression(expr.right)
+            if isinstance(expr.right, Literal):
+                value = evaluate_unary(expr.operator, expr.right.value)
+                if value is not NOT_CONSTANT:
+                    self.report['folded'] += 1
+                    self.report['removed'] += 1
+                    return Literal(value)
+        elif isinstance(expr, Assign):
+            if isinstance(expr.left, Index):
+                expr.left.collection = self._fold_expression(expr.left.collection)
+                expr.left.index = self._fold_expression(expr.left.index)
+            expr.value = self._fold_expression(expr.value)
+        elif isinstance(expr, Call):
+            expr.args = [self._fold_expression(arg) for arg in expr.args]
+        elif isinstance(expr, Index):
+            expr.collection = self._fold_expression(expr.collection)
+            expr.index = self._fold_expression(expr.index)
+        elif isinstance(expr, ArrayLiteral):
+            expr.elements = [self._fold_expression(element) for element in expr.elements]
+        return expr
+
+    @staticmethod
+    def _condition_truth(expr):
+        """Valor de verdade (como no codegen) de uma condição constante, ou None"""
+        if isinstance(expr, Literal) and is_number(expr.value):
+            return truth(float(expr.value))
+        return None
+
+
+def evaluate_binary(operator, left, right):
+    """Avalia ``left operator right`` como o codegen (ou NOT_CONSTANT)"""
+    if isinstance(left, str) and isinstance(right, str):
+        if operator == '+':
+            return left + right
+        if operator in ('==', '!='):
+            return (left == right) == (operator == '==')
+        return NOT_CONSTANT
+    if not (is_number(left) and is_number(right)):
+        return NOT_CONSTANT
+    a, b = float(left), float(right)
+    if operator in ARITHMETIC:
+        try:
+            value = ARITHMETIC[operator](a, b)
+        except (ZeroDivisionError, ValueError):
+            return NOT_CONSTANT
+        return value if math.isfinite(value) else NOT_CONSTANT
+    if operator in COMPARISONS:
+        # fcmp unordered: qualquer comparação com NaN é verdadeira
+        return math.isnan(a) or math.isnan(b) or COMPARISONS[operator](a, b)
+    if operator == '&&':
+        return truth(a) and truth(b)
+    if operator == '||':
+        return truth(a) or truth(b)
+    return NOT_CONSTANT
+
+
+def evaluate_unary(operator, operand):
+    if operator == '-' and is_number(operand) and not isinstance(operand, bool):
+        return -float(operand)
+    if operator == '!' and isinstance(operand, bool):
+        return not operand
+    if operator == '!' and is_number(operand):
+        value = float(operand)
+        return math.isnan(value) or value == 0
+    return NOT_CONSTANT
+
+
+def count_nodes(node):
+    count = 1
+    for item in children(node):
+        count += count_nodes(item)
+    return count
+
+
+def is_number(value):
+    return isinstance(value, (int, float))
+
+
+def truth(value):
+    # fcmp une != 0: NaN conta como verdadeiro
+    return value != 0 or math.isnan(value)
@@ -0,0 +1,113 @@
+# incremental.py - Cache por função para recompilação incremental
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from parser import Node, FuncDecl, Identifier, children
+
+# Arquivos cujo conteúdo entra na impressão digital: mudar o gerador
+# de código (ou a runtime) invalida o cache inteiro
+_COMPILER_SOURCES = ("codegen.py", "runtime.py", "escape.py", "parser.py", "pgo.py", "specialize.py",
+                     "loophints.py")
+
+# Anotações que não mudam o código gerado (ou não são valores simples)
+_IGNORED_ATTRIBUTES = {"symbol", "slot_count"}
+
+
+class FunctionCache:
+    """Guarda o bitcode otimizado de cada função do topo em ``directory``.
+
+    A chave de uma função é o hash de:
+      - sua AST (incluindo anotações da análise de escape);
+      - as assinaturas dos nomes do topo que ela referencia (aridade das
+        funções chamadas);
+      - as opções de geração (nível de otimização, instrumentação);
+      - o código-fonte do próprio compilador.
+
+    Numa recompilação só as funções cuja chave mudou são geradas de novo;
+    as demais são lidas do disco e ligadas ao módulo da main.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._compiler_digest = _compiler_digest()
+
+    def fingerprint(self, func_decl: FuncDecl, signatures, options):
+        hasher = hashlib.sha256(self._compiler_digest)
+        hasher.update(repr(options).encode())
+        parts, names = [], set()
+        _serialize_node(func_decl, parts, names)
+        hasher.update("".join(parts).encode())
+        for name in sorted(names):
+            if name in signatures:
+                hasher.update(f"\x00{name}:{signatures[name]}".encode())
+        return hasher.hexdigest()
+
+    def load(self, key):
+        try:
+            data = (self.directory / f"{key}.bc").read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def store(self, key, bitcode):
+        # Escrita atômica: builds concorrentes nunca leem um arquivo pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(bitcode)
+        os.replace(tmp_path, self.directory / f"{key}.bc")
+
+
+def _compiler_digest():
+    hasher = hashlib.sha256()
+    base = Path(__file__).resolve().parent
+    for name in _COMPILER_SOURCES:
+        hasher.update((base / name).read_bytes())
+    return hasher.digest()
+
+
+def _serialize_node(node, out, names):
+    out.append(type(node).__name__)
+    if isinstance(node, Identifier):
+        names.add(node.name)
+    for key, value in vars(node).items():
+        if key in _IGNORED_ATTRIBUTES:
+            continue
+        out.append(f"({key}")
+        _serialize_value(value, out, names)
+        out.append(")")
+
+
+def _serialize_value(value, out, names):
+    if isinstance(value, Node):
+        _serialize_node(value, out, names)
+    elif isinstance(value, list):
+        out.append("[")
+        for item in value:
+            _serialize_value(item, out, names)
+            out.append(",")
+        out.append("]")
+    elif value is None or isinstance(value, (str, int, float, bool)):
+        out.append(f"{type(value).__name__}:{value!r}")
+    else:
+        # Tokens e enums: o repr identifica o valor
+        out.append(repr(value))
+
+
+def referenced_names(node):
+    """Nomes de todos os identificadores usados na subárvore."""
+    names = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, Identifier):
+            names.add(current.name)
+        stack.extend(children(current))
+    return names
@@ -76,8 +76,14 @@ class Lexer:
             if self._peek_char() == '/':  # Verifica se é //
                 self._read_char()         # Consome o primeiro '/'
                 self._read_char()         # Consome o segundo '/'
+                start = self.position
                 self._skip_comment()      # Pula o restante da linha
-                return self.next_token()  # Reinicia o ciclo para buscar o próximo token VÁLIDO
+                text = self.source[start:self.position].strip()
+                token = self.next_token() # Reinicia o ciclo para buscar o próximo token VÁLIDO
+                # Anotação (// @memo): vai junto com o próximo token
+                if text.startswith('@') and len(text) > 1:
+                    token.annotations = (text[1:].split()[0],) + getattr(token, 'annotations', ())
+                return token
             else:
                 token = Token(TokenType.SLASH, '/')
         elif self.ch == '%':
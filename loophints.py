@@ -0,0 +1,127 @@
+# loophints.py - Dicas de laço (// @unroll(4), // @vectorize) e metadados llvm.loop
+
+import re
+
+# Nó de metadado que identifica o laço no IR: !{!"js.loop.hints", !"f#1", !"unroll(4)"}.
+# O LLVM copia atributos desconhecidos para os laços que deriva do original
+# (corpo vetorizado, resto escalar, cópias desenroladas)
+LOOP_HINTS_TAG = "js.loop.hints"
+
+# Dicas aceitas -> recebe argumento (inteiro positivo)?
+LOOP_HINTS = {
+    'unroll': True,
+    'nounroll': False,
+    'vectorize': True,
+    'novectorize': False,
+}
+
+_HINT_PATTERN = re.compile(r'^([a-z]+)(?:\((\d+)\))?$')
+
+
+def parse_loop_hints(annotations):
+    """([(dica, argumento ou None)], [anotações inválidas]) das anotações de
+    um laço. ``@unroll``/``@vectorize`` sem argumento deixam o fator com o
+    LLVM; anotações que não são de laço (``@memo``) são inválidas aqui."""
+    hints, rejected = [], []
+    for annotation in annotations:
+        match = _HINT_PATTERN.match(annotation)
+        name = match.group(1) if match else None
+        argument = match.group(2) if match else None
+        if name not in LOOP_HINTS or (argument is not None and
+                                      (not LOOP_HINTS[name] or int(argument) == 0)):
+            rejected.append(annotation)
+            continue
+        hints.append((name, int(argument) if argument is not None else None))
+    return hints, rejected
+
+
+def hint_text(hint):
+    name, argument = hint
+    return name if argument is None else f"{name}({argument})"
+
+
+def hint_attributes(hint):
+    """Atributos ``llvm.loop.*`` da dica: [(nome, valor i32/i1 ou None)]"""
+    name, argument = hint
+    if name == 'unroll':
+        if argument is None:
+            return [("llvm.loop.unroll.enable", None)]
+        return [("llvm.loop.unroll.count", ('i32', argument))]
+    if name == 'nounroll':
+        return [("llvm.loop.unroll.disable", None)]
+    if name == 'vectorize':
+        attributes = [("llvm.loop.vectorize.enable", ('i1', 1))]
+        if argument is not None:
+            attributes.append(("llvm.loop.vectorize.width", ('i32', argument)))
+        return attributes
+    return [("llvm.loop.vectorize.enable", ('i1', 0))]
+
+
+def loop_remarks(optimized_ir, hinted_loops):
+    """[(laço, dica, aplicada?)] de cada dica, olhando os metadados dos laços
+    no IR já otimizado (``hinted_loops``: laço -> dicas, de ``hinted_loops``
+    no IR original).
+
+    - ``unroll``: os passes de desenrolar apagam ``unroll.count``/``enable``
+      do laço que desenrolaram (ou o laço some, desenrolado por completo);
+    - ``vectorize``: o vetorizador marca ``llvm.loop.isvectorized``;
+    - ``nounroll``/``novectorize``: nenhuma cópia do laço foi vetorizada ou
+      perdeu ``unroll.disable``.
+    """
+    copies = _tagged_loops(optimized_ir)
+    remarks = []
+    for label, hints in hinted_loops.items():
+        attributes = copies.get(label, [])
+        for hint in hints:
+            name = _HINT_PATTERN.match(hint).group(1)
+            if name == 'unroll':
+                honored = not any({"llvm.loop.unroll.count", "llvm.loop.unroll.enable"} & loop
+                                  for loop in attributes)
+            elif name == 'nounroll':
+                honored = all("llvm.loop.unroll.disable" in loop for loop in attributes)
+            elif name == 'vectorize':
+                honored = any("llvm.loop.isvectorized" in loop for loop in attributes)
+            else:
+                honored = not any("llvm.loop.isvectorized" in loop for loop in attributes)
+            remarks.append((label, hint, honored))
+    return remarks
+
+
+def hinted_loops(module_ir):
+    """Laço -> dicas, dos nós ``js.loop.hints`` do IR"""
+    loops = {}
+    for operands in _metadata_nodes(module_ir).values():
+        if operands and operands[0] == LOOP_HINTS_TAG:
+            loops[operands[1]] = operands[2:]
+    return loops
+
+
+def _tagged_loops(module_ir):
+    """Laço -> [atributos de cada cópia do laço no IR]"""
+    nodes = _metadata_nodes(module_ir)
+    copies = {}
+    for node, operands in nodes.items():
+        if not operands or operands[0] != node:
+            continue   # Não é um ID de laço (que aponta para si mesmo)
+        attributes = {nodes[operand][0] for operand in operands[1:]
+                      if operand in nodes and nodes[operand]}
+        labels = [nodes[operand][1] for operand in operands[1:]
+                  if nodes.get(operand, [None])[0] == LOOP_HINTS_TAG]
+        for label in labels:
+            copies.setdefault(label, []).append(attributes)
+    return copies
+
+
+_METADATA_LINE = re.compile(r'^(![0-9]+) = (?:distinct )?!\{(.*)\}\s*$')
+_METADATA_OPERAND = re.compile(r'!"([^"]*)"|(![0-9]+)')
+
+
+def _metadata_nodes(module_ir):
+    """``!N`` -> operandos (strings e referências ``!M``, sem os inteiros)"""
+    nodes = {}
+    for line in module_ir.splitlines():
+        match = _METADATA_LINE.match(line)
+        if match:
+            nodes[match.group(1)] = [string or reference for string, reference
+                                     in _METADATA_OPERAND.findall(match.group(2))]
+    return nodes
@@ -8,19 +8,32 @@ from lexer import Lexer
 class Node:
     pass
 
+def children(node):
+    """Nós filhos de ``node``, na ordem dos campos (uma lista: bem mais
+    barata que um gerador nos percursos da AST inteira)"""
+    items = []
+    for value in vars(node).values():
+        if isinstance(value, list):
+            items.extend([item for item in value if isinstance(item, Node)])
+        elif isinstance(value, Node):
+            items.append(value)
+    return items
+
 class WhileStmt(Node):
-    def __init__(self, condition, body):
+    def __init__(self, condition, body, annotations=()):
         self.condition = condition
         self.body = body
+        self.annotations = annotations  # Dicas de laço ("// @unroll(4)")
     def __repr__(self):
         return f"While({self.condition}, {self.body})"
 
 class ForStmt(Node):
-    def __init__(self, init, condition, increment, body):
+    def __init__(self, init, condition, increment, body, annotations=()):
         self.init = init
         self.condition = condition
         self.increment = increment
         self.body = body
+        self.annotations = annotations  # Dicas de laço ("// @unroll(4)")
     def __repr__(self):
         return f"For({self.init}, {self.condition}, {self.increment}, {self.body})"
 
@@ -39,10 +52,11 @@ class VarDecl(Node):
         return f"VarDecl({self.kind}, {self.name}, {self.initializer})"
 
 class FuncDecl(Node):
-    def __init__(self, name, params, body):
+    def __init__(self, name, params, body, annotations=()):
         self.name = name
         self.params = params
         self.body = body  # Block
+        self.annotations = annotations  # Comentários "// @nome" logo antes
     def __repr__(self):
         return f"FuncDecl({self.name}, {self.params}, {self.body})"
 
@@ -243,6 +257,7 @@ class Parser:
 
     def _parse_func_decl(self):
         # cur == FUNCTION
+        annotations = getattr(self.cur, 'annotations', ())
         if not self.expect_peek(TokenType.IDENT): # cur <- IDENT
             self._synchronize()
             return None
@@ -287,7 +302,7 @@ class Parser:
         # parse body statements until RBRACE (cur já está no LBRACE)
         body = self._parse_block_body()
         
-        return FuncDecl(name, params, body)
+        return FuncDecl(name, params, body, annotations)
 
     def _parse_return(self):
         # cur == RETURN
@@ -332,6 +347,7 @@ class Parser:
 
     def _parse_while(self):
         # cur == WHILE
+        annotations = getattr(self.cur, 'annotations', ())
         if not self.expect_peek(TokenType.LPAREN):
             self._synchronize()
             return None
@@ -346,10 +362,11 @@ class Parser:
         self._next_token() # vai para o início do corpo
         body = self.parse_statement()
         
-        return WhileStmt(condition, body)
+        return WhileStmt(condition, body, annotations)
 
     def _parse_for(self):
         # cur == FOR
+        annotations = getattr(self.cur, 'annotations', ())
         if not self.expect_peek(TokenType.LPAREN):
             self._synchronize()
             return None
@@ -397,7 +414,7 @@ class Parser:
         
         body = self.parse_statement()
         
-        return ForStmt(init, condition, increment, body)
+        return ForStmt(init, condition, increment, body, annotations)
         # cur == FOR
         if not self.expect_peek(TokenType.LPAREN):
             self._synchronize()
@@ -450,7 +467,7 @@ class Parser:
         
         body = self.parse_statement()
         
-        return ForStmt(init, condition, increment, body)
+        return ForStmt(init, condition, increment, body, annotations)
 
     def _parse_block(self):
         # cur == LBRACE
@@ -0,0 +1,211 @@
+# partial.py - Avaliação parcial: chamadas puras com argumentos constantes
+
+from parser import (
+    Program, VarDecl, FuncDecl, ReturnStmt, IfStmt, Block, ExprStmt,
+    Identifier, Literal, Unary, Binary, Assign, Call, Node, WhileStmt, ForStmt, children
+)
+from folding import evaluate_binary, evaluate_unary, NOT_CONSTANT, is_number, truth
+
+# Passos (statements e expressões avaliados) disponíveis para o programa todo
+EVAL_BUDGET = 200_000
+
+# Passos de uma única chamada do topo (uma que não termina não esgota o total)
+MAX_CALL_STEPS = 20_000
+
+# Profundidade máxima de chamadas aninhadas durante a avaliação
+MAX_EVAL_DEPTH = 64
+
+
+class _Abort(Exception):
+    """A chamada não pode ser avaliada em tempo de compilação"""
+
+
+class _Return(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+class PartialEvaluator:
+    """Executa em tempo de compilação as chamadas a funções puras com
+    argumentos numéricos constantes e as troca pelo ``Literal`` do resultado.
+
+    Puras são as funções ``readnone`` do EffectAnalyzer (o resultado só
+    depende dos argumentos). O corpo é interpretado sobre a AST com a
+    semântica do codegen: doubles, condições ``!= 0`` unordered, variáveis
+    iniciadas com literal booleano guardadas como i1. Qualquer coisa fora
+    disso (strings, arrays, funções aninhadas, resultado não finito,
+    chamada sem símbolo) desiste da chamada, que fica como está.
+
+    Cada statement ou expressão avaliado gasta um passo de ``budget``,
+    compartilhado pelo programa todo (no máximo ``MAX_CALL_STEPS`` por
+    chamada); tentativas que desistem também gastam. ``report``: chamadas dobradas, passos gastos nelas e
+    tentativas abandonadas.
+    """
+
+    def __init__(self, budget=EVAL_BUDGET):
+        self.budget = budget
+        self.report = {'folded': 0, 'steps': 0, 'aborted': 0}
+
+    def evaluate(self, ast: Program):
+        self.functions = {}
+        self._collect_pure_functions(ast)
+        if self.functions:
+            self._visit(ast)
+        return self.report
+
+    def _collect_pure_functions(self, node):
+        if isinstance(node, FuncDecl):
+            symbol = getattr(node, 'symbol', None)
+            if symbol is not None and 'readnone' in getattr(node, 'effects', ()):
+                self.functions[symbol] = node
+        for item in children(node):
+            self._collect_pure_functions(item)
+
+    # -------------------
+    # Substituição das chamadas
+    # -------------------
+
+    def _visit(self, node):
+        """Troca (de dentro para fora) as chamadas avaliáveis da subárvore"""
+        for key, child in vars(node).items():
+            if isinstance(child, list):
+                setattr(node, key, [self._replace(item) if isinstance(item, Node) else item
+                                    for item in child])
+            elif isinstance(child, Node):
+                setattr(node, key, self._replace(child))
+
+    def _replace(self, node):
+        self._visit(node)
+        if not isinstance(node, Call) or self.budget <= 0:
+            return node
+        func = self.functions.get(getattr(node, 'symbol', None))
+        if func is None or len(node.args) != len(func.params):
+            return node
+        if not all(isinstance(arg, Literal) and is_number(arg.value) and not isinstance(arg.value, bool)
+                   for arg in node.args):
+            return node
+        self.steps, self.depth = 0, 0
+        self.limit = min(self.budget, MAX_CALL_STEPS)
+        try:
+            value = self._call(func, [float(arg.value) for arg in node.args])
+        except (_Abort, RecursionError):
+            self.report['aborted'] += 1
+            return node
+        finally:
+            self.budget -= self.steps
+        self.report['folded'] += 1
+        self.report['steps'] += self.steps
+        return Literal(value)
+
+    # -------------------
+    # Interpretador
+    # -------------------
+
+    def _step(self):
+        self.steps += 1
+        if self.steps > self.limit:
+            raise _Abort()
+
+    def _call(self, func: FuncDecl, args):
+        if self.depth >= MAX_EVAL_DEPTH:
+            raise _Abort()
+        self.depth += 1
+        scopes = [{param.name: [value, False] for param, value in zip(func.params, args)}]
+        try:
+            self._exec(func.body, scopes)
+            value = 0.0   # Retorno implícito
+        except _Return as returned:
+            value = returned.value
+        self.depth -= 1
+        return float(value)
+
+    def _exec(self, stmt, scopes):
+        if stmt is None:
+            return
+        self._step()
+        if isinstance(stmt, Block):
+            scopes.append({})
+            for child in stmt.statements:
+                self._exec(child, scopes)
+            scopes.pop()
+        elif isinstance(stmt, VarDecl):
+            is_bool = isinstance(stmt.initializer, Literal) and isinstance(stmt.initializer.value, bool)
+            value = self._eval(stmt.initializer, scopes) if stmt.initializer is not None else False
+            scopes[-1][stmt.name.name] = [_convert(value, is_bool), is_bool]
+        elif isinstance(stmt, ExprStmt):
+            self._eval(stmt.expr, scopes)
+        elif isinstance(stmt, ReturnStmt):
+            raise _Return(self._eval(stmt.value, scopes) if stmt.value is not None else 0.0)
+        elif isinstance(stmt, IfStmt):
+            if self._condition(stmt.condition, scopes):
+                self._exec(stmt.then_branch, scopes)
+            else:
+                self._exec(stmt.else_branch, scopes)
+        elif isinstance(stmt, WhileStmt):
+            while self._condition(stmt.condition, scopes):
+                self._exec(stmt.body, scopes)
+        elif isinstance(stmt, ForStmt):
+            scopes.append({})
+            self._exec(stmt.init, scopes)
+            while stmt.condition is None or self._condition(stmt.condition, scopes):
+                self._exec(stmt.body, scopes)
+                if stmt.increment is not None:
+                    self._eval(stmt.increment, scopes)
+            scopes.pop()
+        elif isinstance(stmt, FuncDecl):
+            raise _Abort()
+        else:
+            self._eval(stmt, scopes)
+
+    def _condition(self, expr, scopes):
+        value = self._eval(expr, scopes)
+        return value if isinstance(value, bool) else truth(value)
+
+    def _eval(self, expr, scopes):
+        self._step()
+        if isinstance(expr, Literal):
+            if not is_number(expr.value):
+                raise _Abort()
+            return expr.value if isinstance(expr.value, bool) else float(expr.value)
+        if isinstance(expr, Identifier):
+            return self._lookup(expr.name, scopes)[0]
+        if isinstance(expr, Binary):
+            return _checked(evaluate_binary(expr.operator, self._eval(expr.left, scopes),
+                                            self._eval(expr.right, scopes)))
+        if isinstance(expr, Unary):
+            return _checked(evaluate_unary(expr.operator, self._eval(expr.right, scopes)))
+        if isinstance(expr, Assign) and isinstance(expr.left, Identifier):
+            value = self._eval(expr.value, scopes)
+            slot = self._lookup(expr.left.name, scopes)
+            slot[0] = _convert(value, slot[1])
+            return slot[0]
+        if isinstance(expr, Call):
+            func = self.functions.get(getattr(expr, 'symbol', None))
+            if func is None or len(expr.args) != len(func.params):
+                raise _Abort()
+            args = [self._eval(arg, scopes) for arg in expr.args]
+            if any(isinstance(arg, bool) for arg in args):
+                raise _Abort()   # Chamaria o clone com parâmetro i1
+            return self._call(func, args)
+        raise _Abort()
+
+    @staticmethod
+    def _lookup(name, scopes):
+        for scope in reversed(scopes):
+            if name in scope:
+                return scope[name]
+        # Global, função usada como valor...: não é local da chamada
+        raise _Abort()
+
+
+def _checked(value):
+    if value is NOT_CONSTANT:
+        raise _Abort()
+    return value
+
+
+def _convert(value, is_bool):
+    """Valor guardado numa variável i1 (``!= 0``) ou double"""
+    if is_bool:
+        return value if isinstance(value, bool) else truth(value)
+    return float(value)
@@ -0,0 +1,165 @@
+# pgo.py - Otimização guiada por perfil: arquivo de perfil, pesos e resumo
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+# Perfil juntado, ao lado do fonte (programa.js.pgo), e contadores das
+# execuções instrumentadas ainda por juntar (anexados a cada execução)
+PROFILE_SUFFIX = ".pgo"
+RAW_PROFILE_SUFFIX = ".pgo.raw"
+
+# Cabeçalho de cada execução (e do perfil juntado): "# js-pgo <digest> [execuções]"
+PROFILE_HEADER = "js-pgo"
+
+# branch_weights são i32 no IR
+MAX_BRANCH_WEIGHT = 2 ** 32 - 1
+
+# Cortes (por milhão da contagem total) do resumo detalhado, os mesmos do
+# ProfileSummaryBuilder do LLVM: quente é o que cobre 99% (990000) das
+# contagens, frio o que fica fora de 99.9999%
+SUMMARY_CUTOFFS = (10000, 100000, 200000, 300000, 400000, 500000, 600000, 700000,
+                   800000, 900000, 950000, 990000, 999000, 999900, 999990, 999999)
+# O LLVM estima a contagem de cada bloco (BlockFrequencyInfo) a partir da
+# entrada da função e dos pesos dos desvios, com erro pequeno (laços de
+# 5·10⁷ voltas saem ~0.1% abaixo); com poucos pontos a menor contagem
+# quente é a do próprio laço, então os limites do resumo ficam 1% abaixo
+SUMMARY_TOLERANCE = 100
+
+
+def profile_path(source_path):
+    return Path(str(source_path) + PROFILE_SUFFIX)
+
+
+def raw_profile_path(source_path):
+    return Path(str(source_path) + RAW_PROFILE_SUFFIX)
+
+
+def source_digest(source_code):
+    """Identifica a versão do fonte: perfis de outra versão são descartados"""
+    return hashlib.sha256(source_code.encode()).hexdigest()[:16]
+
+
+def is_branch_site(site):
+    """Pontos de desvio são ``f#N``; os demais, entradas de função ``f``"""
+    return "#" in site
+
+
+class Profile:
+    """Contadores de um programa, somados sobre as execuções de treino.
+
+    Cada ponto tem os contadores que o build instrumentado (--pgo-gen)
+    grava ao fim da main:
+    - ``f``: chamadas de ``f`` (clones e versões têm o próprio nome);
+    - ``f#N``: vezes em que o N-ésimo desvio condicional de ``f`` (if,
+      guarda e latch dos laços, na ordem do codegen) foi para o lado
+      verdadeiro e para o falso.
+
+    Só entram execuções com o ``digest`` do fonte atual; as de outra
+    versão ficam em ``stale_runs``.
+    """
+
+    def __init__(self, digest):
+        self.digest = digest
+        self.runs = 0
+        self.stale_runs = 0
+        self.counts = {}
+
+    def __repr__(self):
+        # Entra na chave do cache incremental: mudar os contadores regera as funções
+        content = "".join(f"{site}:{counts}\n" for site, counts in sorted(self.counts.items()))
+        return f"Profile({self.digest}, {hashlib.sha256(content.encode()).hexdigest()[:16]})"
+
+    def merge_file(self, path):
+        """Soma as execuções gravadas em ``path`` (perfil juntado ou bruto)"""
+        current = False
+        with open(path, encoding="utf-8") as profile_file:
+            for line in profile_file:
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0] == "#":
+                    runs = int(parts[3]) if len(parts) > 3 else 1
+                    current = len(parts) > 2 and parts[1] == PROFILE_HEADER and parts[2] == self.digest
+                    if current:
+                        self.runs += runs
+                    else:
+                        self.stale_runs += runs
+                elif current:
+                    counts = [int(value) for value in parts[1:]]
+                    known = self.counts.get(parts[0])
+                    if known is not None:
+                        counts = [a + b for a, b in zip(known, counts)]
+                    self.counts[parts[0]] = counts
+
+    def save(self, path):
+        # Escrita atômica, como no cache incremental
+        fd, tmp_path = tempfile.mkstemp(dir=Path(path).parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            tmp.write(f"# {PROFILE_HEADER} {self.digest} {self.runs}\n")
+            for site, counts in sorted(self.counts.items()):
+                tmp.write(" ".join([site] + [str(count) for count in counts]) + "\n")
+        os.replace(tmp_path, path)
+
+    def branch_weights(self, site):
+        """[verdadeiro, falso] do desvio, reduzidos para caber em i32; None
+        se o ponto não está no perfil ou nunca executou"""
+        counts = self.counts.get(site)
+        if not counts or not any(counts):
+            return None
+        scale = max(counts) // MAX_BRANCH_WEIGHT + 1
+        return [count // scale for count in counts]
+
+    def entry_count(self, function_name):
+        counts = self.counts.get(function_name)
+        return counts[0] if counts else None
+
+    def cold_functions(self):
+        """Funções que nenhuma execução de treino chamou"""
+        return sorted(site for site, counts in self.counts.items()
+                      if not is_branch_site(site) and not counts[0])
+
+    def summary(self):
+        """(campos, resumo detalhado) do metadado ``ProfileSummary``: campos
+        [(nome, valor)] e, por corte de SUMMARY_CUTOFFS, (corte, menor
+        contagem, contagens) das maiores contagens que somam a fração
+        ``corte / 10⁶`` do total (a menor com a folga de SUMMARY_TOLERANCE)"""
+        entries = [counts[0] for site, counts in self.counts.items() if not is_branch_site(site)]
+        internal = [count for site, counts in self.counts.items() if is_branch_site(site)
+                    for count in counts]
+        counts = sorted(entries + internal, reverse=True)
+        total = sum(counts)
+        fields = [
+            ("TotalCount", total),
+            ("MaxCount", counts[0] if counts else 0),
+            ("MaxInternalCount", max(internal, default=0)),
+            ("MaxFunctionCount", max(entries, default=0)),
+            ("NumCounts", len(counts)),
+            ("NumFunctions", len(entries)),
+        ]
+        detailed, covered, index = [], 0, 0
+        for cutoff in SUMMARY_CUTOFFS:
+            while index < len(counts) and covered * 1_000_000 < cutoff * total:
+                covered += counts[index]
+                index += 1
+            if index:
+                minimum = counts[index - 1]
+                detailed.append((cutoff, minimum - minimum // SUMMARY_TOLERANCE, index))
+        return fields, detailed
+
+
+def update_profile(source_path, digest):
+    """Junta ao perfil do fonte (``programa.js.pgo``) as execuções
+    instrumentadas anexadas a ``programa.js.pgo.raw``, que é apagado.
+    Retorna o Profile resultante (sem execuções se não há dados)."""
+    profile = Profile(digest)
+    path, raw_path = profile_path(source_path), raw_profile_path(source_path)
+    if path.exists():
+        profile.merge_file(path)
+    if raw_path.exists():
+        profile.merge_file(raw_path)
+        if profile.runs:
+            profile.save(path)
+        raw_path.unlink()
+    return profile
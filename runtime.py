@@ -0,0 +1,1297 @@
+# runtime.py - Runtime da linguagem emitido diretamente em LLVM IR
+from llvmlite import ir
+
+# Constantes do hash FNV-1a (64 bits)
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def fnv1a_hash(data: bytes) -> int:
+    """Calcula o hash FNV-1a de 64 bits (o mesmo usado em tempo de execução).
+
+    O valor 0 é reservado para "hash ainda não calculado", então é trocado por 1.
+    """
+    h = FNV_OFFSET
+    for byte in data:
+        h ^= byte
+        h = (h * FNV_PRIME) & MASK_64
+    return h or 1
+
+
+def _to_signed_64(value: int) -> int:
+    """Converte um inteiro sem sinal de 64 bits para a forma com sinal aceita pelo LLVM."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class RuntimeLibrary:
+    """Funções de suporte do programa gerado, emitidas sob demanda no módulo.
+
+    Strings são ponteiros para o descritor ``%JSString``:
+
+        { i64 len, i64 hash, i8* data, %JSBuffer* buf }
+
+    - Strings planas (literais, conversões) guardam os bytes em ``data``.
+    - Strings produzidas por concatenação compartilham um ``%JSBuffer``
+      crescente ({ i8* data, i64 used, i64 cap }) e são prefixos dele.
+      Se o operando esquerdo é a "ponta" do buffer (``used == len``),
+      a concatenação anexa no próprio buffer, em tempo amortizado O(1).
+
+    Arrays (apenas números) são ponteiros para ``%JSArray``:
+
+        { i64 len, i64 cap, double* data, i64 flags }
+
+    Memoização: cada função memoizada tem uma tabela ``%JSMemo`` de
+    endereçamento aberto com ``MEMO_CAPACITY`` entradas:
+
+        { JSMemo* next, i8* name, double* keys, double* values, i64* stamps,
+          i64 arity, i64 mask, i64 clock, i64 hits, i64 misses, i64 evictions }
+
+    Uma chave é procurada em até ``MEMO_PROBE`` posições a partir do hash
+    dos bits dos argumentos; com a janela cheia, a entrada inserida há
+    mais tempo (menor ``stamp``) é despejada.
+
+    PGO (--pgo-gen): cada ponto do programa tem uma global ``js.pgo.<ponto>``
+    com seus contadores (``[n x i64]``), incrementados no código do
+    usuário; ``js_pgo_write``, chamada no fim da main, anexa todos ao
+    arquivo de perfil bruto (ver pgo.py).
+
+    Multiversão: ``js_cpu_level`` lê o ``cpuid`` na primeira chamada e
+    devolve o nível x86-64 do processador (0 = base, 1 = v3/AVX2,
+    2 = v4/AVX-512), que escolhe a versão das funções multiversionadas.
+
+    Alocação: valores que não escapam da função são alocados na arena
+    (bump pointer em chunks de 64KB), liberada em bloco quando a função
+    retorna (``js_arena_release`` com a marca tirada na entrada). Os demais
+    vão para o heap (``malloc``). Com ``instrument_allocations`` as funções
+    de alocação contam alocações e o pico de bytes no heap.
+    """
+
+    # Tamanho padrão de um bloco (chunk) da arena
+    ARENA_CHUNK_SIZE = 64 * 1024
+    # Tamanho do cabeçalho do chunk: { i8* prev, i8* end }
+    ARENA_HEADER_SIZE = 16
+    # Entradas de cada tabela de memoização (potência de 2) e janela de sondagem
+    MEMO_CAPACITY = 4096
+    MEMO_PROBE = 4
+    # Prefixo das globais de contadores do build instrumentado (PGO)
+    PGO_COUNTER_PREFIX = "js.pgo."
+
+    def __init__(self, module: ir.Module, instrument_allocations=False, shared=False):
+        self.module = module
+        self.instrument_allocations = instrument_allocations
+        # shared: o módulo será ligado a outros (geração paralela). As funções
+        # da runtime viram linkonce_odr (uma cópia após a ligação) e o estado
+        # vira common (uma única instância compartilhada)
+        self.shared = shared
+        self._functions = {}
+        self._globals = {}
+        self._literals = {}
+        self._literal_counter = 0
+        self._constant_arrays = {}
+        self._constant_headers = {}
+
+        # Tipos básicos
+        self.int8_type = ir.IntType(8)
+        self.int32_type = ir.IntType(32)
+        self.int64_type = ir.IntType(64)
+        self.bool_type = ir.IntType(1)
+        self.double_type = ir.DoubleType()
+        self.void_type = ir.VoidType()
+        self.i8_ptr_type = self.int8_type.as_pointer()
+
+        # Tipos da runtime
+        self.buffer_type = module.context.get_identified_type("JSBuffer")
+        if self.buffer_type.is_opaque:
+            self.buffer_type.set_body(self.i8_ptr_type, self.int64_type, self.int64_type)
+        self.buffer_ptr_type = self.buffer_type.as_pointer()
+
+        self.string_type = module.context.get_identified_type("JSString")
+        if self.string_type.is_opaque:
+            self.string_type.set_body(self.int64_type, self.int64_type,
+                                      self.i8_ptr_type, self.buffer_ptr_type)
+        self.string_ptr_type = self.string_type.as_pointer()
+
+        self.array_type = module.context.get_identified_type("JSArray")
+        if self.array_type.is_opaque:
+            self.array_type.set_body(self.int64_type, self.int64_type,
+                                     self.double_type.as_pointer(), self.int64_type)
+        self.array_ptr_type = self.array_type.as_pointer()
+
+        self.memo_type = module.context.get_identified_type("JSMemo")
+        self.memo_ptr_type = self.memo_type.as_pointer()
+        if self.memo_type.is_opaque:
+            self.memo_type.set_body(self.memo_ptr_type, self.i8_ptr_type,
+                                    self.double_type.as_pointer(), self.double_type.as_pointer(),
+                                    self.int64_type.as_pointer(), *[self.int64_type] * 6)
+
+    # -------------------
+    # Utilitários
+    # -------------------
+
+    def _i32(self, value):
+        return ir.Constant(self.int32_type, value)
+
+    def _i64(self, value):
+        return ir.Constant(self.int64_type, value)
+
+    def sizeof(self, ty):
+        """Tamanho de um tipo como constante i64 (truque do GEP em null)."""
+        null_ptr = ir.Constant(ty.as_pointer(), None)
+        return null_ptr.gep([self._i32(1)]).ptrtoint(self.int64_type)
+
+    def field_ptr(self, builder, ptr, index, name=""):
+        """Ponteiro para o campo ``index`` de um struct apontado por ``ptr``."""
+        return builder.gep(ptr, [self._i32(0), self._i32(index)], inbounds=True, name=name)
+
+    def load_field(self, builder, ptr, index, name=""):
+        return builder.load(self.field_ptr(builder, ptr, index), name=name)
+
+    def store_field(self, builder, value, ptr, index):
+        builder.store(value, self.field_ptr(builder, ptr, index))
+
+    def declare_c_function(self, name, return_type, arg_types, var_arg=False):
+        """Declara (uma única vez) uma função da libc usada pela runtime."""
+        existing = self.module.globals.get(name)
+        if existing is not None:
+            return existing
+        func_type = ir.FunctionType(return_type, arg_types, var_arg=var_arg)
+        return ir.Function(self.module, func_type, name=name)
+
+    def _c_string(self, value: str, name: str):
+        """Cria (ou reutiliza) um global constante com uma string C terminada em NUL."""
+        existing = self.module.globals.get(name)
+        if existing is not None:
+            return existing.gep([self._i32(0), self._i32(0)])
+        data = bytearray((value + "\0").encode("utf-8"))
+        array_type = ir.ArrayType(self.int8_type, len(data))
+        global_var = ir.GlobalVariable(self.module, array_type, name=name)
+        global_var.linkage = "private"
+        global_var.global_constant = True
+        global_var.unnamed_addr = True
+        global_var.initializer = ir.Constant(array_type, data)
+        return global_var.gep([self._i32(0), self._i32(0)])
+
+    def _new_function(self, name, return_type, arg_types, arg_names):
+        func_type = ir.FunctionType(return_type, arg_types)
+        func = ir.Function(self.module, func_type, name=name)
+        func.linkage = "linkonce_odr" if self.shared else "internal"
+        for arg, arg_name in zip(func.args, arg_names):
+            arg.name = arg_name
+        builder = ir.IRBuilder(func.append_basic_block("entry"))
+        return func, builder
+
+    def get(self, name):
+        """Retorna a função da runtime ``name``, emitindo-a no primeiro uso."""
+        if name not in self._functions:
+            emitter = getattr(self, f"_emit_{name}")
+            self._functions[name] = emitter()
+        return self._functions[name]
+
+    def call(self, builder, name, args, result_name=""):
+        return builder.call(self.get(name), args, name=result_name)
+
+    def state_global(self, name, ty, initial=None):
+        """Variável global de estado da runtime (criada uma única vez).
+
+        O valor inicial é sempre zero/nulo, o que permite a ligação ``common``.
+        """
+        if name not in self._globals:
+            global_var = ir.GlobalVariable(self.module, ty, name=name)
+            global_var.linkage = "common" if self.shared else "internal"
+            global_var.initializer = ir.Constant(ty, initial)
+            self._globals[name] = global_var
+        return self._globals[name]
+
+    def _counter_add(self, builder, name, amount):
+        counter = self.state_global(name, self.int64_type, 0)
+        builder.store(builder.add(builder.load(counter), amount), counter)
+
+    # -------------------
+    # Alocação
+    # -------------------
+
+    def allocate(self, builder, size, arena=None, name=""):
+        """Aloca ``size`` bytes e retorna um ``i8*``.
+
+        ``arena`` é um ``i1`` (constante ou não) indicando se o valor pode
+        ficar na arena do frame atual; ``None`` equivale a heap.
+        """
+        if arena is None:
+            if not self.instrument_allocations:
+                malloc = self.declare_c_function("malloc", self.i8_ptr_type, [self.int64_type])
+                return builder.call(malloc, [size], name=name)
+            arena = ir.Constant(self.bool_type, 0)
+        return self.call(builder, "js_alloc", [size, arena], name)
+
+    def reallocate(self, builder, ptr, old_size, new_size, name=""):
+        """``realloc`` de um bloco do heap (contabilizado quando instrumentado)."""
+        realloc = self.declare_c_function("realloc", self.i8_ptr_type, [self.i8_ptr_type, self.int64_type])
+        if self.instrument_allocations:
+            self._counter_add(builder, "js_stat_heap_allocs", self._i64(1))
+            self._track_heap_bytes(builder, builder.sub(new_size, old_size))
+        return builder.call(realloc, [ptr, new_size], name=name)
+
+    def _track_heap_bytes(self, builder, delta):
+        """Atualiza bytes em uso no heap e o pico (apenas no build instrumentado)."""
+        current = self.state_global("js_stat_heap_bytes", self.int64_type, 0)
+        peak = self.state_global("js_stat_heap_peak", self.int64_type, 0)
+        new_current = builder.add(builder.load(current), delta)
+        builder.store(new_current, current)
+        old_peak = builder.load(peak)
+        is_peak = builder.icmp_signed(">", new_current, old_peak)
+        builder.store(builder.select(is_peak, new_current, old_peak), peak)
+
+    def _heap_malloc(self, builder, size, name=""):
+        """``malloc`` direto, contabilizando bytes no build instrumentado."""
+        malloc = self.declare_c_function("malloc", self.i8_ptr_type, [self.int64_type])
+        if self.instrument_allocations:
+            self._track_heap_bytes(builder, size)
+        return builder.call(malloc, [size], name=name)
+
+    def _emit_js_alloc(self):
+        """i8* js_alloc(i64 size, i1 arena): despacha entre arena e heap."""
+        func, builder = self._new_function(
+            "js_alloc", self.i8_ptr_type, [self.int64_type, self.bool_type], ["size", "arena"])
+        size, arena = func.args
+        with builder.if_then(arena):
+            builder.ret(self.call(builder, "js_arena_alloc", [size]))
+        if self.instrument_allocations:
+            self._counter_add(builder, "js_stat_heap_allocs", self._i64(1))
+        builder.ret(self._heap_malloc(builder, size))
+        return func
+
+    def arena_state(self):
+        """Globais (chunk atual, topo) usados como marca do frame."""
+        return (self.state_global("js_arena_chunk", self.i8_ptr_type),
+                self.state_global("js_arena_top", self.i8_ptr_type))
+
+    def _chunk_field(self, builder, chunk, index):
+        """Ponteiro para o campo ``index`` ({prev, end}) do cabeçalho de um chunk."""
+        header = builder.bitcast(chunk, self.i8_ptr_type.as_pointer())
+        return builder.gep(header, [self._i64(index)])
+
+    def _emit_js_arena_alloc(self):
+        """i8* js_arena_alloc(i64 size): bump pointer; abre um chunk novo quando cheio."""
+        func, builder = self._new_function(
+            "js_arena_alloc", self.i8_ptr_type, [self.int64_type], ["size"])
+        chunk_var, top_var = self.arena_state()
+        end_var = self.state_global("js_arena_end", self.i8_ptr_type)
+        spare_var = self.state_global("js_arena_spare", self.i8_ptr_type)
+        null = ir.Constant(self.i8_ptr_type, None)
+
+        # Alinha em 16 bytes
+        size = builder.and_(builder.add(func.args[0], self._i64(15)), self._i64(~15), name="aligned")
+        if self.instrument_allocations:
+            self._counter_add(builder, "js_stat_arena_allocs", self._i64(1))
+
+        top = builder.load(top_var, name="top")
+        end = builder.load(end_var, name="end")
+        available = builder.sub(builder.ptrtoint(end, self.int64_type),
+                                builder.ptrtoint(top, self.int64_type), name="available")
+        fits = builder.and_(builder.icmp_unsigned("!=", top, null),
+                            builder.icmp_unsigned("<=", size, available))
+        with builder.if_then(fits, likely=True):
+            builder.store(builder.gep(top, [size]), top_var)
+            builder.ret(top)
+
+        # Caminho lento: reutiliza o chunk reserva ou aloca um novo
+        needed = builder.add(size, self._i64(self.ARENA_HEADER_SIZE), name="needed")
+        is_big = builder.icmp_unsigned(">", needed, self._i64(self.ARENA_CHUNK_SIZE))
+        chunk_size = builder.select(is_big, needed, self._i64(self.ARENA_CHUNK_SIZE), name="chunk_size")
+
+        spare = builder.load(spare_var, name="spare")
+        spare_ok = builder.icmp_unsigned("!=", spare, null)
+        entry_block = builder.block
+        with builder.if_then(spare_ok):
+            spare_end = builder.load(self._chunk_field(builder, spare, 1))
+            spare_size = builder.sub(builder.ptrtoint(spare_end, self.int64_type),
+                                     builder.ptrtoint(spare, self.int64_type))
+            spare_ok_size = builder.icmp_unsigned(">=", spare_size, chunk_size)
+            spare_block = builder.block
+        reuse = builder.phi(self.bool_type, name="reuse")
+        reuse.add_incoming(ir.Constant(self.bool_type, 0), entry_block)
+        reuse.add_incoming(spare_ok_size, spare_block)
+
+        with builder.if_else(reuse) as (then, otherwise):
+            with then:
+                builder.store(null, spare_var)
+                reused_end = builder.load(self._chunk_field(builder, spare, 1))
+                reuse_block = builder.block
+            with otherwise:
+                fresh = self._heap_malloc(builder, chunk_size, name="fresh")
+                fresh_end = builder.gep(fresh, [chunk_size])
+                builder.store(fresh_end, self._chunk_field(builder, fresh, 1))
+                fresh_block = builder.block
+        chunk = builder.phi(self.i8_ptr_type, name="chunk")
+        chunk.add_incoming(spare, reuse_block)
+        chunk.add_incoming(fresh, fresh_block)
+        chunk_end = builder.phi(self.i8_ptr_type, name="chunk_end")
+        chunk_end.add_incoming(reused_end, reuse_block)
+        chunk_end.add_incoming(fresh_end, fresh_block)
+
+        builder.store(builder.load(chunk_var), self._chunk_field(builder, chunk, 0))
+        builder.store(chunk, chunk_var)
+        builder.store(chunk_end, end_var)
+        result = builder.gep(chunk, [self._i64(self.ARENA_HEADER_SIZE)], name="result")
+        builder.store(builder.gep(result, [size]), top_var)
+        builder.ret(result)
+        return func
+
+    def _emit_js_arena_release(self):
+        """void js_arena_release(i8* chunk, i8* top): volta a arena para a marca do frame.
+
+        Chunks abertos depois da marca são liberados; o último liberado fica
+        como reserva para evitar malloc/free repetidos em chamadas em laço.
+        """
+        func, builder = self._new_function(
+            "js_arena_release", self.void_type, [self.i8_ptr_type, self.i8_ptr_type],
+            ["mark_chunk", "mark_top"])
+        mark_chunk, mark_top = func.args
+        chunk_var, top_var = self.arena_state()
+        end_var = self.state_global("js_arena_end", self.i8_ptr_type)
+        spare_var = self.state_global("js_arena_spare", self.i8_ptr_type)
+        free = self.declare_c_function("free", self.void_type, [self.i8_ptr_type])
+        null = ir.Constant(self.i8_ptr_type, None)
+
+        loop = func.append_basic_block("loop")
+        pop = func.append_basic_block("pop")
+        done = func.append_basic_block("done")
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        chunk = builder.load(chunk_var, name="chunk")
+        builder.cbranch(builder.icmp_unsigned("==", chunk, mark_chunk), done, pop)
+
+        builder.position_at_end(pop)
+        builder.store(builder.load(self._chunk_field(builder, chunk, 0)), chunk_var)
+        old_spare = builder.load(spare_var, name="old_spare")
+        with builder.if_then(builder.icmp_unsigned("!=", old_spare, null)):
+            if self.instrument_allocations:
+                spare_end = builder.load(self._chunk_field(builder, old_spare, 1))
+                spare_size = builder.sub(builder.ptrtoint(spare_end, self.int64_type),
+                                         builder.ptrtoint(old_spare, self.int64_type))
+                self._track_heap_bytes(builder, builder.neg(spare_size))
+            builder.call(free, [old_spare])
+        builder.store(chunk, spare_var)
+        builder.branch(loop)
+
+        builder.position_at_end(done)
+        builder.store(mark_top, top_var)
+        has_chunk = builder.icmp_unsigned("!=", mark_chunk, null)
+        with builder.if_else(has_chunk) as (then, otherwise):
+            with then:
+                mark_end = builder.load(self._chunk_field(builder, mark_chunk, 1))
+                then_block = builder.block
+            with otherwise:
+                else_block = builder.block
+        end = builder.phi(self.i8_ptr_type, name="end")
+        end.add_incoming(mark_end, then_block)
+        end.add_incoming(null, else_block)
+        builder.store(end, end_var)
+        builder.ret_void()
+        return func
+
+    def _emit_js_alloc_report(self):
+        """void js_alloc_report(): imprime os contadores do build instrumentado."""
+        func, builder = self._new_function("js_alloc_report", self.void_type, [], [])
+        printf = self.declare_c_function("printf", self.int32_type, [self.i8_ptr_type], var_arg=True)
+        fmt = self._c_string(
+            "[alloc] heap: %lld alocacoes | arena: %lld alocacoes | pico do heap: %lld bytes\n",
+            ".rt.fmt.alloc_report")
+        values = [builder.load(self.state_global(name, self.int64_type, 0))
+                  for name in ("js_stat_heap_allocs", "js_stat_arena_allocs", "js_stat_heap_peak")]
+        builder.call(printf, [fmt] + values)
+        builder.ret_void()
+        return func
+
+    # -------------------
+    # Strings
+    # -------------------
+
+    def string_literal(self, value: str):
+        """Retorna o descritor estático (constante) de um literal string.
+
+        Literais iguais compartilham o mesmo descritor; o hash é calculado
+        em tempo de compilação, então o descritor nunca é escrito.
+        """
+        if value in self._literals:
+            return self._literals[value]
+
+        data = value.encode("utf-8", errors="replace")
+        self._literal_counter += 1
+        base_name = f".str.{self._literal_counter}"
+
+        array_type = ir.ArrayType(self.int8_type, len(data) + 1)
+        data_global = ir.GlobalVariable(self.module, array_type, name=f"{base_name}.data")
+        data_global.linkage = "private"
+        data_global.global_constant = True
+        data_global.unnamed_addr = True
+        data_global.initializer = ir.Constant(array_type, bytearray(data + b"\0"))
+
+        descriptor = ir.GlobalVariable(self.module, self.string_type, name=base_name)
+        descriptor.linkage = "private"
+        descriptor.global_constant = True
+        descriptor.initializer = ir.Constant(self.string_type, [
+            self._i64(len(data)),
+            self._i64(_to_signed_64(fnv1a_hash(data))),
+            data_global.gep([self._i32(0), self._i32(0)]),
+            ir.Constant(self.buffer_ptr_type, None),
+        ])
+
+        self._literals[value] = descriptor
+        return descriptor
+
+    def string_length(self, builder, string_ptr):
+        """Comprimento em O(1): apenas lê o campo ``len`` do descritor."""
+        return self.load_field(builder, string_ptr, 0, name="strlen")
+
+    def _emit_js_str_chars(self):
+        """i8* js_str_chars(JSString* s): bytes da string (plana ou em buffer)."""
+        func, builder = self._new_function(
+            "js_str_chars", self.i8_ptr_type, [self.string_ptr_type], ["s"])
+        s = func.args[0]
+        buf = self.load_field(builder, s, 3, name="buf")
+        has_buf = builder.icmp_unsigned("!=", buf, ir.Constant(self.buffer_ptr_type, None))
+        with builder.if_else(has_buf) as (then, otherwise):
+            with then:
+                buf_data = self.load_field(builder, buf, 0, name="buf_data")
+                then_block = builder.block
+            with otherwise:
+                flat_data = self.load_field(builder, s, 2, name="flat_data")
+                else_block = builder.block
+        chars = builder.phi(self.i8_ptr_type, name="chars")
+        chars.add_incoming(buf_data, then_block)
+        chars.add_incoming(flat_data, else_block)
+        builder.ret(chars)
+        return func
+
+    def _new_string(self, builder, length, data, buf, arena=None, name="str"):
+        """Aloca e preenche um descritor de string."""
+        raw = self.allocate(builder, self.sizeof(self.string_type), arena)
+        string_ptr = builder.bitcast(raw, self.string_ptr_type, name=name)
+        self.store_field(builder, length, string_ptr, 0)
+        self.store_field(builder, self._i64(0), string_ptr, 1)
+        self.store_field(builder, data, string_ptr, 2)
+        self.store_field(builder, buf, string_ptr, 3)
+        return string_ptr
+
+    def _emit_js_str_concat(self):
+        """JSString* js_str_concat(JSString* a, JSString* b, i1 arena)
+
+        Anexa ``b`` no buffer de ``a`` quando ``a`` é a ponta do buffer;
+        caso contrário copia ``a`` para um buffer novo com folga (2x).
+        Em ambos os casos o custo amortizado é proporcional a ``len(b)``.
+        Com ``arena`` apenas o descritor vai para a arena: o buffer é
+        compartilhado com outras strings e fica sempre no heap.
+        """
+        func, builder = self._new_function(
+            "js_str_concat", self.string_ptr_type,
+            [self.string_ptr_type, self.string_ptr_type, self.bool_type], ["a", "b", "arena"])
+        a, b, arena = func.args
+        memcpy = self.declare_c_function(
+            "memcpy", self.i8_ptr_type, [self.i8_ptr_type, self.i8_ptr_type, self.int64_type])
+        memmove = self.declare_c_function(
+            "memmove", self.i8_ptr_type, [self.i8_ptr_type, self.i8_ptr_type, self.int64_type])
+        null_buf = ir.Constant(self.buffer_ptr_type, None)
+        zero = self._i64(0)
+
+        a_len = self.load_field(builder, a, 0, name="a_len")
+        b_len = self.load_field(builder, b, 0, name="b_len")
+
+        # Concatenações com string vazia reaproveitam o outro operando
+        with builder.if_then(builder.icmp_unsigned("==", b_len, zero), likely=False):
+            builder.ret(a)
+        with builder.if_then(builder.icmp_unsigned("==", a_len, zero), likely=False):
+            builder.ret(b)
+
+        total = builder.add(a_len, b_len, name="total")
+        a_buf = self.load_field(builder, a, 3, name="a_buf")
+
+        check_tip = func.append_basic_block("check_tip")
+        append = func.append_basic_block("append")
+        grow = func.append_basic_block("grow")
+        fresh = func.append_basic_block("fresh")
+        write = func.append_basic_block("write")
+
+        has_buf = builder.icmp_unsigned("!=", a_buf, null_buf)
+        builder.cbranch(has_buf, check_tip, fresh)
+
+        # 'a' é a ponta do buffer? (nenhuma outra string anexou depois dela)
+        builder.position_at_end(check_tip)
+        used = self.load_field(builder, a_buf, 1, name="used")
+        is_tip = builder.icmp_unsigned("==", used, a_len)
+        builder.cbranch(is_tip, append, fresh)
+
+        # Anexa no lugar, dobrando a capacidade quando necessário
+        builder.position_at_end(append)
+        cap = self.load_field(builder, a_buf, 2, name="cap")
+        needs_grow = builder.icmp_unsigned(">", total, cap)
+        builder.cbranch(needs_grow, grow, write)
+
+        builder.position_at_end(grow)
+        doubled = builder.mul(cap, self._i64(2))
+        new_cap = builder.select(builder.icmp_unsigned(">", doubled, total), doubled, total, name="new_cap")
+        old_data = self.load_field(builder, a_buf, 0)
+        grown = self.reallocate(builder, old_data, cap, new_cap, name="grown")
+        self.store_field(builder, grown, a_buf, 0)
+        self.store_field(builder, new_cap, a_buf, 2)
+        builder.branch(write)
+
+        # Copia 'a' para um buffer novo
+        builder.position_at_end(fresh)
+        fresh_cap = builder.mul(total, self._i64(2))
+        fresh_cap = builder.select(builder.icmp_unsigned(">", fresh_cap, self._i64(16)),
+                                   fresh_cap, self._i64(16), name="fresh_cap")
+        raw_buf = self.allocate(builder, self.sizeof(self.buffer_type))
+        new_buf = builder.bitcast(raw_buf, self.buffer_ptr_type, name="new_buf")
+        new_data = self.allocate(builder, fresh_cap, name="new_data")
+        a_chars = self.call(builder, "js_str_chars", [a], "a_chars")
+        builder.call(memcpy, [new_data, a_chars, a_len])
+        self.store_field(builder, new_data, new_buf, 0)
+        self.store_field(builder, a_len, new_buf, 1)
+        self.store_field(builder, fresh_cap, new_buf, 2)
+        builder.branch(write)
+
+        # Escreve 'b' logo após 'a' (b pode apontar para o mesmo buffer)
+        builder.position_at_end(write)
+        buf = builder.phi(self.buffer_ptr_type, name="buf")
+        buf.add_incoming(a_buf, append)
+        buf.add_incoming(a_buf, grow)
+        buf.add_incoming(new_buf, fresh)
+        data = self.load_field(builder, buf, 0, name="data")
+        dest = builder.gep(data, [a_len], name="dest")
+        b_chars = self.call(builder, "js_str_chars", [b], "b_chars")
+        builder.call(memmove, [dest, b_chars, b_len])
+        self.store_field(builder, total, buf, 1)
+        result = self._new_string(builder, total, ir.Constant(self.i8_ptr_type, None), buf,
+                                  arena, name="result")
+        builder.ret(result)
+        return func
+
+    def _emit_js_str_from_number(self):
+        """JSString* js_str_from_number(double x, i1 arena): formata com "%g"."""
+        func, builder = self._new_function(
+            "js_str_from_number", self.string_ptr_type, [self.double_type, self.bool_type], ["x", "arena"])
+        x, arena = func.args
+        snprintf = self.declare_c_function(
+            "snprintf", self.int32_type, [self.i8_ptr_type, self.int64_type, self.i8_ptr_type], var_arg=True)
+        data = self.allocate(builder, self._i64(32), arena, name="data")
+        fmt = self._c_string("%g", ".rt.fmt.number")
+        written = builder.call(snprintf, [data, self._i64(32), fmt, x], name="written")
+        length = builder.sext(written, self.int64_type, name="len")
+        builder.ret(self._new_string(builder, length, data, ir.Constant(self.buffer_ptr_type, None), arena))
+        return func
+
+    def _emit_js_str_hash(self):
+        """i64 js_str_hash(JSString* s): FNV-1a calculado uma vez e memorizado."""
+        func, builder = self._new_function(
+            "js_str_hash", self.int64_type, [self.string_ptr_type], ["s"])
+        s = func.args[0]
+        cached = self.load_field(builder, s, 1, name="cached")
+        with builder.if_then(builder.icmp_unsigned("!=", cached, self._i64(0)), likely=True):
+            builder.ret(cached)
+
+        length = self.load_field(builder, s, 0, name="len")
+        chars = self.call(builder, "js_str_chars", [s], "chars")
+        preheader = builder.block
+        loop = func.append_basic_block("loop")
+        body = func.append_basic_block("body")
+        done = func.append_basic_block("done")
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        index = builder.phi(self.int64_type, name="i")
+        h = builder.phi(self.int64_type, name="h")
+        index.add_incoming(self._i64(0), preheader)
+        h.add_incoming(self._i64(_to_signed_64(FNV_OFFSET)), preheader)
+        builder.cbranch(builder.icmp_unsigned("<", index, length), body, done)
+
+        builder.position_at_end(body)
+        byte = builder.zext(builder.load(builder.gep(chars, [index])), self.int64_type)
+        next_h = builder.mul(builder.xor(h, byte), self._i64(FNV_PRIME), name="next_h")
+        next_index = builder.add(index, self._i64(1), name="next_i")
+        index.add_incoming(next_index, body)
+        h.add_incoming(next_h, body)
+        builder.branch(loop)
+
+        builder.position_at_end(done)
+        is_zero = builder.icmp_unsigned("==", h, self._i64(0))
+        final = builder.select(is_zero, self._i64(1), h, name="hash")
+        self.store_field(builder, final, s, 1)
+        builder.ret(final)
+        return func
+
+    def _emit_js_str_equals(self):
+        """i1 js_str_equals(JSString* a, JSString* b): compara len, hash e bytes."""
+        func, builder = self._new_function(
+            "js_str_equals", self.bool_type, [self.string_ptr_type, self.string_ptr_type], ["a", "b"])
+        a, b = func.args
+        memcmp = self.declare_c_function(
+            "memcmp", self.int32_type, [self.i8_ptr_type, self.i8_ptr_type, self.int64_type])
+        true = ir.Constant(self.bool_type, 1)
+        false = ir.Constant(self.bool_type, 0)
+
+        with builder.if_then(builder.icmp_unsigned("==", a, b)):
+            builder.ret(true)
+        a_len = self.load_field(builder, a, 0)
+        b_len = self.load_field(builder, b, 0)
+        with builder.if_then(builder.icmp_unsigned("!=", a_len, b_len)):
+            builder.ret(false)
+        a_hash = self.call(builder, "js_str_hash", [a])
+        b_hash = self.call(builder, "js_str_hash", [b])
+        with builder.if_then(builder.icmp_unsigned("!=", a_hash, b_hash)):
+            builder.ret(false)
+        a_chars = self.call(builder, "js_str_chars", [a])
+        b_chars = self.call(builder, "js_str_chars", [b])
+        cmp = builder.call(memcmp, [a_chars, b_chars, a_len])
+        builder.ret(builder.icmp_signed("==", cmp, self._i32(0)))
+        return func
+
+    def _emit_js_str_print(self):
+        """void js_str_print(JSString* s, i1 newline): imprime via printf("%.*s")."""
+        func, builder = self._new_function(
+            "js_str_print", self.void_type, [self.string_ptr_type, self.bool_type], ["s", "newline"])
+        s, newline = func.args
+        printf = self.declare_c_function("printf", self.int32_type, [self.i8_ptr_type], var_arg=True)
+        fmt = builder.select(newline,
+                             self._c_string("%.*s\n", ".rt.fmt.println"),
+                             self._c_string("%.*s", ".rt.fmt.print"))
+        length = builder.trunc(self.load_field(builder, s, 0), self.int32_type)
+        chars = self.call(builder, "js_str_chars", [s])
+        builder.call(printf, [fmt, length, chars])
+        builder.ret_void()
+        return func
+
+    # -------------------
+    # Arrays
+    # -------------------
+
+    # Bits de ``JSArray.flags``: dados fora do heap (arena ou pilha), sem realloc
+    ARRAY_FIXED_STORAGE = 1
+    # Dados em uma global constante: a primeira escrita copia (copy-on-write)
+    ARRAY_SHARED_STORAGE = 2
+
+    def array_length(self, builder, array_ptr):
+        """Comprimento em O(1): campo ``len`` do descritor."""
+        return self.load_field(builder, array_ptr, 0, name="arrlen")
+
+    def array_data(self, builder, array_ptr):
+        return self.load_field(builder, array_ptr, 2, name="arrdata")
+
+    def _nan(self):
+        return ir.Constant(self.double_type, float("nan"))
+
+    def constant_array_data(self, values):
+        """Retorna o ``double*`` de uma global constante com os elementos.
+
+        Literais com o mesmo conteúdo compartilham a mesma global.
+        """
+        key = tuple(values)
+        if key in self._constant_arrays:
+            return self._constant_arrays[key]
+        data_type = ir.ArrayType(self.double_type, len(values))
+        data_global = ir.GlobalVariable(self.module, data_type,
+                                        name=f".arr.{len(self._constant_arrays) + 1}")
+        data_global.linkage = "private"
+        data_global.global_constant = True
+        data_global.unnamed_addr = True
+        data_global.initializer = ir.Constant(data_type, list(values))
+        data = data_global.gep([self._i32(0), self._i32(0)])
+        self._constant_arrays[key] = data
+        return data
+
+    def constant_array_header(self, values):
+        """Descritor ``%JSArray`` constante para um array que nunca é escrito."""
+        key = tuple(values)
+        if key in self._constant_headers:
+            return self._constant_headers[key]
+        header = ir.GlobalVariable(self.module, self.array_type,
+                                   name=f".arr.const.{len(self._constant_headers) + 1}")
+        header.linkage = "private"
+        header.global_constant = True
+        header.initializer = ir.Constant(self.array_type, [
+            self._i64(len(values)),
+            self._i64(len(values)),
+            self.constant_array_data(values),
+            self._i64(self.ARRAY_SHARED_STORAGE),
+        ])
+        self._constant_headers[key] = header
+        return header
+
+    def init_shared_array(self, builder, header, values, fixed=False):
+        """Inicializa um descritor que aponta para os dados constantes (sem cópia)."""
+        flags = self.ARRAY_SHARED_STORAGE | (self.ARRAY_FIXED_STORAGE if fixed else 0)
+        self.store_field(builder, self._i64(len(values)), header, 0)
+        self.store_field(builder, self._i64(len(values)), header, 1)
+        self.store_field(builder, self.constant_array_data(values), header, 2)
+        self.store_field(builder, self._i64(flags), header, 3)
+
+    def _emit_js_array_new_shared(self):
+        """JSArray* js_array_new_shared(i64 len, double* data, i1 arena)
+
+        Descritor sobre dados constantes; só o descritor é alocado.
+        """
+        func, builder = self._new_function(
+            "js_array_new_shared", self.array_ptr_type,
+            [self.int64_type, self.double_type.as_pointer(), self.bool_type], ["len", "data", "arena"])
+        length, data, arena = func.args
+        raw = self.allocate(builder, self.sizeof(self.array_type), arena)
+        array_ptr = builder.bitcast(raw, self.array_ptr_type, name="array")
+        flags = builder.or_(builder.zext(arena, self.int64_type), self._i64(self.ARRAY_SHARED_STORAGE))
+        self.store_field(builder, length, array_ptr, 0)
+        self.store_field(builder, length, array_ptr, 1)
+        self.store_field(builder, data, array_ptr, 2)
+        self.store_field(builder, flags, array_ptr, 3)
+        builder.ret(array_ptr)
+        return func
+
+    def _emit_js_array_new(self):
+        """JSArray* js_array_new(i64 cap, i1 arena): array vazio com capacidade ``cap``."""
+        func, builder = self._new_function(
+            "js_array_new", self.array_ptr_type, [self.int64_type, self.bool_type], ["cap", "arena"])
+        cap, arena = func.args
+        raw = self.allocate(builder, self.sizeof(self.array_type), arena)
+        array_ptr = builder.bitcast(raw, self.array_ptr_type, name="array")
+        data_size = builder.mul(cap, self.sizeof(self.double_type), name="data_size")
+        data = builder.bitcast(self.allocate(builder, data_size, arena),
+                               self.double_type.as_pointer(), name="data")
+        self.store_field(builder, self._i64(0), array_ptr, 0)
+        self.store_field(builder, cap, array_ptr, 1)
+        self.store_field(builder, data, array_ptr, 2)
+        self.store_field(builder, builder.zext(arena, self.int64_type), array_ptr, 3)
+        builder.ret(array_ptr)
+        return func
+
+    def _emit_js_array_reserve(self):
+        """void js_array_reserve(JSArray* arr, i64 needed): garante capacidade (dobrando).
+
+        Arrays na arena ou na pilha crescem copiando para um bloco novo da
+        arena (liberado junto com o frame, do qual eles não escapam); os
+        demais usam ``realloc``. Dados compartilhados (constantes) são
+        sempre copiados, mesmo com capacidade sobrando.
+        """
+        func, builder = self._new_function(
+            "js_array_reserve", self.void_type, [self.array_ptr_type, self.int64_type], ["arr", "needed"])
+        arr, needed = func.args
+        memcpy = self.declare_c_function(
+            "memcpy", self.i8_ptr_type, [self.i8_ptr_type, self.i8_ptr_type, self.int64_type])
+        cap = self.load_field(builder, arr, 1, name="cap")
+        flags = self.load_field(builder, arr, 3, name="flags")
+        shared = builder.icmp_unsigned(
+            "!=", builder.and_(flags, self._i64(self.ARRAY_SHARED_STORAGE)), self._i64(0), name="shared")
+        fits = builder.and_(builder.icmp_unsigned("<=", needed, cap), builder.not_(shared))
+        with builder.if_then(fits, likely=True):
+            builder.ret_void()
+
+        doubled = builder.mul(cap, self._i64(2))
+        new_cap = builder.select(builder.icmp_unsigned(">", doubled, needed), doubled, needed)
+        new_cap = builder.select(builder.icmp_unsigned(">", new_cap, self._i64(4)), new_cap, self._i64(4),
+                                 name="new_cap")
+        element_size = self.sizeof(self.double_type)
+        old_bytes = builder.mul(cap, element_size, name="old_bytes")
+        new_bytes = builder.mul(new_cap, element_size, name="new_bytes")
+        old_data = builder.bitcast(self.load_field(builder, arr, 2), self.i8_ptr_type, name="old_data")
+        fixed = builder.icmp_unsigned(
+            "!=", builder.and_(flags, self._i64(self.ARRAY_FIXED_STORAGE)), self._i64(0), name="fixed")
+
+        with builder.if_else(builder.or_(fixed, shared)) as (then, otherwise):
+            with then:
+                copied = self.call(builder, "js_alloc", [new_bytes, fixed], "copied")
+                length = self.load_field(builder, arr, 0)
+                builder.call(memcpy, [copied, old_data, builder.mul(length, element_size)])
+                copy_block = builder.block
+            with otherwise:
+                grown = self.reallocate(builder, old_data, old_bytes, new_bytes, name="grown")
+                heap_block = builder.block
+        new_data = builder.phi(self.i8_ptr_type, name="new_data")
+        new_data.add_incoming(copied, copy_block)
+        new_data.add_incoming(grown, heap_block)
+
+        self.store_field(builder, builder.bitcast(new_data, self.double_type.as_pointer()), arr, 2)
+        self.store_field(builder, new_cap, arr, 1)
+        self.store_field(builder, builder.and_(flags, self._i64(~self.ARRAY_SHARED_STORAGE)), arr, 3)
+        builder.ret_void()
+        return func
+
+    def array_get_inline(self, builder, array_ptr, index):
+        """Leitura arr[i] emitida no local (sem chamada), para o LLVM enxergar os acessos.
+
+        Com o array na pilha, SROA/mem2reg conseguem substituir os campos e
+        elementos por escalares.
+        """
+        position = builder.fptosi(index, self.int64_type, name="pos")
+        length = self.array_length(builder, array_ptr)
+        in_bounds = builder.icmp_unsigned("<", position, length)
+        with builder.if_else(in_bounds, likely=True) as (then, otherwise):
+            with then:
+                element = builder.load(builder.gep(self.array_data(builder, array_ptr), [position]),
+                                       name="elem")
+                then_block = builder.block
+            with otherwise:
+                else_block = builder.block
+        result = builder.phi(self.double_type, name="elemtmp")
+        result.add_incoming(element, then_block)
+        result.add_incoming(self._nan(), else_block)
+        return result
+
+    def init_stack_array(self, builder, header, data, capacity):
+        """Inicializa um ``%JSArray`` alocado na pilha (dados em ``data``)."""
+        self.store_field(builder, self._i64(0), header, 0)
+        self.store_field(builder, self._i64(capacity), header, 1)
+        self.store_field(builder, builder.bitcast(data, self.double_type.as_pointer()), header, 2)
+        self.store_field(builder, self._i64(self.ARRAY_FIXED_STORAGE), header, 3)
+
+    def _emit_js_array_set(self):
+        """void js_array_set(JSArray* arr, double index, double value)
+
+        Índices além do fim estendem o array, preenchendo o buraco com NaN.
+        Escrever em dados compartilhados passa pelo caminho de crescimento,
+        que faz a cópia.
+        """
+        func, builder = self._new_function(
+            "js_array_set", self.void_type, [self.array_ptr_type, self.double_type, self.double_type],
+            ["arr", "index", "value"])
+        arr, index, value = func.args
+        position = builder.fptosi(index, self.int64_type, name="pos")
+        with builder.if_then(builder.icmp_signed("<", position, self._i64(0)), likely=False):
+            builder.ret_void()
+
+        length = self.array_length(builder, arr)
+        flags = self.load_field(builder, arr, 3, name="flags")
+        writable = builder.icmp_unsigned(
+            "==", builder.and_(flags, self._i64(self.ARRAY_SHARED_STORAGE)), self._i64(0))
+        check_block = builder.block
+        grow = func.append_basic_block("grow")
+        fill = func.append_basic_block("fill")
+        fill_body = func.append_basic_block("fill_body")
+        store = func.append_basic_block("store")
+        builder.cbranch(builder.and_(builder.icmp_unsigned("<", position, length), writable), store, grow)
+
+        builder.position_at_end(grow)
+        past_end = builder.add(position, self._i64(1))
+        new_length = builder.select(builder.icmp_unsigned(">", past_end, length), past_end, length,
+                                    name="new_len")
+        self.call(builder, "js_array_reserve", [arr, new_length])
+        data = self.array_data(builder, arr)
+        builder.branch(fill)
+
+        builder.position_at_end(fill)
+        cursor = builder.phi(self.int64_type, name="i")
+        cursor.add_incoming(length, grow)
+        builder.cbranch(builder.icmp_unsigned("<", cursor, position), fill_body, store)
+
+        builder.position_at_end(fill_body)
+        builder.store(self._nan(), builder.gep(data, [cursor]))
+        cursor.add_incoming(builder.add(cursor, self._i64(1)), fill_body)
+        builder.branch(fill)
+
+        builder.position_at_end(store)
+        final_length = builder.phi(self.int64_type, name="final_len")
+        final_length.add_incoming(length, check_block)
+        final_length.add_incoming(new_length, fill)
+        self.store_field(builder, final_length, arr, 0)
+        builder.store(value, builder.gep(self.array_data(builder, arr), [position]))
+        builder.ret_void()
+        return func
+
+    def _emit_js_array_push(self):
+        """void js_array_push(JSArray* arr, double value)"""
+        func, builder = self._new_function(
+            "js_array_push", self.void_type, [self.array_ptr_type, self.double_type], ["arr", "value"])
+        arr, value = func.args
+        length = self.array_length(builder, arr)
+        self.call(builder, "js_array_set", [arr, builder.uitofp(length, self.double_type), value])
+        builder.ret_void()
+        return func
+
+    def _emit_js_array_pop(self):
+        """double js_array_pop(JSArray* arr): remove o último elemento (NaN se vazio)."""
+        func, builder = self._new_function(
+            "js_array_pop", self.double_type, [self.array_ptr_type], ["arr"])
+        arr = func.args[0]
+        length = self.array_length(builder, arr)
+        with builder.if_then(builder.icmp_unsigned("==", length, self._i64(0)), likely=False):
+            builder.ret(self._nan())
+        last = builder.sub(length, self._i64(1), name="last")
+        self.store_field(builder, last, arr, 0)
+        builder.ret(builder.load(builder.gep(self.array_data(builder, arr), [last])))
+        return func
+
+    # -------------------
+    # Memoização
+    # -------------------
+
+    def memo_table(self, name, arity):
+        """Cria a tabela ``%JSMemo`` (interna) da função ``name``; chaves,
+        valores e carimbos ficam em globais zeradas do tamanho da tabela."""
+        capacity = self.MEMO_CAPACITY
+
+        def zeroed(suffix, ty, count):
+            array_type = ir.ArrayType(ty, count)
+            global_var = ir.GlobalVariable(self.module, array_type, name=f"{name}.memo.{suffix}")
+            global_var.linkage = "internal"
+            global_var.initializer = ir.Constant(array_type, None)
+            return global_var.gep([self._i32(0), self._i32(0)])
+
+        table = ir.GlobalVariable(self.module, self.memo_type, name=f"{name}.memo")
+        table.linkage = "internal"
+        table.initializer = ir.Constant(self.memo_type, [
+            ir.Constant(self.memo_ptr_type, None),
+            self._c_string(name, f".rt.memo.name.{name}"),
+            zeroed("keys", self.double_type, capacity * arity),
+            zeroed("values", self.double_type, capacity),
+            zeroed("stamps", self.int64_type, capacity),
+            self._i64(arity), self._i64(capacity - 1),
+            self._i64(0), self._i64(0), self._i64(0), self._i64(0),
+        ])
+        return table
+
+    def _memo_key_bits(self, builder, key, index):
+        return builder.bitcast(builder.load(builder.gep(key, [index])), self.int64_type)
+
+    def _emit_js_memo_slot(self):
+        """i64 js_memo_slot(JSMemo* m, double* key): posição inicial da chave.
+
+        Os bits baixos de um double inteiro são zero, então cada argumento
+        passa pelo misturador final do MurmurHash3 (fmix64)."""
+        func, builder = self._new_function(
+            "js_memo_slot", self.int64_type, [self.memo_ptr_type, self.double_type.as_pointer()],
+            ["m", "key"])
+        m, key = func.args
+        arity = self.load_field(builder, m, 5, name="arity")
+        preheader = builder.block
+        loop = func.append_basic_block("loop")
+        body = func.append_basic_block("body")
+        done = func.append_basic_block("done")
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        index = builder.phi(self.int64_type, name="i")
+        h = builder.phi(self.int64_type, name="h")
+        index.add_incoming(self._i64(0), preheader)
+        h.add_incoming(self._i64(_to_signed_64(FNV_OFFSET)), preheader)
+        builder.cbranch(builder.icmp_unsigned("<", index, arity), body, done)
+
+        builder.position_at_end(body)
+        next_h = builder.xor(h, self._memo_key_bits(builder, key, index))
+        for multiplier in (0xff51afd7ed558ccd, 0xc4ceb9fe1a85ec53):
+            next_h = builder.xor(next_h, builder.lshr(next_h, self._i64(33)))
+            next_h = builder.mul(next_h, self._i64(_to_signed_64(multiplier)))
+        next_h = builder.xor(next_h, builder.lshr(next_h, self._i64(33)), name="next_h")
+        index.add_incoming(builder.add(index, self._i64(1)), body)
+        h.add_incoming(next_h, body)
+        builder.branch(loop)
+
+        builder.position_at_end(done)
+        builder.ret(builder.and_(h, self.load_field(builder, m, 6, name="mask")))
+        return func
+
+    def _emit_js_memo_match(self):
+        """i1 js_memo_match(JSMemo* m, i64 slot, double* key): a entrada guarda
+        a chave (comparação dos bits: -0 e 0 são chaves diferentes)."""
+        func, builder = self._new_function(
+            "js_memo_match", self.bool_type,
+            [self.memo_ptr_type, self.int64_type, self.double_type.as_pointer()], ["m", "slot", "key"])
+        m, slot, key = func.args
+        arity = self.load_field(builder, m, 5, name="arity")
+        stored = builder.gep(self.load_field(builder, m, 2, name="keys"), [builder.mul(slot, arity)])
+        preheader = builder.block
+        loop = func.append_basic_block("loop")
+        body = func.append_basic_block("body")
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        index = builder.phi(self.int64_type, name="i")
+        index.add_incoming(self._i64(0), preheader)
+        with builder.if_then(builder.icmp_unsigned(">=", index, arity)):
+            builder.ret(ir.Constant(self.bool_type, 1))
+        builder.branch(body)
+
+        builder.position_at_end(body)
+        same = builder.icmp_unsigned("==", self._memo_key_bits(builder, stored, index),
+                                     self._memo_key_bits(builder, key, index))
+        with builder.if_then(builder.not_(same)):
+            builder.ret(ir.Constant(self.bool_type, 0))
+        index.add_incoming(builder.add(index, self._i64(1)), builder.block)
+        builder.branch(loop)
+        return func
+
+    def _memo_probe(self, builder, m, home, j):
+        """(posição, carimbo) da j-ésima posição da janela a partir de ``home``"""
+        slot = builder.and_(builder.add(home, j), self.load_field(builder, m, 6), name="slot")
+        stamp_ptr = builder.gep(self.load_field(builder, m, 4), [slot])
+        return slot, builder.load(stamp_ptr, name="stamp")
+
+    def _emit_js_memo_find(self):
+        """double* js_memo_find(JSMemo* m, double* key): valor guardado para a
+        chave, ou null (falta). Conta acertos e faltas."""
+        func, builder = self._new_function(
+            "js_memo_find", self.double_type.as_pointer(),
+            [self.memo_ptr_type, self.double_type.as_pointer()], ["m", "key"])
+        m, key = func.args
+        home = self.call(builder, "js_memo_slot", [m, key], "home")
+        preheader = builder.block
+        loop = func.append_basic_block("loop")
+        probe = func.append_basic_block("probe")
+        hit = func.append_basic_block("hit")
+        miss = func.append_basic_block("miss")
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        j = builder.phi(self.int64_type, name="j")
+        j.add_incoming(self._i64(0), preheader)
+        builder.cbranch(builder.icmp_unsigned("<", j, self._i64(self.MEMO_PROBE)), probe, miss)
+
+        builder.position_at_end(probe)
+        slot, stamp = self._memo_probe(builder, m, home, j)
+        with builder.if_then(builder.icmp_unsigned("==", stamp, self._i64(0))):
+            builder.branch(miss)
+        found = self.call(builder, "js_memo_match", [m, slot, key], "found")
+        next_block = builder.block
+        j.add_incoming(builder.add(j, self._i64(1)), next_block)
+        builder.cbranch(found, hit, loop)
+
+        builder.position_at_end(hit)
+        hits = self.field_ptr(builder, m, 8)
+        builder.store(builder.add(builder.load(hits), self._i64(1)), hits)
+        builder.ret(builder.gep(self.load_field(builder, m, 3), [slot]))
+
+        builder.position_at_end(miss)
+        misses = self.field_ptr(builder, m, 9)
+        builder.store(builder.add(builder.load(misses), self._i64(1)), misses)
+        builder.ret(ir.Constant(self.double_type.as_pointer(), None))
+        return func
+
+    def _emit_js_memo_store(self):
+        """void js_memo_store(JSMemo* m, double* key, double value): guarda o
+        resultado numa posição livre da janela ou no lugar da entrada mais
+        antiga dela. A tabela entra na lista do relatório no primeiro uso."""
+        func, builder = self._new_function(
+            "js_memo_store", self.void_type,
+            [self.memo_ptr_type, self.double_type.as_pointer(), self.double_type], ["m", "key", "value"])
+        m, key, value = func.args
+        home = self.call(builder, "js_memo_slot", [m, key], "home")
+        preheader = builder.block
+        loop = func.append_basic_block("loop")
+        probe = func.append_basic_block("probe")
+        evict = func.append_basic_block("evict")
+        write = func.append_basic_block("write")
+        builder.branch(loop)
+
+        # Janela: a primeira posição livre, ou a de menor carimbo
+        builder.position_at_end(loop)
+        j = builder.phi(self.int64_type, name="j")
+        victim = builder.phi(self.int64_type, name="victim")
+        oldest = builder.phi(self.int64_type, name="oldest")
+        j.add_incoming(self._i64(0), preheader)
+        victim.add_incoming(home, preheader)
+        oldest.add_incoming(self._i64(-1), preheader)
+        builder.cbranch(builder.icmp_unsigned("<", j, self._i64(self.MEMO_PROBE)), probe, evict)
+
+        builder.position_at_end(probe)
+        slot, stamp = self._memo_probe(builder, m, home, j)
+        empty = builder.icmp_unsigned("==", stamp, self._i64(0))
+        older = builder.icmp_unsigned("<", stamp, oldest)
+        j.add_incoming(builder.add(j, self._i64(1)), probe)
+        victim.add_incoming(builder.select(older, slot, victim), probe)
+        oldest.add_incoming(builder.select(older, stamp, oldest), probe)
+        builder.cbranch(empty, write, loop)
+
+        builder.position_at_end(evict)
+        evictions = self.field_ptr(builder, m, 10)
+        builder.store(builder.add(builder.load(evictions), self._i64(1)), evictions)
+        builder.branch(write)
+
+        builder.position_at_end(write)
+        chosen = builder.phi(self.int64_type, name="chosen")
+        chosen.add_incoming(slot, probe)
+        chosen.add_incoming(victim, evict)
+        clock = self.load_field(builder, m, 7, name="clock")
+        with builder.if_then(builder.icmp_unsigned("==", clock, self._i64(0))):
+            tables = self.state_global("js_memo_tables", self.memo_ptr_type)
+            self.store_field(builder, builder.load(tables), m, 0)
+            builder.store(m, tables)
+        stamp = builder.add(clock, self._i64(1), name="new_stamp")
+        self.store_field(builder, stamp, m, 7)
+        builder.store(stamp, builder.gep(self.load_field(builder, m, 4), [chosen]))
+        builder.store(value, builder.gep(self.load_field(builder, m, 3), [chosen]))
+        arity = self.load_field(builder, m, 5, name="arity")
+        stored = builder.gep(self.load_field(builder, m, 2, name="keys"), [builder.mul(chosen, arity)])
+        copy_pre = builder.block
+        copy = func.append_basic_block("copy")
+        copy_body = func.append_basic_block("copy_body")
+        done = func.append_basic_block("done")
+        builder.branch(copy)
+
+        builder.position_at_end(copy)
+        index = builder.phi(self.int64_type, name="i")
+        index.add_incoming(self._i64(0), copy_pre)
+        builder.cbranch(builder.icmp_unsigned("<", index, arity), copy_body, done)
+
+        builder.position_at_end(copy_body)
+        builder.store(builder.load(builder.gep(key, [index])), builder.gep(stored, [index]))
+        index.add_incoming(builder.add(index, self._i64(1)), copy_body)
+        builder.branch(copy)
+
+        builder.position_at_end(done)
+        builder.ret_void()
+        return func
+
+    def _emit_js_memo_report(self):
+        """void js_memo_report(): acertos/faltas/despejos de cada tabela usada."""
+        func, builder = self._new_function("js_memo_report", self.void_type, [], [])
+        printf = self.declare_c_function("printf", self.int32_type, [self.i8_ptr_type], var_arg=True)
+        fmt = self._c_string("[memo] %s: %lld acertos, %lld faltas, %lld despejos\n",
+                             ".rt.fmt.memo_report")
+        tables = self.state_global("js_memo_tables", self.memo_ptr_type)
+        preheader = builder.block
+        loop = func.append_basic_block("loop")
+        body = func.append_basic_block("body")
+        done = func.append_basic_block("done")
+        first = builder.load(tables, name="first")
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        m = builder.phi(self.memo_ptr_type, name="m")
+        m.add_incoming(first, preheader)
+        builder.cbranch(builder.icmp_unsigned("!=", m, ir.Constant(self.memo_ptr_type, None)), body, done)
+
+        builder.position_at_end(body)
+        builder.call(printf, [fmt] + [self.load_field(builder, m, index) for index in (1, 8, 9, 10)])
+        m.add_incoming(self.load_field(builder, m, 0, name="next"), body)
+        builder.branch(loop)
+
+        builder.position_at_end(done)
+        builder.ret_void()
+        return func
+
+    # -------------------
+    # PGO
+    # -------------------
+
+    def profile_counters(self, site, count):
+        """Global ``[count x i64]`` com os contadores do ponto ``site``"""
+        return self.state_global(self.PGO_COUNTER_PREFIX + site, ir.ArrayType(self.int64_type, count))
+
+    def profile_sites(self):
+        """[(ponto, contadores)] dos pontos criados neste módulo"""
+        prefix = self.PGO_COUNTER_PREFIX
+        return [(name[len(prefix):], global_var.value_type.count)
+                for name, global_var in self._globals.items() if name.startswith(prefix)]
+
+    def define_profile_writer(self, path, header, sites):
+        """Corpo de ``void js_pgo_write()``, declarada pela main do build
+        instrumentado: anexa a ``path`` a linha ``# header`` e uma linha
+        ``ponto c0 c1...`` por ponto de ``sites`` [(ponto, contadores)].
+        Os pontos só são conhecidos depois de gerar todas as funções (no
+        modo dividido, num módulo à parte que declara os contadores)."""
+        func = self.declare_c_function("js_pgo_write", self.void_type, [])
+        if not self.shared:
+            func.linkage = "internal"
+        fopen = self.declare_c_function("fopen", self.i8_ptr_type, [self.i8_ptr_type, self.i8_ptr_type])
+        fprintf = self.declare_c_function("fprintf", self.int32_type, [self.i8_ptr_type, self.i8_ptr_type],
+                                          var_arg=True)
+        fclose = self.declare_c_function("fclose", self.int32_type, [self.i8_ptr_type])
+        builder = ir.IRBuilder(func.append_basic_block("entry"))
+        write = func.append_basic_block("write")
+        done = func.append_basic_block("done")
+        profile_file = builder.call(fopen, [self._c_string(path, ".rt.pgo.path"),
+                                            self._c_string("a", ".rt.pgo.mode")], name="file")
+        builder.cbranch(builder.icmp_unsigned("!=", profile_file, ir.Constant(self.i8_ptr_type, None)),
+                        write, done)
+
+        builder.position_at_end(write)
+        builder.call(fprintf, [profile_file, self._c_string(f"# {header}\n", ".rt.pgo.header")])
+        for index, (site, count) in enumerate(sites):
+            counters = self.module.globals.get(self.PGO_COUNTER_PREFIX + site)
+            if counters is None:
+                counters = ir.GlobalVariable(self.module, ir.ArrayType(self.int64_type, count),
+                                             name=self.PGO_COUNTER_PREFIX + site)
+            values = [builder.load(builder.gep(counters, [self._i32(0), self._i32(slot)]))
+                      for slot in range(count)]
+            fmt = self._c_string(site + " %llu" * count + "\n", f".rt.pgo.site.{index}")
+            builder.call(fprintf, [profile_file, fmt] + values)
+        builder.call(fclose, [profile_file])
+        builder.branch(done)
+
+        builder.position_at_end(done)
+        builder.ret_void()
+        return func
+
+    # -------------------
+    # Nível da CPU (multiversão)
+    # -------------------
+
+    # Bits do cpuid exigidos por x86-64-v3 (folha 1 ecx; folha 7 ebx;
+    # folha 0x80000001 ecx) e, além deles, por x86-64-v4 (folha 7 ebx)
+    CPU_V3_LEAF1 = (1 << 12) | (1 << 22) | (1 << 27) | (1 << 28) | (1 << 29)  # FMA MOVBE OSXSAVE AVX F16C
+    CPU_V3_LEAF7 = (1 << 3) | (1 << 5) | (1 << 8)                           # BMI1 AVX2 BMI2
+    CPU_V3_EXTENDED = 1 << 5                                                # LZCNT
+    CPU_V4_LEAF7 = (1 << 16) | (1 << 17) | (1 << 28) | (1 << 30) | (1 << 31)  # AVX-512 F DQ CD BW VL
+    # Estados salvos pelo SO (xcr0): SSE+AVX e, para AVX-512, opmask/ZMM
+    CPU_V3_XCR0 = 0x06
+    CPU_V4_XCR0 = 0xE6
+
+    def _cpuid(self, builder, leaf):
+        """[eax, ebx, ecx, edx] de ``cpuid`` com ``leaf`` (subfolha 0)"""
+        result_type = ir.LiteralStructType([self.int32_type] * 4)
+        cpuid = ir.InlineAsm(ir.FunctionType(result_type, [self.int32_type, self.int32_type]),
+                             "cpuid", "={ax},={bx},={cx},={dx},{ax},{cx}")
+        result = builder.call(cpuid, [self._i32(leaf), self._i32(0)])
+        return [builder.extract_value(result, index) for index in range(4)]
+
+    def _has_bits(self, builder, value, bits):
+        mask = ir.Constant(self.int32_type, bits)
+        return builder.icmp_unsigned("==", builder.and_(value, mask), mask)
+
+    def _emit_js_cpu_level(self):
+        """i32 js_cpu_level(): nível x86-64 da CPU (0, 1 = v3, 2 = v4).
+
+        Guarda nível + 1 em ``js_cpu_level_cache`` (zero = ainda não lido),
+        então só a primeira chamada executa ``cpuid``/``xgetbv``."""
+        func, builder = self._new_function("js_cpu_level", self.int32_type, [], [])
+        cache = self.state_global("js_cpu_level_cache", self.int32_type, 0)
+        detect = func.append_basic_block("detect")
+        os_state = func.append_basic_block("os_state")
+        done = func.append_basic_block("done")
+        cached = func.append_basic_block("cached")
+        known = builder.load(cache, name="known")
+        builder.cbranch(builder.icmp_unsigned("!=", known, self._i32(0)), cached, detect)
+
+        builder.position_at_end(cached)
+        builder.ret(builder.sub(known, self._i32(1)))
+
+        # Folhas além do máximo devolvem lixo: zera os bits delas
+        builder.position_at_end(detect)
+        max_leaf = self._cpuid(builder, 0)[0]
+        max_extended = self._cpuid(builder, 0x80000000)[0]
+        leaf1_ecx = self._cpuid(builder, 1)[2]
+        leaf7_ebx = builder.select(builder.icmp_unsigned(">=", max_leaf, self._i32(7)),
+                                   self._cpuid(builder, 7)[1], self._i32(0))
+        extended_ecx = builder.select(builder.icmp_unsigned(">=", max_extended, self._i32(0x80000001)),
+                                      self._cpuid(builder, 0x80000001)[2], self._i32(0))
+        v3_cpu = builder.and_(builder.and_(self._has_bits(builder, leaf1_ecx, self.CPU_V3_LEAF1),
+                                           self._has_bits(builder, leaf7_ebx, self.CPU_V3_LEAF7)),
+                              self._has_bits(builder, extended_ecx, self.CPU_V3_EXTENDED))
+        v4_cpu = self._has_bits(builder, leaf7_ebx, self.CPU_V4_LEAF7)
+        # xgetbv só existe com OSXSAVE (incluído em CPU_V3_LEAF1)
+        builder.cbranch(v3_cpu, os_state, done)
+
+        builder.position_at_end(os_state)
+        xgetbv = ir.InlineAsm(ir.FunctionType(ir.LiteralStructType([self.int32_type] * 2),
+                                              [self.int32_type]),
+                              "xgetbv", "={ax},={dx},{cx}")
+        xcr0 = builder.extract_value(builder.call(xgetbv, [self._i32(0)]), 0)
+        v3 = self._has_bits(builder, xcr0, self.CPU_V3_XCR0)
+        v4 = builder.and_(v4_cpu, self._has_bits(builder, xcr0, self.CPU_V4_XCR0))
+        os_level = builder.select(v4, self._i32(2), builder.zext(v3, self.int32_type))
+        builder.branch(done)
+
+        builder.position_at_end(done)
+        level = builder.phi(self.int32_type, name="level")
+        level.add_incoming(self._i32(0), detect)
+        level.add_incoming(os_level, os_state)
+        builder.store(builder.add(level, self._i32(1)), cache)
+        builder.ret(level)
+        return func
@@ -0,0 +1,89 @@
+# specialize.py - Especialização de funções pelos tipos dos argumentos
+
+from parser import (
+    VarDecl, FuncDecl, ReturnStmt, Identifier, Literal, Unary, Binary, Assign,
+    Call, ArrayLiteral, children
+)
+
+# Tipos de argumento de um clone. Os números do codegen são sempre double
+# (não há inteiros no IR), então "número" é um tipo só
+KINDS = ('double', 'bool', 'string', 'array')
+
+# Limite de clones por função; acima dele a chamada usa a versão genérica
+MAX_CLONES_PER_FUNCTION = 4
+
+# Atributos que continuam válidos quando o clone recebe strings/arrays: o
+# EffectAnalyzer supõe argumentos double, e com ponteiros o corpo passa a
+# ler (comparação) ou escrever (concatenação, arena) memória
+POINTER_SAFE_ATTRIBUTES = {'nounwind', 'norecurse'}
+
+
+def clone_name(name, kinds):
+    """Nome LLVM do clone: ``f.string.double``"""
+    return ".".join((name,) + tuple(kinds))
+
+
+def parse_clone_name(name):
+    """(nome genérico, tipos) de um nome gerado por clone_name, ou None"""
+    base, *kinds = name.split(".")
+    if kinds and all(kind in KINDS for kind in kinds):
+        return base, tuple(kinds)
+    return None
+
+
+def clone_attributes(effects, kinds):
+    if all(kind in ('double', 'bool') for kind in kinds):
+        return tuple(effects)
+    return tuple(attribute for attribute in effects if attribute in POINTER_SAFE_ATTRIBUTES)
+
+
+def return_shape(func_decl: FuncDecl):
+    """Tipos simbólicos dos ``return`` da função (sem as aninhadas).
+
+    Cada tipo é um de KINDS, ``('param', i)`` ou ``('plus', a, b)``; o
+    codegen os resolve para os tipos de cada versão da função (ver
+    LLVMCodeGenerator._return_type). Depende só da AST da função (globais
+    contam como double: o protótipo é declarado antes delas existirem),
+    então é igual em todos os módulos e entra na chave do cache
+    incremental de quem a chama.
+    """
+    env = {param.name: ('param', index) for index, param in enumerate(func_decl.params)}
+    shape = []
+    _collect_returns(func_decl.body, env, shape)
+    return tuple(shape)
+
+
+def _collect_returns(node, env, shape):
+    if isinstance(node, FuncDecl):
+        return
+    if isinstance(node, VarDecl):
+        env[node.name.name] = _kind(node.initializer, env) if node.initializer is not None else 'double'
+        return
+    if isinstance(node, ReturnStmt):
+        shape.append(_kind(node.value, env) if node.value is not None else 'double')
+        return
+    for item in children(node):
+        _collect_returns(item, env, shape)
+
+
+def _kind(expr, env):
+    if isinstance(expr, Literal):
+        if isinstance(expr.value, str):
+            return 'string'
+        return 'bool' if isinstance(expr.value, bool) else 'double'
+    if isinstance(expr, ArrayLiteral):
+        return 'array'
+    if isinstance(expr, Identifier):
+        return env.get(expr.name, 'double')
+    if isinstance(expr, Binary):
+        if expr.operator == '+':
+            return ('plus', _kind(expr.left, env), _kind(expr.right, env))
+        return 'double' if expr.operator in ('-', '*', '/', '%') else 'bool'
+    if isinstance(expr, Unary):
+        return 'bool' if expr.operator == '!' else 'double'
+    if isinstance(expr, Assign):
+        return _kind(expr.value, env)
+    if isinstance(expr, Call):
+        if isinstance(expr.callee, Identifier) and expr.callee.name in ('concat', 'input'):
+            return 'string'
+    return 'double'
@@ -0,0 +1,638 @@
+import re
+import pytest
+import llvmlite.binding as llvm
+from lexer import Lexer
+from parser import Parser, Binary, IfStmt, Literal, ExprStmt, VarDecl, FuncDecl
+from analisadorSintatico import SemanticAnalyzer, ParallelSemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from folding import ConstantFolder, count_nodes
+from deadcode import DeadCodeEliminator
+from callgraph import CallGraph
+from effects import EffectAnalyzer
+from escape import EscapeAnalyzer
+from incremental import FunctionCache
+from partial import PartialEvaluator, MAX_CALL_STEPS
+from pgo import profile_path, raw_profile_path, update_profile
+
+
+def _analisar(codigo_fonte):
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    assert SemanticAnalyzer().analyze(program) == []
+    return program
+
+
+def _executar(program, capfd):
+    """Executa via JIT e retorna (IR, linhas impressas pelo programa)."""
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    ir_code = generator.generate_code(program)
+    capfd.readouterr()
+    generator.run_jit()
+    return ir_code, capfd.readouterr().out.strip().splitlines()
+
+
+def testar_dobramento_de_constantes(capfd):
+    codigo_fonte = """
+    const N = 4;
+    const NOME = "ab" + "cd";
+    var k = 5 * 10;
+    var z = k + 0;
+    function f(x) { if (false) { return 0; } return x * N + z; }
+    if (N > 3) { println(f(2)); } else { println(0); }
+    while (N < 0) { println(1); }
+    println("x" + (N == 4));
+    println(NOME);
+    println(-7 % 3);
+    """
+
+    print("=== TESTE DO DOBRAMENTO DE CONSTANTES ===")
+    esperado = ["58", "xtrue", "abcd", "-1"]
+    _, saida_original = _executar(_analisar(codigo_fonte), capfd)
+    assert saida_original == esperado
+
+    program = _analisar(codigo_fonte)
+    antes = count_nodes(program)
+    report = ConstantFolder().fold(program)
+    # if/while do topo e o if(false) dentro de f podados
+    assert report['pruned'] == 3
+    assert report['removed'] == antes - count_nodes(program) > 0
+    funcao = program.statements[4]
+    retorno = funcao.body.statements[0].value
+    assert isinstance(retorno, Binary)
+    # x * N + z  ->  x * 4 + 50
+    assert isinstance(retorno.left.right, Literal) and retorno.left.right.value == 4
+    assert retorno.right.value == 50.0
+    assert not any(isinstance(stmt, IfStmt) for stmt in program.statements)
+    assert program.statements[-1].expr.args[0].value == -1.0
+
+    _, saida = _executar(program, capfd)
+    assert saida == esperado
+    print("✅ Expressões dobradas, constantes propagadas e desvios podados")
+
+
+def testar_codigo_morto(capfd):
+    codigo_fonte = """
+    function f(n) {
+        var lixo = n * 2;
+        var t = 0;
+        t = g(n);
+        var x = 1;
+        x = 2;
+        x = 3;
+        if (n > 0) { return x + n; } else { return 0; }
+        println(99);
+    }
+    function g(n) { println(n); return n; }
+    println(f(5));
+    """
+
+    print("=== TESTE DE ELIMINAÇÃO DE CÓDIGO MORTO ===")
+    esperado = ["5", "8"]
+    _, saida_original = _executar(_analisar(codigo_fonte), capfd)
+    assert saida_original == esperado
+
+    program = _analisar(codigo_fonte)
+    antes = count_nodes(program)
+    report = DeadCodeEliminator().eliminate(program)
+    assert report == {'unreachable': 1, 'dead_vars': 2, 'dead_stores': 2,
+                      'removed': antes - count_nodes(program)}
+    corpo = program.statements[0].body.statements
+    # Sobram: g(n) (tem efeito), var x, x = 3 e o if
+    assert [type(stmt) for stmt in corpo] == [ExprStmt, VarDecl, ExprStmt, IfStmt]
+    assert corpo[2].expr.value.value == 3
+
+    ir_code, saida = _executar(program, capfd)
+    assert saida == esperado
+    assert "lixo" not in ir_code and "%t" not in ir_code
+    print("✅ Código inalcançável, variáveis não lidas e stores mortos removidos")
+
+
+def testar_grafo_de_chamadas(capfd):
+    codigo_fonte = """
+    function par(n) { if (n == 0) { return 1; } return impar(n - 1); }
+    function impar(n) { if (n == 0) { return 0; } return par(n - 1); }
+    function fat(n) {
+        function nunca(x) { return x; }
+        if (n < 2) { return 1; }
+        return n * fat(n - 1);
+    }
+    function morta(x) { return auxiliar(x) + 1; }
+    function auxiliar(x) { return x * 2; }
+    println(par(10) + fat(5));
+    """
+
+    print("=== TESTE DO GRAFO DE CHAMADAS ===")
+    program = _analisar(codigo_fonte)
+    grafo = CallGraph(program)
+    assert grafo.callees(CallGraph.MAIN) == ["fat", "par"]
+    assert grafo.callers("impar") == ["par"]
+    assert (grafo.fan_in("par"), grafo.fan_out("par")) == (2, 1)
+    assert (grafo.fan_in("auxiliar"), grafo.fan_out("morta")) == (1, 1)
+    assert ["impar", "par"] in grafo.sccs()
+    assert grafo.is_recursive("fat") and grafo.is_recursive("impar")
+    assert not grafo.is_recursive("auxiliar")
+    assert "Recursão (SCCs): {auxiliar}" not in grafo.dump()
+
+    assert grafo.prune(program) == ["morta", "auxiliar", "fat.nunca"]
+    assert [stmt.name.name for stmt in program.statements[:3]] == ["par", "impar", "fat"]
+    assert len(program.statements[2].body.statements) == 2
+
+    ir_code, saida = _executar(program, capfd)
+    assert saida == ["121"]
+    assert "@\"morta\"" not in ir_code and "@\"auxiliar\"" not in ir_code
+    assert "nunca" not in ir_code
+    print("✅ Grafo de chamadas construído e funções inalcançáveis removidas")
+
+
+def testar_atributos_de_efeito(tmp_path, capfd):
+    codigo_fonte = """
+    var G = 10;
+    function pura(x, y) { return x * y + 1; }
+    function le(x) { return x + G; }
+    function escreve(x) { println(x); return x; }
+    function fat(n) { if (n < 2) { return 1; } return n * fat(n - 1); }
+    function laco(n) { var t = 0; while (t < n) { t = t + 1; } return t; }
+    function usa(x) { return pura(x, x) + pura(x, x) + le(x); }
+    println(usa(2) + fat(4) + laco(3) + escreve(1));
+    """
+
+    print("=== TESTE DOS ATRIBUTOS DE EFEITO ===")
+    program = _analisar(codigo_fonte)
+    report = EffectAnalyzer().analyze(program)
+    efeitos = {stmt.name.name: stmt.effects for stmt in program.statements
+               if hasattr(stmt, 'effects')}
+    assert efeitos == {
+        'pura': ('norecurse', 'nounwind', 'readnone', 'willreturn'),
+        'le': ('norecurse', 'nounwind', 'readonly', 'willreturn'),
+        'escreve': ('norecurse', 'nounwind'),
+        'fat': ('nounwind', 'readnone'),
+        'laco': ('norecurse', 'nounwind', 'readnone'),
+        'usa': ('norecurse', 'nounwind', 'readonly', 'willreturn'),
+    }
+    assert report == {'readnone': 3, 'readonly': 2, 'norecurse': 5, 'willreturn': 3}
+
+    # Modo dividido: usa só enxerga a declaração de pura, com os atributos
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2,
+                                  cache=FunctionCache(tmp_path))
+    ir_code = generator.generate_code(program)
+    corpo_usa = ir_code.split("define double @usa(", 1)[1].split("\n}", 1)[0]
+    assert corpo_usa.count("@pura(") == 1
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.split() == ["1", "50"]
+
+    # Global inicializada por chamada: o tipo vem do retorno do clone chamado
+    program = _analisar("""
+    function mk(s) { return s; }
+    var texto = mk("ab");
+    var numero = mk(4);
+    function h() { return length(texto); }
+    function k() { return numero + 1; }
+    println(h()); println(k());
+    """)
+    EffectAnalyzer().analyze(program)
+    assert program.statements[3].effects == ('norecurse', 'nounwind')
+    assert program.statements[4].effects == ('norecurse', 'nounwind', 'readonly', 'willreturn')
+    _, saida = _executar(program, capfd)
+    assert saida == ["2", "5"]
+    print("✅ Efeitos deduzidos e chamadas repetidas a funções puras unificadas")
+
+
+def testar_especializacao_por_tipos(tmp_path, capfd):
+    codigo_fonte = """
+    function saudacao(nome, n) { var s = "Olá, " + nome; if (n > 1) { return s + "!"; } return s; }
+    function tamanho(v) { return length(v); }
+    function nega(b) { if (b) { return 0; } return 1; }
+    function soma(a, b) { return a + b; }
+    println(saudacao("Ana", 2));
+    println(tamanho([1, 2, 3]) + tamanho("abcd"));
+    println(nega(true) + nega(false) + nega(3));
+    println(soma("a", "b"));
+    println(soma(1, 2));
+    """
+    esperado = ["Olá, Ana!", "7", "1", "ab", "3"]
+
+    print("=== TESTE DA ESPECIALIZAÇÃO POR TIPOS ===")
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    ir_code = generator.generate_code(_analisar(codigo_fonte))
+    assert generator.clone_report == {
+        'saudacao': [('string', 'double')],
+        'tamanho': [('array',), ('string',)],
+        'nega': [('bool',)],
+        'soma': [('string', 'string')],
+    }
+    assert 'define internal %"JSString"* @"saudacao.string.double"(%"JSString"* %"nome", double %"n")' in ir_code
+    assert 'define internal double @"nega.bool"(i1 %"b")' in ir_code
+    # Só chamada com array/string: a genérica fica só declarada
+    assert 'declare double @"tamanho"(double %"v")' in ir_code
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.splitlines() == esperado
+
+    # Modo dividido: os clones vêm de um módulo à parte
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2,
+                                  cache=FunctionCache(tmp_path))
+    generator.generate_code(_analisar(codigo_fonte))
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.splitlines() == esperado
+
+    # Limite de clones: bool volta para a genérica; string é erro
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0, max_clones=0)
+    generator.generate_code(_analisar("function f(a) { return a; } println(f(true));"))
+    assert generator.clone_fallbacks == 1
+    try:
+        LLVMCodeGenerator(max_clones=0).generate_code(_analisar(codigo_fonte))
+        assert False, "limite de clones deveria impedir a chamada com string"
+    except ValueError as erro:
+        assert "Limite de 0 especializações" in str(erro)
+
+    # Genérica chamada com número: o mesmo erro nos dois modos (e do cache)
+    for opcoes in ({}, {'jobs': 2}, {'cache': FunctionCache(tmp_path)}, {'cache': FunctionCache(tmp_path)}):
+        try:
+            LLVMCodeGenerator(**opcoes).generate_code(
+                _analisar("function f(a) { return length(a); } println(f(5));"))
+            assert False, "f(5) deveria ser erro"
+        except ValueError as erro:
+            assert str(erro) == "Chamada de função não suportada: Call(Id(length), [Id(a)])", opcoes
+    print("✅ Clones por tipos de argumento, genérica como fallback e limite respeitado")
+
+
+def testar_chamadas_de_cauda(tmp_path, capfd):
+    codigo_fonte = """
+    function soma(n, acc) { if (n == 0) { return acc; } var proximo = acc + n; return soma(n - 1, proximo); }
+    function par(n) { if (n == 0) { return 1; } return impar(n - 1); }
+    function impar(n) { if (n == 0) { return 0; } return par(n - 1); }
+    function repete(s, n) { if (n == 0) { return length(s); } var t = s + "!"; return repete(s, n - 1); }
+    println(soma(10000000, 0));
+    println(par(10000001));
+    println(repete("abc", 1000000));
+    """
+    esperado = ["5e+13", "0", "3"]
+
+    print("=== TESTE DAS CHAMADAS DE CAUDA ===")
+    # 10 milhões de níveis: só cabem na pilha como laço / musttail, mesmo em O0
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    ir_code = generator.generate_code(_analisar(codigo_fonte))
+    assert generator.tail_loops == ["soma", "repete"]
+    soma = ir_code.split('define double @"soma"(')[1].split("\n}")[0]
+    assert "tailrecurse:" in soma and "call double @\"soma\"" not in soma
+    assert 'musttail call double @"impar"' in ir_code
+    assert 'musttail call double @"par"' in ir_code
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.splitlines() == esperado
+
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2,
+                                  cache=FunctionCache(tmp_path))
+    generator.generate_code(_analisar(codigo_fonte))
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.splitlines() == esperado
+
+    # --memoize: recursões só em cauda ficam sem tabela, que impediria o musttail
+    program = _analisar(codigo_fonte)
+    analyzer = EffectAnalyzer(memoize=True)
+    analyzer.analyze(program)
+    assert analyzer.memoized == []
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    ir_code = generator.generate_code(program)
+    assert 'musttail call double @"impar"' in ir_code
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.splitlines() == esperado
+    print("✅ Recursão em cauda com pilha constante")
+
+
+def testar_memoizacao(tmp_path, capfd):
+    codigo_fonte = """
+    // @memo
+    function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }
+    function caminhos(x, y) { if (x == 0 || y == 0) { return 1; } return caminhos(x - 1, y) + caminhos(x, y - 1); }
+    var base = 3;
+    // @memo
+    function desloca(n) { return n + base; }
+    function usa(n) { return fib(n) + 1; }
+    println(fib(80));
+    println(caminhos(16, 16));
+    println(desloca(1));
+    println(usa(10));
+    """
+    esperado = ["2.34167e+16", "6.0108e+08", "4", "56"]
+
+    print("=== TESTE DA MEMOIZAÇÃO ===")
+    # Só a anotação: caminhos é pura, mas não foi pedida; desloca lê uma global
+    program = _analisar(codigo_fonte)
+    analyzer = EffectAnalyzer()
+    analyzer.analyze(program)
+    assert analyzer.memoized == ["fib"] and analyzer.memo_rejected == ["desloca"]
+    funcoes = {stmt.name.name: stmt for stmt in program.statements if isinstance(stmt, FuncDecl)}
+    # A tabela é memória escrita: fib e quem a chama perdem readnone
+    assert funcoes["fib"].effects == ("nounwind",)
+    assert "readnone" not in funcoes["usa"].effects
+    assert "readnone" in funcoes["caminhos"].effects
+
+    # --memoize: todas as recursivas puras; fib(80) ingênuo não terminaria
+    program = _analisar(codigo_fonte)
+    analyzer = EffectAnalyzer(memoize=True)
+    analyzer.analyze(program)
+    assert analyzer.memoized == ["fib", "caminhos"]
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0, memo_stats=True)
+    generator.generate_code(program)
+    capfd.readouterr()
+    generator.run_jit()
+    saida = capfd.readouterr().out.splitlines()
+    assert saida[:4] == esperado
+    assert sorted(saida[4:]) == ["[memo] caminhos: 225 acertos, 288 faltas, 0 despejos",
+                                 "[memo] fib: 79 acertos, 81 faltas, 0 despejos"]
+
+    # Modo dividido (cache): tabelas nos módulos das funções, relatório na main
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, memo_stats=True,
+                                  cache=FunctionCache(tmp_path))
+    generator.generate_code(program)
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.splitlines()[:4] == esperado
+    print("✅ Funções puras memoizadas, tabela limitada e contadores no relatório")
+
+
+def testar_avaliacao_parcial(capfd):
+    codigo_fonte = """
+    function soma_ate(limite) {
+        var total = 0;
+        for (var i = 1; i <= limite; i = i + 1) { total = total + i; }
+        return total;
+    }
+    function fat(n) { if (n <= 1) { return 1; } return n * fat(n - 1); }
+    function maior(a, b) { var m = false; if (a > b) { m = true; } if (m) { return a; } return b; }
+    function infinito(n) { while (n > 0) { n = n + 1; } return n; }
+    var base = 4;
+    function usa_global(n) { return n * base; }
+    println(soma_ate(100) + fat(10));
+    println(maior(fat(3), 5));
+    println(infinito(0));
+    var liga = 0;
+    liga = 0;
+    if (liga > 0) { println(infinito(1)); }
+    base = 5;
+    println(usa_global(2));
+    """
+    esperado = ["3.63385e+06", "6", "0", "10"]
+
+    print("=== TESTE DA AVALIAÇÃO PARCIAL ===")
+    program = _analisar(codigo_fonte)
+    ConstantFolder().fold(program)
+    EffectAnalyzer().analyze(program)
+    report = PartialEvaluator(budget=50000).evaluate(program)
+    # soma_ate, fat(10), fat(3), maior e infinito(0); infinito(1) não termina
+    # e esgota os passos da chamada; usa_global lê uma global (não é pura)
+    assert report['folded'] == 5 and report['aborted'] == 1
+    assert 0 < report['steps'] < 50000 - MAX_CALL_STEPS
+    _, linhas = _executar(program, capfd)
+    soma = program.statements[6].expr.args[0]
+    assert isinstance(soma.left, Literal) and isinstance(soma.right, Literal)
+    assert linhas == esperado
+
+    # Orçamento zero: nada é dobrado e o resultado é o mesmo
+    program = _analisar(codigo_fonte)
+    EffectAnalyzer().analyze(program)
+    assert PartialEvaluator(budget=0).evaluate(program)['folded'] == 0
+    assert _executar(program, capfd)[1] == esperado
+    print("✅ Chamadas puras com argumentos constantes avaliadas em tempo de compilação")
+
+
+
+def testar_analise_paralela_mesmo_ir():
+    codigo_fonte = """
+    var base = 3;
+    function quadrado(x) { let y = x * x; return y; }
+    function soma(n) { var t = 0; for (let i = 0; i < n; i = i + 1) { t = t + quadrado(i); } return t; }
+    function nunca() { return 1; }
+    function lista(n) { var a = [1, 2]; push(a, n); return length(a) + base; }
+    function texto(s) { var lixo = 1; if (s == "") { let v = 0; return v; } return length(concat(s, "x")); }
+    println(soma(5));
+    println(lista(4));
+    println(texto("ab"));
+    println(quadrado(base));
+    """
+
+    def gerar_ir(analyzer):
+        # Mesmos passes do compile.py: todos dependem dos símbolos da análise
+        program = Parser(Lexer(codigo_fonte)).parse_program()
+        assert analyzer.analyze(program) == []
+        ConstantFolder().fold(program)
+        DeadCodeEliminator().eliminate(program)
+        call_graph = CallGraph(program)
+        call_graph.prune(program)
+        EffectAnalyzer().analyze(program, call_graph)
+        PartialEvaluator().evaluate(program)
+        CallGraph(program).prune(program)
+        EscapeAnalyzer().analyze(program)
+        return LLVMCodeGenerator(optimization_level=OptimizationLevel.O0).generate_code(program)
+
+    print("=== TESTE DO IR COM ANÁLISE SEMÂNTICA PARALELA ===")
+    esperado = gerar_ir(SemanticAnalyzer())
+    assert '@"nunca"' not in esperado and '@"quadrado"(double 0x4008' not in esperado
+    for executor in ("process", "thread"):
+        assert gerar_ir(ParallelSemanticAnalyzer(workers=4, executor=executor)) == esperado, executor
+    print("✅ -j 4 gera o mesmo IR que -j 1, com processos e threads")
+
+
+def testar_switch(capfd):
+    codigo_fonte = """
+    function classifica(op) {
+        if (op == 1) { return 10; } else if (op == 2) { return 20; }
+        else if (3 == op) { return 30; } else if (op == -4) { return 40; }
+        else if (op > 100) { return 50; } else { return 60; }
+    }
+    function sem_else(op) {
+        var r = 0;
+        if (op == 0) { r = 1; } else if (op == 1) { r = 2; } else if (op == 2) { r = 3; }
+        else if (op == 3) { r = 4; }
+        return r;
+    }
+    function curta(op) { if (op == 0) { return 1; } else if (op == 1) { return 2; } return 3; }
+    println(classifica(1)); println(classifica(3)); println(classifica(-4));
+    println(classifica(2.5)); println(classifica(0 / 0)); println(classifica(1000));
+    println(classifica(123456789012345678901));
+    println(sem_else(3)); println(sem_else(9)); println(curta(1));
+    """
+
+    print("=== TESTE DO SWITCH ===")
+    ir_code, saida = _executar(_analisar(codigo_fonte), capfd)
+    # classifica: 4 constantes antes de 'op > 100'; sem_else: 4; curta: só 2
+    assert ir_code.count("switch i64") == 2
+    # Não inteiro e fora da faixa caem no else; NaN é '==' a tudo (unordered)
+    assert saida == ["10", "30", "40", "60", "10", "50", "50", "4", "0", "2"]
+    print("✅ Cadeias if/else-if sobre constantes inteiras viram switch")
+
+
+def testar_dicas_de_laco(capfd):
+    codigo_fonte = """
+    function f(n) {
+        var t = 0;
+        // @unroll(4)
+        for (var k = 0; k < 1000; k = k + 1) { t = t + k * n; }
+        // @novectorize
+        // @nounroll
+        while (t > 1) { t = t / 3; }
+        // @unrol
+        while (false) { t = 100; }
+        while (true) { t = t + 1; if (t > 2) { return t; } }
+    }
+    println(f(3));
+    """
+
+    print("=== TESTE DAS DICAS DE LAÇO ===")
+    ir_code, saida = _executar(_analisar(codigo_fonte), capfd)
+    assert saida == ["2.9399"]
+    # Rotacionados: a condição é testada na guarda e no latch, que leva as dicas
+    assert ir_code.count("for_latch_") >= 2 and "for_cond_" not in ir_code
+    assert '!"js.loop.hints", !"f#1", !"unroll(4)"' in ir_code
+    assert '!"llvm.loop.unroll.count", i32 4' in ir_code
+    assert '!"llvm.loop.vectorize.enable", i1 0' in ir_code
+
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2)
+    generator.generate_code(_analisar(codigo_fonte))
+    assert generator.rejected_loop_hints == ["unrol"]
+    assert generator.loop_remarks() == [
+        ("f#1", "unroll(4)", True), ("f#2", "novectorize", True), ("f#2", "nounroll", True)]
+    # Em O0 nenhum passo de laço roda
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    generator.generate_code(_analisar(codigo_fonte))
+    assert ("f#1", "unroll(4)", False) in generator.loop_remarks()
+    print("✅ Laços rotacionados e dicas viram metadados llvm.loop")
+
+
+def testar_fast_math(tmp_path, capfd):
+    codigo_fonte = """
+    // @fastmath
+    function soma(escala) {
+        var total = 0;
+        for (var i = 1; i <= 1000; i = i + 1) { total = total + i * escala; }
+        return total;
+    }
+    function estrita(x) { return (x * 3) - 1; }
+    println(soma(2)); println(estrita(2));
+    """
+
+    print("=== TESTE DO FAST-MATH ===")
+    ir_code, saida = _executar(_analisar(codigo_fonte), capfd)
+    assert saida == ["1.001e+06", "5"]
+    soma = ir_code.split('define double @"soma"', 1)[1].split("\n}", 1)[0]
+    estrita = ir_code.split('define double @"estrita"', 1)[1].split("\n}", 1)[0]
+    assert "fadd reassoc nnan ninf contract double" in soma
+    assert "reassoc" not in estrita
+    assert '"no-nans-fp-math"="true"' in ir_code
+
+    # --fast-math vale para todas as funções; com reassoc a redução (de
+    # limite constante) é vetorizada no modo dividido
+    program = _analisar(codigo_fonte)
+    EffectAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2,
+                                  cache=FunctionCache(tmp_path), fast_math=True)
+    ir_code = generator.generate_code(program)
+    assert "x double>" in re.split(r'define .*@"?soma"?\(', ir_code, maxsplit=1)[1].split("\n}", 1)[0]
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.split() == ["1.001e+06", "5"]
+    print("✅ Flags fast-math só onde pedidas e redução vetorizada")
+
+
+# As versões de uma função são para os níveis de ISA do x86-64
+@pytest.mark.skipif(not llvm.get_process_triple().startswith("x86_64"),
+                    reason="multiversionamento só existe para x86-64")
+def testar_multiversao(capfd):
+    codigo_fonte = """
+    function soma(n) {
+        var t = 0;
+        for (var i = 0; i < n; i = i + 1) { t = t + i; }
+        return t;
+    }
+    // @multiversion
+    function fat(n) { if (n < 2) { return 1; } return n * fat(n - 1); }
+    function dobro(x) { return x * 2; }
+    println(soma(1000)); println(fat(10)); println(dobro(4));
+    """
+
+    print("=== TESTE DO MULTIVERSIONAMENTO ===")
+    program = _analisar(codigo_fonte)
+    EffectAnalyzer().analyze(program)
+    ir_code, saida = _executar(program, capfd)
+    assert saida == ["499500", "3.6288e+06", "8"]
+    # Só a anotada: versões com target-cpu e despacho pelo nível do cpuid
+    assert '@"fat.avx512"(double %"n") "target-cpu"="x86-64-v4" nounwind readnone' in ir_code
+    assert 'musttail call double @"fat.avx2"' in ir_code
+    assert "soma.avx2" not in ir_code
+    # A recursão fica dentro da versão
+    fat_avx2 = ir_code.split('define internal double @"fat.avx2"', 1)[1].split("\n}", 1)[0]
+    assert 'call double @"fat.avx2"' in fat_avx2
+    # O despacho escreve o cache do nível: perde o readnone
+    assert 'define double @"fat"(double %"n") nounwind\n' in ir_code
+
+    # --multiversion: também as funções com laços; CPU do host (--cpu native)
+    program = _analisar(codigo_fonte)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, cpu="native",
+                                  multiversion=True)
+    generator.generate_code(program)
+    assert generator.multiversioned_functions() == ["soma", "fat"]
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.split() == ["499500", "3.6288e+06", "8"]
+    print("✅ Versões por nível de CPU com despacho em tempo de execução")
+
+
+def testar_pgo(tmp_path, capfd):
+    codigo_fonte = """
+    function raro(x) { println(x); return x * 2; }
+    function passo(i) {
+        if (i == 777777) { return raro(i); }
+        return i + 1;
+    }
+    var total = 0;
+    for (var i = 0; i < 1000; i = i + 1) { total = total + passo(i); }
+    println(total);
+    """
+    fonte = tmp_path / "programa.js"
+    bruto = raw_profile_path(fonte)
+
+    print("=== TESTE DA OTIMIZAÇÃO GUIADA POR PERFIL ===")
+    # Build instrumentado: cada execução anexa os contadores ao arquivo bruto
+    program = _analisar(codigo_fonte)
+    EffectAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, pgo_generate=str(bruto),
+                                  source_digest="v1")
+    generator.generate_code(program)
+    capfd.readouterr()
+    generator.run_jit()
+    generator.run_jit()
+    assert capfd.readouterr().out.split() == ["500500", "500500"]
+    execucao = ["# js-pgo v1", "main 1", "main#1 1 0", "main#2 999 1",
+                "raro 0", "passo 1000", "passo#1 0 1000"]
+    assert bruto.read_text().splitlines() == execucao * 2
+
+    # Modo dividido: os mesmos pontos, escritos por um módulo à parte;
+    # execuções de outra versão do fonte são descartadas na junção
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, pgo_generate=str(bruto),
+                                  source_digest="v0", cache=FunctionCache(tmp_path / "cache"))
+    generator.generate_code(program)
+    generator.run_jit()
+    profile = update_profile(fonte, "v1")
+    assert (profile.runs, profile.stale_runs) == (2, 1)
+    assert not bruto.exists()
+    assert profile_path(fonte).read_text().splitlines()[:2] == ["# js-pgo v1 2", "main 2"]
+    assert profile.counts["passo#1"] == [0, 2000]
+    assert profile.cold_functions() == ["raro"]
+
+    # Build com o perfil: pesos dos desvios, contagem de entradas, 'raro'
+    # fria e o resumo que o LLVM usa para classificar quente/frio
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, profile=profile)
+    ir_code = generator.generate_code(program)
+    assert '!"ProfileSummary"' in ir_code
+    assert re.search(r'define double @"?passo"?\(double %"?i"?\) [^!]*!prof (!\d+)', ir_code)
+    assert '!{ !"function_entry_count", i64 2000 }' in ir_code
+    assert '!{ !"branch_weights", i32 0, i32 2000 }' in ir_code
+    assert re.search(r'define double @"?raro"?\(double %"?x"?\) cold', ir_code)
+    capfd.readouterr()
+    generator.run_jit()
+    assert capfd.readouterr().out.split() == ["500500"]
+    print("✅ Perfil gravado, juntado e aplicado aos desvios e funções frias")
@@ -0,0 +1,245 @@
+from lexer import Lexer
+from parser import Parser, ArrayLiteral, children
+from codegen import LLVMCodeGenerator, OptimizationLevel
+from escape import EscapeAnalyzer
+from incremental import FunctionCache
+
+
+def _executar(codigo_fonte, program=None, **opcoes):
+    """Gera o código e executa a main via JIT, retornando o código de saída."""
+    if program is None:
+        program = Parser(Lexer(codigo_fonte)).parse_program()
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0, **opcoes)
+    ir_code = generator.generate_code(program)
+    return ir_code, generator.run_jit()
+
+
+def _marcar_arrays_locais(node):
+    """Marca todos os ArrayLiteral da subárvore como não escapando."""
+    if isinstance(node, ArrayLiteral):
+        node.escapes = False
+    for item in children(node):
+        _marcar_arrays_locais(item)
+
+
+def testar_strings_runtime():
+    # O 'return' no topo vira o código de saída da main (sem análise semântica)
+    codigo_fonte = """
+    var s = "";
+    for (var i = 0; i < 1000; i = i + 1) {
+        s = s + "ab";
+    }
+    var t = s + "!";
+    var u = s + "?";
+    var iguais = (t == u) + (concat(s, "!") == t) * 10;
+    return length(t) + length(u) + length("olá") + iguais;
+    """
+
+    print("=== TESTE DA RUNTIME DE STRINGS ===")
+    ir_code, codigo_saida = _executar(codigo_fonte)
+
+    # Literais viram descritores estáticos com comprimento e hash
+    assert '%"JSString" = type {i64, i64, i8*, %"JSBuffer"*}' in ir_code
+    assert 'constant %"JSString" {i64 2,' in ir_code
+
+    # 2001 + 2001 + 4 (UTF-8) + 10 = 4016 -> truncado para o código de saída
+    assert codigo_saida == 4016, codigo_saida
+    print("✅ Concatenação, comprimento e igualdade funcionando")
+
+
+def testar_arrays_e_arena(capfd):
+    codigo_fonte = """
+    function soma_temporaria(n) {
+        var tmp = [1, 2, 3];
+        push(tmp, n);
+        tmp[6] = 1;
+        return tmp[0] + tmp[3] + length(tmp);
+    }
+    var total = 0;
+    for (var i = 0; i < 1000; i = i + 1) {
+        total = total + soma_temporaria(1);
+    }
+    var lista = [5, 6];
+    push(lista, 7);
+    return total + pop(lista) + length(lista);
+    """
+
+    print("=== TESTE DE ARRAYS E ARENA POR FRAME ===")
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    # A análise de escape marcaria o array temporário da função como local
+    _marcar_arrays_locais(program.statements[0])
+    ir_code, codigo_saida = _executar(None, program=program, instrument_allocations=True)
+
+    assert "call void @\"js_arena_release\"" in ir_code
+    # 1000 * (1 + 1 + 7) + 7 + 2
+    assert codigo_saida == 9009, codigo_saida
+
+    saida = capfd.readouterr().out
+    # Por chamada: cabeçalho, dados e o crescimento do array ficam na arena
+    assert "arena: 3000 alocacoes" in saida, saida
+    print("✅ Arrays temporários alocados na arena e liberados no retorno")
+
+
+def testar_analise_de_escape(capfd):
+    codigo_fonte = """
+    var global = 0;
+    function local(n) {
+        var pequeno = [n, 2, 3];
+        push(pequeno, n);
+        var t = 0;
+        for (var i = 0; i < 4; i = i + 1) {
+            var par = [i, n];
+            t = t + par[0] + pequeno[i];
+        }
+        var s = "ab" + "cd";
+        return t + length(s) + length(pequeno);
+    }
+    function vaza() {
+        var r = [7, 8];
+        global = r;
+        return 0;
+    }
+    return local(10);
+    """
+
+    print("=== TESTE DA ANÁLISE DE ESCAPE ===")
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    relatorio = EscapeAnalyzer().analyze(program)
+    # 'pequeno' vai para a pilha; 'par' (em laço) e a concatenação, para a arena
+    assert relatorio["local"] == {'stack': 1, 'arena': 2, 'heap': 0}, relatorio
+    assert relatorio["vaza"] == {'stack': 0, 'arena': 0, 'heap': 1}, relatorio
+
+    # Só 'local' é gerada: atribuir array a uma global de número não é suportado
+    program.statements = [program.statements[1], program.statements[3]]
+    ir_code, codigo_saida = _executar(None, program=program, instrument_allocations=True)
+
+    # Capacidade arredondada: o push cabe no próprio armazenamento da pilha
+    assert "alloca [4 x double]" in ir_code
+    # (0+1+2+3) + (10+2+3+10) + 4 + 4
+    assert codigo_saida == 39, codigo_saida
+
+    saida = capfd.readouterr().out
+    # Arena: cabeçalho e dados de 'par' (x4) e o descritor da concatenação
+    assert "arena: 9 alocacoes" in saida, saida
+    print("✅ Alocações que não escapam ficam na pilha ou na arena")
+
+
+def testar_arrays_constantes():
+    codigo_fonte = """
+    function altera(n) {
+        var t = [1, 2, -3 * 2];
+        t[0] = t[0] + n;
+        return t[0] + t[2];
+    }
+    const tabela = [10, 20, 30, 40];
+    const outra = [10, 20, 30, 40];
+    const mutavel = [5, 6];
+    push(mutavel, 7);
+    var copia = [1, 2, -3 * 2];
+    var x = pop(copia);
+    push(copia, 100);
+    var soma = 0;
+    for (var i = 0; i < 3; i = i + 1) {
+        soma = soma + altera(i);
+    }
+    return soma + tabela[3] + outra[0] + length(mutavel) * 1000 + copia[2] + x;
+    """
+
+    print("=== TESTE DE ARRAYS CONSTANTES ===")
+    ir_code, codigo_saida = _executar(codigo_fonte)
+
+    # Literais iguais compartilham a mesma global; 'tabela' e 'outra' usam
+    # o descritor constante no lugar, sem alocação
+    assert ir_code.count("= private unnamed_addr constant [4 x double]") == 1
+    assert ir_code.count("= private constant %\"JSArray\"") == 1
+    assert "js_array_new_shared" in ir_code
+    # Cada chamada de 'altera' vê os dados originais: (1-6) + (2-6) + (3-6)
+    # -12 + 40 + 10 + 3000 + 100 - 6
+    assert codigo_saida == 3132, codigo_saida
+    print("✅ Arrays constantes vêm de globais e são copiados só na escrita")
+
+
+def testar_geracao_paralela(capfd):
+    codigo_fonte = """
+    function fat(n) { if (n < 2) { return 1; } return n * fat(n - 1); }
+    function temp(n) { var t = [n, 2]; var s = "ab" + "c"; return t[0] + t[1] + length(s); }
+    function soma(n) { return fat(n) + temp(n); }
+    function dobro(n) { return soma(n) * 2; }
+    return dobro(5);
+    """
+
+    print("=== TESTE DA GERAÇÃO PARALELA ===")
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    EscapeAnalyzer().analyze(program)
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O2, instrument_allocations=True,
+                                  jobs=2, reoptimize=True)
+    ir_code = generator.generate_code(program)
+
+    # Funções vêm dos workers; o estado da runtime existe uma vez só
+    assert ir_code.count('@js_stat_arena_allocs = ') == 1
+    # (120 + 5 + 2 + 3) * 2
+    assert generator.run_jit() == 260
+    # Contador compartilhado: o descritor da concatenação em 'temp' (worker)
+    assert "arena: 1 alocacoes" in capfd.readouterr().out
+    print("✅ Módulos gerados em paralelo e ligados")
+
+
+def testar_cache_incremental(tmp_path):
+    versao_1 = """
+    function fat(n) { if (n < 2) { return 1; } return n * fat(n - 1); }
+    function dobro(n) { return n * 2; }
+    function soma(n) { return fat(n) + dobro(n); }
+    return soma(5);
+    """
+    # Só 'dobro' muda: 'fat' e 'soma' (mesmas assinaturas) vêm do cache
+    versao_2 = versao_1.replace("return n * 2;", "return n * 3;")
+
+    print("=== TESTE DO CACHE INCREMENTAL ===")
+    resultados = []
+    for codigo_fonte in (versao_1, versao_1, versao_2):
+        cache = FunctionCache(tmp_path)
+        _, saida = _executar(codigo_fonte, cache=cache)
+        resultados.append((saida, cache.hits, cache.misses))
+    assert resultados == [(120 + 10, 0, 3), (130, 3, 0), (120 + 15, 2, 1)]
+
+    # A assinatura das funções chamadas faz parte da impressão digital
+    soma = Parser(Lexer(versao_1)).parse_program().statements[2]
+    opcoes = (OptimizationLevel.O0, False)
+    assert (cache.fingerprint(soma, {"fat": 1, "dobro": 1}, opcoes)
+            != cache.fingerprint(soma, {"fat": 1, "dobro": 2}, opcoes))
+    print("✅ Apenas as funções alteradas foram regeradas")
+
+
+def testar_variaveis_globais(tmp_path):
+    codigo_fonte = """
+    const N = 10;
+    const NOME = "abc";
+    const TABELA = [1, 2, 3];
+    var contador = 0;
+    var passo = N / 5;
+    function incrementa() { contador = contador + passo; return contador; }
+    function total() {
+        var s = 0;
+        for (var i = 0; i < N; i = i + 1) { s = s + incrementa(); }
+        return s + length(NOME) + TABELA[2];
+    }
+    return total();
+    """
+
+    print("=== TESTE DAS VARIÁVEIS GLOBAIS ===")
+    ir_code, saida = _executar(codigo_fonte)
+    # (2 + 4 + ... + 20) + 3 + 3
+    assert saida == 116
+    # Variáveis do topo viram globais internas; 'const' numérico vira imediato
+    assert '@"global.contador" = internal global double' in ir_code
+    assert '"global.N"' not in ir_code
+    assert '@"global.NOME" = internal constant' in ir_code
+
+    # Funções em módulos separados enxergam as mesmas globais
+    _, saida = _executar(codigo_fonte, cache=FunctionCache(tmp_path))
+    assert saida == 116
+    print("✅ Globais compartilhadas entre main e funções")
+
+
+if __name__ == "__main__":
+    testar_strings_runtime()
@@ -1,6 +1,9 @@
+import llvmlite.binding as llvm
+
 from lexer import Lexer
 from parser import Parser
 from analisadorSintatico import SemanticAnalyzer
+from codegen import LLVMCodeGenerator, OptimizationLevel
 
 def testar_semantico_pdf():
     # O mesmo código da especificação que o Parser aceitou
@@ -83,5 +86,70 @@ def testar_semantico_pdf():
         print("  2. Os escopos (if, while, for) estão funcionando.")
         print("  3. Não há variáveis não declaradas.")
 
+def testar_slots_resolvidos(capfd):
+    codigo_fonte = """
+    function calcula(n) {
+        let x = n;
+        if (n > 0) {
+            let x = n * 10;
+            if (x > 5) {
+                let x = 1000;
+                n = n + x;
+            }
+            n = n + x;
+        }
+        return n + x;
+    }
+    println(calcula(2));
+    """
+
+    print("=== TESTE DE SLOTS RESOLVIDOS ===")
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    assert SemanticAnalyzer().analyze(program) == []
+
+    funcao = program.statements[0]
+    # n + três declarações de x (sombreadas), cada uma no seu slot
+    assert funcao.slot_count == 4
+    retorno = funcao.body.statements[-1].value
+    assert retorno.right.symbol.slot == 1
+    assert retorno.right.symbol.frame is funcao
+    chamada = program.statements[1].expr.args[0]
+    assert chamada.symbol is funcao.symbol
+
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O0)
+    generator.generate_code(program)
+    generator.run_jit()
+    # n = 2 + 1000 + 20; retorno n + x externo (2)
+    assert capfd.readouterr().out.strip().endswith("1024")
+    print("✅ Identificadores resolvidos uma vez e usados pelo codegen via slots")
+
+
+def testar_recursao_mutua_o3(capfd):
+    # Chamadas antes das definições e recursão mútua
+    codigo_fonte = """
+    println(par(10) + impar(7) * 10);
+    function par(n) { if (n == 0) { return 1; } return impar(n - 1); }
+    function impar(n) { if (n == 0) { return 0; } return par(n - 1); }
+    """
+
+    print("=== TESTE DE RECURSÃO MÚTUA (O3) ===")
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    assert SemanticAnalyzer().analyze(program) == []
+
+    generator = LLVMCodeGenerator(optimization_level=OptimizationLevel.O3)
+    generator.generate_code(program)
+    module = llvm.parse_assembly(str(generator.module))
+    generator._run_pass_pipeline(module)
+
+    # Chamadas diretas: o inliner junta par/impar e elimina a recursão
+    par = str(module.get_function("par"))
+    assert "call" not in par
+    assert "double 1.100000e+01" in str(module.get_function("main"))
+
+    generator.run_jit()
+    assert capfd.readouterr().out.strip().endswith("11")
+    print("✅ Protótipos declarados antes dos corpos; chamadas diretas e inlináveis")
+
+
 if __name__ == "__main__":
-    testar_semantico_pdf()
\ No newline at end of file
+    testar_semantico_pdf()
@@ -1,6 +1,6 @@
 from lexer import Lexer
 from parser import Parser
-from analisadorSintatico import SemanticAnalyzer
+from analisadorSintatico import SemanticAnalyzer, ParallelSemanticAnalyzer
 
 def testar_erros_semanticos():
     # Este código contém PROPOSITALMENTE vários erros semânticos.
@@ -71,5 +71,67 @@ def testar_erros_semanticos():
     else:
         print("🔴 FALHA GRAVE: O compilador aceitou código inválido!")
 
+def testar_tabela_plana_equivalente():
+    # A tabela plana deve aplicar exatamente as mesmas regras da encadeada
+    codigo_fonte = """
+    var a = 1;
+    var a = 2;
+    let b = 1;
+    var b = 2;
+    const c = 1;
+    function f(p, q) {
+        var p = 1;
+        var d = 1;
+        var d = 2;
+        if (p > 0) {
+            let b = 5;
+            let b = 6;
+            var a = b + q;
+        }
+        for (let i = 0; i < 2; i = i + 1) {
+            let c = i;
+            c = c + 1;
+        }
+        c = 3;
+        return i;
+    }
+    var print = 1;
+    """
+
+    print("=== TESTE DA TABELA DE SÍMBOLOS PLANA ===")
+    program = Parser(Lexer(codigo_fonte)).parse_program()
+    erros_encadeada = SemanticAnalyzer(flat_scopes=False).analyze(program)
+    erros_plana = SemanticAnalyzer(flat_scopes=True).analyze(program)
+
+    assert len(erros_encadeada) == 7, erros_encadeada
+    assert erros_plana == erros_encadeada
+    print("✅ Mesmos erros com as duas implementações de escopo")
+
+
+def testar_analise_paralela_deterministica():
+    codigo_fonte = """
+    var antes = 1;
+    function usa_antes() { return antes + depois; }
+    x = 1;
+    function duplicados(a, a) { let b = 1; let b = 2; return b; }
+    var depois = 2;
+    function ok(n) { if (n > 0) { let t = n; return t + antes + depois; } return ok(n - 1); }
+    const k = 1;
+    function altera_k() { k = 2; return nao_existe(); }
+    k = 3;
+    """
+
+    print("=== TESTE DA ANÁLISE SEMÂNTICA PARALELA ===")
+    esperado = SemanticAnalyzer().analyze(Parser(Lexer(codigo_fonte)).parse_program())
+    assert len(esperado) == 7, esperado
+
+    for executor in ("process", "thread"):
+        program = Parser(Lexer(codigo_fonte)).parse_program()
+        erros = ParallelSemanticAnalyzer(workers=2, executor=executor).analyze(program)
+        assert erros == esperado, (executor, erros)
+        assert program.statements[5].symbol.kind == 'function'
+    print("✅ Mesmos erros, na ordem do código, com processos e threads")
+
+
 if __name__ == "__main__":
     testar_erros_semanticos()
\ No newline at end of file